@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""
+Scraper Benchmarks for Nicaragua Schools Dataset
+
+This module benchmarks the scraper against a local stand-in for the MINED
+education map, so timings can be compared without touching the real server.
+The stand-in serves synthetic Georreferencia.aspx pages that follow the same
+structure as the real ones (dropdowns, H1 counter, CDATA with L.marker calls).
+
+Usage:
+    python benchmarks.py engines                    # HTTP vs Selenium per municipality
+    python benchmarks.py engines --schools 400 --municipalities 10
+    python benchmarks.py blocking                   # Page bytes with and without asset blocking
+    python benchmarks.py parser                     # Single-pass vs legacy page parser
+    python benchmarks.py parser --archive snapshots # ... on the latest archived pages
+    python benchmarks.py pathological               # Fuzz the bounded scanners, time malformed pages
+    python benchmarks.py dropdowns                  # Scanner vs full-tree dropdown extraction
+    python benchmarks.py dropdowns --archive snapshots
+"""
+
+import argparse
+import contextlib
+import gzip
+import html
+import io
+import random
+import re
+import statistics
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import main_scraper
+
+MODALITIES = [
+    ("10", "PREESCOLAR COMUNITARIO MULTINIVEL"),
+    ("11", "PREESCOLAR FORMAL"),
+    ("14", "PRIMARIA MULTIGRADO"),
+    ("15", "PRIMARIA REGULAR"),
+    ("19", "SECUNDARIA REGULAR"),
+    ("21", "SECUNDARIA A DISTANCIA"),
+    ("25", "EDUCACION ESPECIAL"),
+]
+
+PROGRAMS = [
+    ("1", "EDUCACION INICIAL"),
+    ("2", "PRIMARIA"),
+    ("3", "SECUNDARIA"),
+    ("6", "CEDA"),
+    ("7", "ALFABETIZACION"),
+    ("20", "EDUCACION ESPECIAL"),
+]
+
+SCHOOL_WORDS = ["SAN JOSÉ", "RUBÉN DARÍO", "LA ESPERANZA", "EL PROGRESO", "SANTA ANA",
+                "CRISTO REY", "LOS ÁNGELES", "NUEVA ALIANZA", "SAN MARTÍN", "EL CARMEN"]
+
+
+def build_sample_page(municipality_id, n_schools=120, seed=None):
+    """
+    Build a synthetic Georreferencia.aspx page.
+
+    Args:
+        municipality_id (int): Municipality ID rendered in the page
+        n_schools (int): Number of schools (markers and dropdown options)
+        seed (int): Random seed, defaults to the municipality ID
+
+    Returns:
+        str: HTML page
+    """
+    rng = random.Random(municipality_id if seed is None else seed)
+
+    schools = []
+    for i in range(n_schools):
+        # Repeat some names on purpose: same-named schools are distinct institutions
+        name = rng.choice(SCHOOL_WORDS) if rng.random() < 0.3 else f"{rng.choice(SCHOOL_WORDS)} {i + 1}"
+        modalities = rng.sample([label for _, label in MODALITIES], rng.randint(1, 3))
+        schools.append({
+            'id': str(1000 + municipality_id * 1000 + i),
+            'name': name,
+            'address': f"COMARCA {rng.randint(1, 80)}, {rng.randint(1, 5)} KM AL NORTE.",
+            'lat': f"{rng.uniform(11.0, 14.5):.8f}",
+            'lng': f"{rng.uniform(-87.0, -83.5):.8f}",
+            'modalities': modalities,
+        })
+
+    def options(name, entries, placeholder):
+        lines = [f'<select name="ctl00$ContentPlaceHolder1${name}" id="ContentPlaceHolder1_{name}">',
+                 f'\t<option value="">{placeholder}</option>']
+        lines += [f'\t<option value="{value}">{html.escape(label)}</option>' for value, label in entries]
+        lines.append('</select>')
+        return '\n'.join(lines)
+
+    markers = []
+    for school in schools:
+        items = ''.join(f"<li>{html.escape(m)}</li>" for m in school['modalities'])
+        popup = (f"<b>Nombre:</b> {html.escape(school['name'], quote=False)}<br>"
+                 f"<b>Dirección:</b> {html.escape(school['address'], quote=False)}<br>"
+                 f"<b>Modalidades:</b><ul>{items}</ul>")
+        markers.append(f"L.marker([{school['lat']}, {school['lng']}], {{icon: schoolIcon}})"
+                       f".addTo(map).bindPopup('{popup}');")
+
+    viewstate = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/')
+                        for _ in range(2000))
+
+    return f"""<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>Mapa de la Educación</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.3.1/dist/leaflet.css" />
+<script src="https://unpkg.com/leaflet@1.3.1/dist/leaflet.js"></script>
+</head>
+<body>
+<form method="post" action="./Georreferencia.aspx?Municipio={municipality_id}" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<h1 id="ContentPlaceHolder_H1Contador" class="contador">Centros Educativos: {n_schools}</h1>
+{options('ddlCentroEducativo', [(s['id'], s['name']) for s in schools], '-- Escriba nombre del centro --')}
+{options('ddlModalidad', MODALITIES, 'SELECCIONE')}
+{options('ddlPrograma', PROGRAMS, 'SELECCIONE')}
+<div id="map" style="height: 600px;"></div>
+<script type="text/javascript">
+//<![CDATA[
+var osmUrl = 'https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', osmAttrib = '&copy; OpenStreetMap', osm = L.tileLayer(osmUrl, {{maxZoom: 18, attribution: osmAttrib}});
+var map = L.map('map').setView([12.86, -85.21], 10).addLayer(osm);
+var schoolIcon = L.icon({{iconUrl: 'img/escuela.png', iconSize: [24, 24]}});
+{chr(10).join(markers)}
+//]]>
+</script>
+</form>
+</body>
+</html>
+"""
+
+
+class StandInServer:
+    """Local HTTP server that imitates the MINED education map endpoints"""
+
+    def __init__(self, n_schools=120, latency=0.05, port=0):
+        self.n_schools = n_schools
+        self.latency = latency
+        self._pages = {}
+        self._pages_lock = threading.Lock()
+        self.requests_served = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests_served += 1
+                time.sleep(server.latency)
+
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.endswith('Georreferencia.aspx') and 'Municipio' in query:
+                    body = server.page(int(query['Municipio'][0])).encode('utf-8')
+                else:
+                    body = b'<html><body><a href="mapa-de-la-educacion/">Mapa</a></body></html>'
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Set-Cookie', 'ASP.NET_SessionId=standin; path=/; HttpOnly')
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def page(self, municipality_id):
+        with self._pages_lock:
+            if municipality_id not in self._pages:
+                self._pages[municipality_id] = build_sample_page(municipality_id, self.n_schools)
+            return self._pages[municipality_id]
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def quiet():
+    """Silence the scraper's per-page progress output while timing"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def summarize(label, timings):
+    """Print mean/median/max of a list of per-municipality timings"""
+    if not timings:
+        print(f"  {label:<10} skipped")
+        return
+    print(f"  {label:<10} mean {statistics.mean(timings) * 1000:8.1f} ms   "
+          f"median {statistics.median(timings) * 1000:8.1f} ms   "
+          f"max {max(timings) * 1000:8.1f} ms   (n={len(timings)})")
+
+
+def benchmark_engines(n_municipalities=5, n_schools=120, latency=0.05, include_selenium=True):
+    """
+    Compare per-municipality latency of the HTTP and Selenium engines.
+
+    Politeness sleeps are excluded on both sides; the numbers cover fetching,
+    browser startup/rendering where applicable, and parsing.
+
+    Returns:
+        dict: engine name -> list of per-municipality timings in seconds
+    """
+    municipality_ids = list(range(1, n_municipalities + 1))
+    results = {'http': [], 'selenium': []}
+
+    with StandInServer(n_schools=n_schools, latency=latency) as server:
+        context = main_scraper.ScraperContext(engine='http', base_url=server.base_url)
+        print(f"Stand-in server at {server.base_url} "
+              f"({n_schools} schools/page, {latency * 1000:.0f} ms latency)")
+
+        for municipality_id in municipality_ids:
+            start = time.perf_counter()
+            page_source = main_scraper.fetch_page_http(context.http_session, context.municipality_url(municipality_id))
+            with quiet():
+                schools, _ = main_scraper.get_school_data_from_page_source(page_source)
+            results['http'].append(time.perf_counter() - start)
+            assert len(schools) == n_schools, f"HTTP engine extracted {len(schools)}/{n_schools} schools"
+        context.close()
+
+        if include_selenium:
+            for municipality_id in municipality_ids:
+                start = time.perf_counter()
+                driver = main_scraper.create_stealth_driver()
+                if driver is None:
+                    print("  Selenium unavailable, skipping browser engine")
+                    break
+                try:
+                    driver.get(context.municipality_url(municipality_id))
+                    main_scraper.wait_for_map_ready(driver)
+                    with quiet():
+                        schools, _ = main_scraper.get_school_data_from_page_source(driver.page_source)
+                finally:
+                    driver.quit()
+                results['selenium'].append(time.perf_counter() - start)
+
+    return results
+
+
+def benchmark_blocking(n_municipalities=3, n_schools=120, latency=0.05):
+    """
+    Measure Selenium page weight before and after DevTools URL blocking.
+
+    The stand-in pages load Leaflet and OpenStreetMap tiles from the internet
+    like the real map does, so the numbers need network access.
+
+    Returns:
+        dict: 'before'/'after' -> list of per-page stats (bytes, requests, blocked, seconds)
+    """
+    results = {'before': [], 'after': []}
+
+    with StandInServer(n_schools=n_schools, latency=latency) as server:
+        context = main_scraper.ScraperContext(base_url=server.base_url)
+        for label, blocked in (('before', []), ('after', main_scraper.BLOCKED_URL_PATTERNS)):
+            driver = main_scraper.create_stealth_driver(capture_network=True)
+            if driver is None:
+                print("  Selenium unavailable, skipping")
+                return results
+            try:
+                network = main_scraper.NetworkMonitor(driver, blocked, main_scraper.ALLOWED_URL_PATTERNS)
+                for municipality_id in range(1, n_municipalities + 1):
+                    network.start_page()
+                    start = time.perf_counter()
+                    driver.get(context.municipality_url(municipality_id))
+                    main_scraper.wait_for_map_ready(driver)
+                    stats = network.page_stats()
+                    stats['seconds'] = time.perf_counter() - start
+                    results[label].append(stats)
+            finally:
+                driver.quit()
+
+    return results
+
+
+# Markup variations the legacy parser accepts; the single-pass parser must
+# either reproduce its output or fall back to it
+PAGE_MUTATIONS = {
+    'entities': lambda page: page.replace('PRIMARIA REGULAR</option>', 'PRIMARIA REGULAR &#205;ND&#x49;CE &amp; M&aacute;S</option>'),
+    'onchange': lambda page: page.replace('id="ContentPlaceHolder1_ddlModalidad"',
+                                          'id="ContentPlaceHolder1_ddlModalidad" onchange="javascript:setTimeout(&#39;__doPostBack()&#39;, 0)"'),
+    'upper_case_tags': lambda page: page.replace('<option value="14">', '<OPTION value="14">'),
+    'comment_in_select': lambda page: page.replace('<option value="15">', '<!-- regular --><option value="15">'),
+    'select_in_comment': lambda page: page.replace('<div id="map"', '<!-- <select name="ctl00$ContentPlaceHolder1$ddlPrograma"></select> --><div id="map"'),
+    'unknown_entity': lambda page: page.replace('PREESCOLAR FORMAL</option>', 'PREESCOLAR &copy; FORMAL</option>'),
+    'no_counter': lambda page: page.replace('id="ContentPlaceHolder_H1Contador" ', ''),
+    'popup_missing': lambda page: page.replace(".addTo(map).bindPopup('", ".addTo(map);\nvar p = ('", 1),
+    'plain_nombre': lambda page: page.replace('<b>Nombre:</b>', 'Nombre:'),
+    'no_cdata': lambda page: page.replace('//<![CDATA[\nvar osmUrl', '//<![CDATA[\nvar tiles'),
+}
+
+
+def benchmark_parser(archive_dir=None, n_pages=40, n_schools=120, repeat=3):
+    """
+    Compare the single-pass page parser with the legacy multi-pass parser.
+
+    Every page is parsed by both; their records and dropdown lookups must be
+    identical (a differential test), and the bytes parsed per second are
+    measured over `repeat` rounds.
+
+    Args:
+        archive_dir (str): Snapshot archive with real pages; synthetic pages
+            and their PAGE_MUTATIONS variants are used if None
+        n_pages (int): Synthetic pages to build
+        n_schools (int): Schools per synthetic page
+        repeat (int): Timing rounds per parser
+
+    Returns:
+        dict: pages, bytes, mismatches (labels), fallbacks, and seconds per parser
+    """
+    pages = []
+    if archive_dir:
+        from snapshot_archive import SnapshotArchive
+        archive = SnapshotArchive(archive_dir)
+        for (dep_id, mun_id), entry in sorted(archive.latest_entries().items()):
+            pages.append((f"{dep_id}-{mun_id}", archive.load(entry['sha256'])))
+    else:
+        for i in range(n_pages):
+            page = build_sample_page(i + 1, n_schools=n_schools if i % 4 else max(1, n_schools // 10))
+            pages.append((f"synthetic-{i + 1}", page))
+        for kind, mutate in PAGE_MUTATIONS.items():
+            pages.append((kind, mutate(build_sample_page(100, n_schools=n_schools))))
+
+    def parse(function, page):
+        schools, stats = function(page)
+        return schools, stats.get('modalities_lookup'), stats.get('programs_lookup')
+
+    mismatches = []
+    fallbacks = Counter()
+    with quiet():
+        for label, page in pages:
+            if parse(main_scraper.get_school_data_from_page_source, page) != \
+                    parse(main_scraper.legacy_get_school_data_from_page_source, page):
+                mismatches.append(label)
+            scan = main_scraper.scan_page(page)
+            if scan is None:
+                fallbacks['markup'] += 1
+            elif not scan.nombres_bold and not scan.nombres_plain:
+                fallbacks['no target names'] += 1
+
+    seconds = {}
+    for name, function in (('single-pass', main_scraper.get_school_data_from_page_source),
+                           ('legacy', main_scraper.legacy_get_school_data_from_page_source)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with quiet():
+                for _, page in pages:
+                    function(page)
+            best = min(best, time.perf_counter() - start)
+        seconds[name] = best
+
+    return {'pages': len(pages), 'bytes': sum(len(page.encode('utf-8')) for _, page in pages),
+            'mismatches': mismatches, 'fallbacks': fallbacks, 'seconds': seconds}
+
+
+def benchmark_dropdowns(archive_dir=None, n_pages=40, n_schools=120, repeat=3):
+    """
+    Compare the scanner's dropdown reading with extract_dropdown_data.
+
+    extract_dropdown_data builds a BeautifulSoup tree of the whole page; the
+    single-pass parser reads the three <select> blocks with page_scanner
+    instead (timed here on their own with scan_page(dropdowns_only=True)).
+    Both must give the same school list and lookups on every page the
+    scanner accepts, and the time per page is measured over `repeat` rounds.
+
+    Args:
+        archive_dir (str): Snapshot archive with real pages; synthetic pages
+            and their PAGE_MUTATIONS variants are used if None
+        n_pages (int): Synthetic pages to build
+        n_schools (int): Schools per synthetic page
+        repeat (int): Timing rounds per extractor
+
+    Returns:
+        dict: pages, mismatches (labels), fallbacks (pages the scanner
+            leaves to the tree), and seconds per extractor
+    """
+    pages = []
+    if archive_dir:
+        from snapshot_archive import SnapshotArchive
+        archive = SnapshotArchive(archive_dir)
+        for (dep_id, mun_id), entry in sorted(archive.latest_entries().items()):
+            pages.append((f"{dep_id}-{mun_id}", archive.load(entry['sha256'])))
+    else:
+        for i in range(n_pages):
+            pages.append((f"synthetic-{i + 1}", build_sample_page(i + 1, n_schools=n_schools)))
+        for kind, mutate in PAGE_MUTATIONS.items():
+            pages.append((kind, mutate(build_sample_page(100, n_schools=n_schools))))
+
+    def scanned(page):
+        scan = main_scraper.scan_page(page, dropdowns_only=True)
+        if scan is None:
+            return None
+        catalog = main_scraper.build_catalog(scan.options['ddlModalidad'], scan.options['ddlPrograma'])
+        return main_scraper.build_dropdown_data(scan.options['ddlCentroEducativo'], catalog)
+
+    def lookups(dropdown_data):
+        return tuple(dropdown_data[key] for key in ('schools_list', 'modalities_lookup', 'programs_lookup'))
+
+    mismatches = []
+    fallbacks = 0
+    with quiet():
+        for label, page in pages:
+            dropdown_data = scanned(page)
+            if dropdown_data is None:
+                fallbacks += 1
+            elif lookups(dropdown_data) != lookups(main_scraper.extract_dropdown_data(page)):
+                mismatches.append(label)
+
+    seconds = {}
+    for name, function in (('scanner', scanned), ('full tree', main_scraper.extract_dropdown_data)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with quiet():
+                for _, page in pages:
+                    function(page)
+            best = min(best, time.perf_counter() - start)
+        seconds[name] = best
+
+    return {'pages': len(pages), 'mismatches': mismatches, 'fallbacks': fallbacks, 'seconds': seconds}
+
+
+# The lazy patterns the bounded scanners in page_scanner.py replace
+LEGACY_MARKER = re.compile(r'L\.marker\(\[([^,]+),\s*([^,]+)\].*?\.bindPopup\(\'([^\']*)\'\);', re.DOTALL)
+LEGACY_COUNTERS = [re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+    r'ContentPlaceHolder_H1Contador[^>]*>([^<]+)',
+    r'ContentPlaceHolder.*?H1.*?Contador[^>]*>([^<]+)',
+    r'H1Contador[^>]*>([^<]+)',
+    r'id=["\'].*?contador.*?["\'][^>]*>([^<]+)',
+    r'class=["\'].*?contador.*?["\'][^>]*>([^<]+)',
+)]
+LEGACY_TARGET_CDATA = re.compile(r'//<!\[CDATA\[\s*var osmUrl\s*=(.*?)//\]\]>', re.DOTALL)
+LEGACY_CDATA = re.compile(r'//<!\[CDATA\[(.*?)//\]\]>', re.DOTALL)
+
+FUZZ_TOKENS = ['L.marker([', ',', ', ', ' ', '\n', ']', "'", "');", ".bindPopup('", '12.5', '-85.1', 'x', 'ab',
+               '<', '>', '"', '</h1>', '<b>Nombre:</b> ', 'Nombre: ', 'ContentPlaceHolder', 'CONTENTPLACEHOLDER',
+               'ContentPlaceHolder_H1Contador', 'H1', 'h1Contador', 'Contador', 'contador', 'id="', "id='",
+               'class="', "CLASS='", '//<![CDATA[', ' var osmUrl =', 'var osmUrl=', '//]]>', '<select>', '<script>']
+
+
+def legacy_counter_text(page):
+    for pattern in LEGACY_COUNTERS:
+        match = pattern.search(page)
+        if match:
+            return match.group(1)
+    return None
+
+
+def legacy_bounded_markers(page):
+    """The legacy marker regex, each match limited to the text before the next marker"""
+    heads = [match.start() for match in re.finditer(r'L\.marker\(\[', page)] + [len(page)]
+    markers = []
+    for start, end in zip(heads, heads[1:]):
+        match = LEGACY_MARKER.match(page, start, end)
+        if match:
+            markers.append((match.group(1).strip(), match.group(2).strip(), match.group(3)))
+    return markers
+
+
+def fuzz_scanners(iterations=3000, seed=0, max_tokens=60):
+    """
+    Compare the bounded scanners with the legacy regexes on random token soups.
+
+    Returns:
+        list: (check, page) for every disagreement
+    """
+    from page_scanner import find_counter_text, find_target_cdata, iter_cdata_sections, iter_markers, scan_page
+
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(iterations):
+        page = ''.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, max_tokens)))
+        target = LEGACY_TARGET_CDATA.search(page)
+        checks = {
+            'markers': list(iter_markers(page)) == legacy_bounded_markers(page),
+            'counter': find_counter_text(page) == legacy_counter_text(page),
+            'target_cdata': find_target_cdata(page) == (target.span(1) if target else None),
+            'cdata_sections': list(iter_cdata_sections(page)) == LEGACY_CDATA.findall(page),
+        }
+        scan = scan_page(page)
+        if scan is not None:
+            first_counter = LEGACY_COUNTERS[0].search(page)
+            checks['scan_markers'] = scan.markers == list(iter_markers(page))
+            checks['scan_counter'] = scan.counter_text == (first_counter.group(1) if first_counter else None)
+            checks['scan_cdata'] = scan.cdata_found == (target is not None)
+        failures += [(check, page) for check, passed in checks.items() if not passed]
+    return failures
+
+
+def build_pathological_page(kind, n):
+    """
+    A page with n repeated units that makes the lazy legacy patterns backtrack.
+
+    Kinds: markers_without_popup, counter_missing, placeholders_without_counter,
+    unterminated_cdata.
+    """
+    page = build_sample_page(1, n_schools=5)
+    if kind == 'markers_without_popup':
+        units = ''.join(f"L.marker([12.{i}, -85.{i}], {{icon: schoolIcon}}).addTo(map);\n" for i in range(n))
+        return page.replace('//]]>', units + '//]]>')
+    if kind == 'counter_missing':
+        page = page.replace('id="ContentPlaceHolder_H1Contador" class="contador"', '')
+        units = ''.join(f'<div id="row{i}" class="fila">{i}</div>\n' for i in range(n))
+        return page.replace('<div id="map"', units + '<div id="map"')
+    if kind == 'placeholders_without_counter':
+        page = page.replace('id="ContentPlaceHolder_H1Contador" class="contador"', '')
+        units = ''.join(f'<span id="ContentPlaceHolder1_l{i}">H1</span>\n' for i in range(n))
+        return page.replace('<div id="map"', units + '<div id="map"')
+    if kind == 'unterminated_cdata':
+        units = ''.join(f"//<![CDATA[\nvar osmUrl = 'tile{i}';\n" for i in range(n))
+        return page.replace('</form>', f"<script>{units}</script>\n</form>")
+    raise ValueError(f"Unknown pathological page kind: {kind}")
+
+
+PATHOLOGICAL_KINDS = ('markers_without_popup', 'counter_missing', 'placeholders_without_counter', 'unterminated_cdata')
+
+
+def benchmark_pathological(sizes=(250, 500, 1000, 2000, 4000), budget=5.0):
+    """
+    Time the legacy regexes and the bounded scanners on growing pathological pages.
+
+    Linear code keeps the time per KB flat as pages grow; the legacy regexes
+    are skipped for a kind once one size takes longer than `budget` seconds.
+
+    Returns:
+        dict: kind -> list of (n, kb, {'legacy': s or None, 'bounded': s, 'parser': s})
+    """
+    from page_scanner import find_counter_text, find_target_cdata, iter_cdata_sections, iter_markers
+
+    def legacy(page):
+        list(LEGACY_MARKER.finditer(page))
+        legacy_counter_text(page)
+        LEGACY_TARGET_CDATA.search(page)
+        LEGACY_CDATA.findall(page)
+
+    def bounded(page):
+        list(iter_markers(page))
+        find_counter_text(page)
+        find_target_cdata(page)
+        list(iter_cdata_sections(page))
+
+    def timed(function, page):
+        start = time.perf_counter()
+        with quiet():
+            function(page)
+        return time.perf_counter() - start
+
+    results = {}
+    for kind in PATHOLOGICAL_KINDS:
+        rows = []
+        legacy_ok = True
+        for n in sizes:
+            page = build_pathological_page(kind, n)
+            seconds = {'legacy': timed(legacy, page) if legacy_ok else None,
+                       'bounded': timed(bounded, page),
+                       'parser': timed(main_scraper.get_school_data_from_page_source, page)}
+            legacy_ok = legacy_ok and seconds['legacy'] < budget
+            rows.append((n, len(page.encode('utf-8')) / 1024, seconds))
+        results[kind] = rows
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nicaragua Schools Scraper - Benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    engines = subparsers.add_parser('engines', help='HTTP vs Selenium latency per municipality')
+    engines.add_argument('--municipalities', type=int, default=5)
+    engines.add_argument('--schools', type=int, default=120)
+    engines.add_argument('--latency', type=float, default=0.05,
+                         help='Simulated server latency in seconds (default: 0.05)')
+    engines.add_argument('--no-selenium', action='store_true', help='Only benchmark the HTTP engine')
+
+    blocking = subparsers.add_parser('blocking', help='Selenium page bytes before/after asset blocking')
+    blocking.add_argument('--municipalities', type=int, default=3)
+    blocking.add_argument('--schools', type=int, default=120)
+    blocking.add_argument('--latency', type=float, default=0.05,
+                          help='Simulated server latency in seconds (default: 0.05)')
+
+    page_parser = subparsers.add_parser('parser', help='Single-pass vs legacy page parser (output and bytes/sec)')
+    page_parser.add_argument('--archive', type=str, default=None,
+                             help='Snapshot archive to read real pages from (default: synthetic pages)')
+    page_parser.add_argument('--pages', type=int, default=40)
+    page_parser.add_argument('--schools', type=int, default=120)
+    page_parser.add_argument('--repeat', type=int, default=3)
+
+    pathological = subparsers.add_parser('pathological',
+                                         help='Fuzz the bounded scanners and time them on malformed pages')
+    pathological.add_argument('--iterations', type=int, default=3000, help='Fuzz cases (default: 3000)')
+    pathological.add_argument('--seed', type=int, default=0)
+    pathological.add_argument('--sizes', type=int, nargs='+', default=[250, 500, 1000, 2000, 4000],
+                              help='Repeated units per page')
+    pathological.add_argument('--budget', type=float, default=5.0,
+                              help='Stop timing the legacy regexes past this many seconds (default: 5)')
+
+    dropdowns = subparsers.add_parser('dropdowns', help='Scanner vs full-tree dropdown extraction')
+    dropdowns.add_argument('--archive', type=str, default=None,
+                           help='Snapshot archive to read real pages from (default: synthetic pages)')
+    dropdowns.add_argument('--pages', type=int, default=40)
+    dropdowns.add_argument('--schools', type=int, default=120)
+    dropdowns.add_argument('--repeat', type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'engines':
+        results = benchmark_engines(args.municipalities, args.schools, args.latency,
+                                    include_selenium=not args.no_selenium)
+        print("\nPer-municipality latency (fetch + parse, no politeness delays):")
+        summarize('http', results['http'])
+        summarize('selenium', results['selenium'])
+        if results['http'] and results['selenium']:
+            speedup = statistics.mean(results['selenium']) / statistics.mean(results['http'])
+            print(f"  HTTP engine is {speedup:.1f}x faster per municipality")
+
+    elif args.benchmark == 'blocking':
+        results = benchmark_blocking(args.municipalities, args.schools, args.latency)
+        print("\nPer-page weight (municipality page and its subresources):")
+        for label, pages in results.items():
+            if not pages:
+                print(f"  {label:<10} skipped")
+                continue
+            print(f"  {label:<10} {statistics.mean(p['bytes'] for p in pages) / 1024:8.0f} KB   "
+                  f"{statistics.mean(p['requests'] for p in pages):5.1f} requests   "
+                  f"{sum(p['blocked'] for p in pages):4d} blocked   "
+                  f"{statistics.mean(p['seconds'] for p in pages) * 1000:8.1f} ms")
+
+    elif args.benchmark == 'parser':
+        results = benchmark_parser(args.archive, args.pages, args.schools, args.repeat)
+        print(f"\nPage parser on {results['pages']} pages ({results['bytes'] / 1024 / 1024:.1f} MB):")
+        for name, seconds in results['seconds'].items():
+            print(f"  {name:<12} {results['bytes'] / seconds / 1024 / 1024:8.1f} MB/s   "
+                  f"{seconds / results['pages'] * 1000:8.2f} ms per page")
+        speedup = results['seconds']['legacy'] / results['seconds']['single-pass']
+        print(f"  Single-pass parser is {speedup:.1f}x faster")
+        fallbacks = ', '.join(f"{count} {reason}" for reason, count in results['fallbacks'].items()) or 'none'
+        print(f"  Fallbacks to the legacy parser: {fallbacks}")
+        if results['mismatches']:
+            print(f"  ❌ Output differs from the legacy parser on: {', '.join(results['mismatches'])}")
+        else:
+            print("  ✅ Output identical to the legacy parser on every page")
+
+    elif args.benchmark == 'pathological':
+        failures = fuzz_scanners(args.iterations, args.seed)
+        if failures:
+            print(f"❌ {len(failures)} fuzz disagreements with the legacy regexes:")
+            for check, page in failures[:10]:
+                print(f"  {check}: {page[:160]!r}")
+        else:
+            print(f"✅ Bounded scanners agree with the legacy regexes on {args.iterations} fuzz cases")
+
+        results = benchmark_pathological(args.sizes, args.budget)
+        print("\nTime per KB on pathological pages (flat = linear):")
+        for kind, rows in results.items():
+            print(f"  {kind}")
+            for n, kb, seconds in rows:
+                columns = '   '.join(f"{name} {'skipped' if value is None else f'{value / kb * 1e6:9.1f} µs/KB'}"
+                                     for name, value in seconds.items())
+                print(f"    n={n:<6} {kb:8.0f} KB   {columns}")
+
+    elif args.benchmark == 'dropdowns':
+        results = benchmark_dropdowns(args.archive, args.pages, args.schools, args.repeat)
+        print(f"\nDropdown extraction on {results['pages']} pages:")
+        for name, seconds in results['seconds'].items():
+            print(f"  {name:<12} {seconds / results['pages'] * 1000:8.2f} ms per page")
+        speedup = results['seconds']['full tree'] / results['seconds']['scanner']
+        print(f"  Scanner is {speedup:.1f}x faster")
+        print(f"  Pages left to the full tree: {results['fallbacks']}")
+        if results['mismatches']:
+            print(f"  ❌ Options differ from the full tree on: {', '.join(results['mismatches'])}")
+        else:
+            print("  ✅ Options identical to the full tree on every page")
+
+
+if __name__ == "__main__":
+    main()
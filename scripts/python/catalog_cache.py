@@ -0,0 +1,144 @@
+"""
+Run-Level Cache for the Modality and Program Catalogs
+
+The ddlModalidad and ddlPrograma dropdowns list the national catalogs of
+modalities and programs, so they are (almost) the same on every
+municipality page. This module keeps each catalog variant seen during a run,
+keyed by a fingerprint of the raw <select> blocks, which is cut out of the
+page with plain string searches. A page whose fingerprint is known reuses
+the cached lookups, with their labels already normalized for matching,
+instead of parsing the options again. The catalogs used are saved to
+catalog.json next to the output for reproducibility.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from label_resolver import LabelResolver
+
+CATALOG_SELECTS = ('ddlModalidad', 'ddlPrograma')
+
+
+def select_blocks(page_source, name):
+    """
+    Raw <select>...</select> blocks whose opening tag mentions `name`.
+
+    An unterminated block runs to the end of the page, so a malformed
+    dropdown can only make the fingerprint more specific.
+    """
+    blocks = []
+    pos = page_source.find(name)
+    while pos != -1:
+        start = page_source.rfind('<select', 0, pos)
+        if start != -1 and '>' not in page_source[start:pos]:
+            end = page_source.find('</select>', pos)
+            end = len(page_source) if end == -1 else end + len('</select>')
+            blocks.append(page_source[start:end])
+            pos = end
+        pos = page_source.find(name, pos + 1)
+    return blocks
+
+
+def dropdown_fingerprint(page_source):
+    """Hash of the modality and program <select> blocks of a page"""
+    digest = hashlib.sha1()
+    for name in CATALOG_SELECTS:
+        for block in select_blocks(page_source, name):
+            digest.update(block.encode('utf-8', 'surrogatepass'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def options_fingerprint(modality_options, program_options):
+    """Hash of already extracted (value, text) option pairs (in-page extraction)"""
+    payload = json.dumps([modality_options, program_options], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class DropdownCatalog:
+    """
+    Modality and program lookups of one catalog variant.
+
+    The lookups have the shape built by build_dropdown_data; the *_entries
+    lists hold (normalized label, lookup data) pairs in dropdown order, and
+    the *_resolver objects (see label_resolver.py) match school labels
+    against them, memoizing each label for every page that shares the catalog.
+    """
+
+    def __init__(self, modalities_lookup, programs_lookup, fingerprint=None):
+        self.fingerprint = fingerprint
+        self.modalities_lookup = modalities_lookup
+        self.programs_lookup = programs_lookup
+        self.modality_entries = [(label.upper().strip(), data) for label, data in modalities_lookup.items()]
+        self.program_entries = [(label.upper().strip(), data) for label, data in programs_lookup.items()]
+        self.modality_resolver = LabelResolver(self.modality_entries)
+        self.program_resolver = LabelResolver(self.program_entries)
+
+    def to_json(self):
+        return {
+            'modalities': {data['modality_name']: data['modality_id'] for data in self.modalities_lookup.values()},
+            'programs': {data['program_name']: data['program_id'] for data in self.programs_lookup.values()},
+        }
+
+
+class CatalogCache:
+    """Catalog variants seen during a run, keyed by dropdown fingerprint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.catalogs = {}
+        self.pages = {}
+        self.first_seen = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint):
+        """Cached catalog for a fingerprint, or None (the caller parses and adds it)"""
+        with self._lock:
+            catalog = self.catalogs.get(fingerprint)
+            if catalog is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.pages[fingerprint] += 1
+            return catalog
+
+    def add(self, catalog):
+        """Store a freshly parsed catalog; returns the cached one if another thread won"""
+        with self._lock:
+            cached = self.catalogs.setdefault(catalog.fingerprint, catalog)
+            if cached is catalog:
+                self.pages[catalog.fingerprint] = 1
+                self.first_seen[catalog.fingerprint] = datetime.now().isoformat(timespec='seconds')
+            else:
+                self.pages[catalog.fingerprint] += 1
+            return cached
+
+    def save(self, path):
+        """Write every catalog variant, with the number of pages that used it, to a JSON file"""
+        with self._lock:
+            variants = [dict(fingerprint=fingerprint, first_seen=self.first_seen[fingerprint],
+                             pages=self.pages[fingerprint], **catalog.to_json())
+                        for fingerprint, catalog in self.catalogs.items()]
+        if not variants:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': datetime.now().isoformat(timespec='seconds'), 'catalogs': variants},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def describe(self):
+        with self._lock:
+            resolvers = [resolver for catalog in self.catalogs.values()
+                         for resolver in (catalog.modality_resolver, catalog.program_resolver)]
+            description = f"{len(self.catalogs)} variants, {self.hits} pages reused, {self.misses} parsed"
+        hits = sum(resolver.hits for resolver in resolvers)
+        lookups = hits + sum(resolver.misses for resolver in resolvers)
+        if lookups:
+            description += f", {lookups} label lookups ({hits / lookups:.1%} memoized)"
+        return description
@@ -0,0 +1,82 @@
+"""
+Municipality Freshness Records for Incremental Refreshes
+
+This module keeps one record per municipality with the last time it was
+fetched, the content hash of its map marker/CDATA payload and the school
+counts seen on the page. Refresh runs use it to skip municipalities fetched
+within a TTL and to avoid re-parsing pages whose content did not change.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+
+class FreshnessStore:
+    """JSON file of per-municipality freshness records, keyed by 'dep_id/mun_id'"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records = {}
+        self.pending = {}  # fetches recorded since the last commit()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.records = json.load(f)
+
+    @staticmethod
+    def key(dep_id, mun_id):
+        return f"{dep_id}/{mun_id}"
+
+    def get(self, dep_id, mun_id):
+        return self.records.get(self.key(dep_id, mun_id))
+
+    def is_fresh(self, dep_id, mun_id, ttl_hours):
+        """True if the municipality was fetched less than ttl_hours ago"""
+        record = self.get(dep_id, mun_id)
+        if not record or not record.get('fetched_at'):
+            return False
+        fetched_at = datetime.fromisoformat(record['fetched_at'])
+        return datetime.now() - fetched_at < timedelta(hours=ttl_hours)
+
+    def is_unchanged(self, dep_id, mun_id, content_hash):
+        """True if the page payload hashes the same as on the last successful fetch"""
+        record = self.get(dep_id, mun_id)
+        return bool(record) and record.get('content_hash') == content_hash
+
+    def update(self, dep_id, mun_id, content_hash=None, **fields):
+        """
+        Record a fetch of a municipality, in memory until commit().
+
+        Args:
+            content_hash (str): Hash of the marker/CDATA payload; None keeps the stored one
+            **fields: Extra values to store (department, municipality, counter, schools)
+        """
+        with self._lock:
+            record = self.pending.setdefault(self.key(dep_id, mun_id), {})
+            record['fetched_at'] = datetime.now().isoformat(timespec='seconds')
+            if content_hash is not None:
+                record['content_hash'] = content_hash
+            record.update({k: v for k, v in fields.items() if v is not None})
+
+    def commit(self):
+        """
+        Apply the recorded fetches and save the file.
+
+        Call this only once the rows of those fetches are in the national CSV:
+        a record saved before that would make the next refresh skip a
+        municipality whose rows were never written.
+        """
+        with self._lock:
+            for key, fields in self.pending.items():
+                self.records.setdefault(key, {}).update(fields)
+            self.pending = {}
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,164 @@
+"""
+Precompiled Modality and Program Label Resolver
+
+Every modality label of every school is resolved against the modality and
+program catalogs: an exact match on the normalized label first, otherwise
+the first catalog entry (in dropdown order) that contains the label or is
+contained in it, ignoring labels of 3 characters or less. A national run
+resolves ~10k schools against a few dozen distinct labels, so this module
+compiles each catalog once into:
+
+- a hash map of normalized labels for the exact rule;
+- an Aho-Corasick automaton of the catalog labels, which finds the first
+  catalog label contained in a school label in one pass over it;
+- the catalog labels joined by NUL characters, where one str.find finds
+  the first catalog label containing the school label;
+
+and memoizes the resolved entry of every label it sees.
+"""
+
+import bisect
+import threading
+from collections import deque
+
+SEPARATOR = '\0'
+
+
+def normalize_label(label):
+    """Label as compared with the catalog"""
+    return label.upper().strip()
+
+
+class LabelAutomaton:
+    """Aho-Corasick automaton reporting the lowest-numbered pattern found in a text"""
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (list): (number, pattern) pairs; a search returns the smallest
+                number among the patterns occurring in the text
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.best = [None]  # smallest pattern number ending at each state, fail chain included
+        for number, pattern in patterns:
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            if self.best[state] is None or number < self.best[state]:
+                self.best[state] = number
+
+        # Breadth-first fail links; each state inherits the best of its fail state
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                inherited = self.best[self.fail[child]]
+                if inherited is not None and (self.best[child] is None or inherited < self.best[child]):
+                    self.best[child] = inherited
+                pending.append(child)
+
+    def search(self, text):
+        """Smallest number of a pattern occurring in text, or None"""
+        best = None
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            found = self.best[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+
+class LabelResolver:
+    """Resolves school modality labels to the entries of one catalog, with memoization"""
+
+    def __init__(self, entries, min_length=3):
+        """
+        Args:
+            entries (list): (normalized label, lookup data) pairs in dropdown order
+            min_length (int): Labels of this length or shorter are only matched exactly
+        """
+        self.entries = entries
+        self.min_length = min_length
+        self.exact = {}
+        for position, (label, _) in enumerate(entries):
+            self.exact.setdefault(label, position)
+
+        # Catalog labels contained in a school label
+        self.automaton = LabelAutomaton([(position, label) for position, (label, _) in enumerate(entries)
+                                         if len(label) > min_length])
+
+        # Catalog labels containing a school label
+        self.haystack = SEPARATOR.join(label for label, _ in entries)
+        self.offsets = []
+        offset = 0
+        for label, _ in entries:
+            self.offsets.append(offset)
+            offset += len(label) + len(SEPARATOR)
+
+        self._memo = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _first_containing(self, label):
+        if SEPARATOR in label:
+            return next((position for position, (entry, _) in enumerate(self.entries) if label in entry), None)
+        found = self.haystack.find(label)
+        return None if found == -1 else bisect.bisect_right(self.offsets, found) - 1
+
+    def _resolve(self, label):
+        normalized = normalize_label(label)
+        position = self.exact.get(normalized)
+        if position is not None:
+            return position
+        candidates = [self.automaton.search(normalized)]
+        if len(normalized) > self.min_length:
+            candidates.append(self._first_containing(normalized))
+        candidates = [candidate for candidate in candidates if candidate is not None]
+        return min(candidates) if candidates else None
+
+    def resolve(self, label):
+        """
+        Lookup data of the catalog entry a school label resolves to.
+
+        Returns:
+            dict: The entry's lookup data, or None if no rule matches
+        """
+        with self._lock:
+            if label in self._memo:
+                self.hits += 1
+                position = self._memo[label]
+                return None if position is None else self.entries[position][1]
+        position = self._resolve(label)
+        with self._lock:
+            self.misses += 1
+            self._memo[label] = position
+        return None if position is None else self.entries[position][1]
+
+
+def linear_resolve(entries, label, min_length=3):
+    """The unindexed exact-then-substring scan LabelResolver reproduces (kept for differential checks)"""
+    normalized = normalize_label(label)
+    for entry, data in entries:
+        if normalized == entry:
+            return data
+    for entry, data in entries:
+        if (len(normalized) > min_length and normalized in entry) or \
+           (len(entry) > min_length and entry in normalized):
+            return data
+    return None
@@ -16,17 +16,31 @@ Usage:
     python main_scraper.py                    # Interactive mode
     python main_scraper.py --all              # Scrape all departments
     python main_scraper.py --dept Managua     # Scrape specific department
+    python main_scraper.py --all --engine http  # Fetch pages without a browser
 """
 
 import pandas as pd
 import re
 import html
 import time
-import random
 import os
 import sys
 import argparse
+import base64
+import fnmatch
+import hashlib
+import json
+import queue
+import socket
+import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
+import requests
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -34,6 +48,72 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, JavascriptException, WebDriverException
 from bs4 import BeautifulSoup
 
+import pacing
+from snapshot_archive import SnapshotArchive
+from freshness import FreshnessStore
+from run_journal import RunJournal
+from record_sinks import SINKS, create_sink
+from scheduling import MakespanScheduler, format_duration, load_school_counts
+from work_queue import WorkQueue
+from catalog_cache import CatalogCache, DropdownCatalog, dropdown_fingerprint, options_fingerprint
+from name_index import NameIndex
+from page_scanner import find_counter_text, find_target_cdata, iter_cdata_sections, iter_markers, scan_page
+
+try:
+    import psutil
+except ImportError:  # RSS-based driver recycling is disabled without psutil
+    psutil = None
+
+# MINED education map endpoints
+BASE_URL = "https://serviciosenlinea.mined.gob.ni"
+MAP_PATH = "/mapa-de-la-educacion/"
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Available page fetch engines
+ENGINES = ('selenium', 'http')
+# How the Selenium engine reads a rendered page: in-page JavaScript or page_source parsing
+EXTRACTIONS = ('js', 'html')
+# Where the Selenium engine takes page HTML from: the rendered DOM or the network response
+CAPTURES = ('dom', 'network')
+
+# Requests the Selenium engine blocks (DevTools wildcard patterns): map tiles,
+# fonts, stylesheets, images and analytics are never needed for marker data
+BLOCKED_URL_PATTERNS = [
+    '*tile.openstreetmap.org/*', '*tile.osm.org/*', '*basemaps.cartocdn.com/*',
+    '*fonts.googleapis.com/*', '*fonts.gstatic.com/*',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.css', '*.css?*',
+    '*.png', '*.png?*', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico', '*.webp',
+    '*google-analytics.com/*', '*googletagmanager.com/*',
+]
+
+# URLs the marker data needs; a block pattern that catches one of these is dropped
+ALLOWED_URL_PATTERNS = [
+    '*/mapa-de-la-educacion/*.aspx*',
+    '*leaflet*.js*',
+]
+
+# Column order of the output CSV files
+OUTPUT_COLUMNS = ['Nombre', 'school_id', 'Latitud', 'Longitud', 'Direccion', 'modality_labels',
+                  'modality_ids', 'program_ids', 'program_labels', 'department', 'municipality',
+                  'dep_id', 'mun_id']
+
+# Returned by scrape_municipality in refresh mode when the page content has not changed.
+# A sentinel rather than a string: it is truthy and must be tested with `is UNCHANGED`
+UNCHANGED = object()
+
+# Why a municipality attempt failed, as recorded in ScraperContext.failures
+FAILURE_KINDS = {
+    'timeout': 'page or map data did not load in time',
+    'no_markers': 'page loaded without map markers',
+    'no_schools': 'map markers found but no schools extracted',
+    'stale_page': "server returned another municipality's data",
+    'driver_crash': 'browser could not be started or stopped responding',
+    'http_error': 'connection or HTTP error',
+    'error': 'unexpected error',
+}
+
 # Department and municipality mapping
 DEPARTMENTS = {
     "Boaco": {
@@ -276,10 +356,23 @@ DEPARTMENTS = {
     },
 }
 
-def create_stealth_driver():
+def find_free_port():
+    """Ask the OS for a free local TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def create_stealth_driver(debug_port=None, capture_network=False):
     """
     Create a Chrome WebDriver with stealth options to avoid detection.
     
+    Args:
+        debug_port (int): Remote debugging port; a free port is picked if None,
+            so several drivers can run side by side
+        capture_network (bool): Record DevTools network events in the performance
+            log, for NetworkMonitor
+        
     Returns:
         webdriver.Chrome: Configured Chrome driver or None if failed
     """
@@ -294,7 +387,6 @@ def create_stealth_driver():
         options.add_argument('--disable-extensions')
         options.add_argument('--disable-plugins')
         options.add_argument('--disable-images')
-        options.add_argument('--disable-javascript')
         options.add_argument('--disable-web-security')
         options.add_argument('--allow-running-insecure-content')
         options.add_argument('--no-first-run')
@@ -307,14 +399,14 @@ def create_stealth_driver():
         options.add_argument('--disable-device-discovery-notifications')
         
         # User agent
-        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+        options.add_argument(f'--user-agent={USER_AGENT}')
         
         # Window size and position
         options.add_argument('--window-size=1920,1080')
         options.add_argument('--start-maximized')
         
         # Debugging
-        options.add_argument('--remote-debugging-port=9222')
+        options.add_argument(f'--remote-debugging-port={debug_port or find_free_port()}')
         
         # Additional preferences
         prefs = {
@@ -329,6 +421,10 @@ def create_stealth_driver():
         }
         options.add_experimental_option("prefs", prefs)
         
+        # Network events for reading raw response bodies
+        if capture_network:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        
         # Create driver
         driver = webdriver.Chrome(options=options)
         driver.set_page_load_timeout(60)
@@ -341,7 +437,7 @@ def create_stealth_driver():
         return None
 
 
-def human_like_navigation(driver, url, description=""):
+def human_like_navigation(driver, url, description, context, record=True):
     """
     Navigate to a URL with human-like behavior patterns.
     
@@ -349,236 +445,1628 @@ def human_like_navigation(driver, url, description=""):
         driver: Selenium WebDriver instance
         url (str): URL to navigate to
         description (str): Human-readable description for logging
+        context (ScraperContext): Run context whose pacer, breaker and host gate
+            every page load goes through
+        record (bool): Report a successful load to the pacer and breaker (see
+            ScraperContext.page_load)
+        
+    Returns:
+        float: Seconds the page load took
     """
     try:
-        # Random delay before navigation
-        time.sleep(random.uniform(1.5, 3.5))
-        
+        # Delay before navigation comes from the context's pacer
         print(f"    🌐 Navigating to: {description}")
-        driver.get(url)
+        with context.page_load(record) as load:
+            driver.get(url)
         
         # Random reading time
-        reading_time = random.uniform(2.0, 5.0)
+        reading_time = context.pacer.reading_time()
         print(f"    👀 Reading page for {reading_time:.1f} seconds...")
-        time.sleep(reading_time)
+        context.pacer.wait(reading_time)
+        return load['latency']
         
     except Exception as e:
         print(f"    ❌ Navigation error: {e}")
         raise
 
 
-def extract_dropdown_data(page_source):
+class StalePageError(Exception):
+    """Raised when a reused browser or session serves the previous municipality's data"""
+
+
+class SessionWarmup:
     """
-    Extract school IDs, modality IDs, and program IDs from dropdown menus.
-    Preserves order and allows duplicate names for schools.
-    
-    Args:
-        page_source (str): HTML source of the page
-        
+    Navigation state of one worker's browser or HTTP session.
+
+    The full chain to a municipality is four page loads: main site, education
+    map, department, municipality. Once a session holds the site cookies and
+    ASP.NET session state, the main site and map are not visited again, each
+    department page is visited at most once, and in direct mode the
+    municipality page is requested straight away. The full chain is only
+    replayed when the server rejects a direct hit.
+    """
+
+    FULL_CHAIN = ('site', 'map', 'department')
+
+    def __init__(self, direct=False):
+        self.direct = direct       # request municipality pages without any hops
+        self.warmed = False        # main site and education map already visited
+        self.departments = set()   # department IDs already visited
+        self.municipalities = 0
+        self.page_loads = 0
+        self.fallbacks = 0
+
+    def hops(self, dept_id):
+        """Navigation hops still needed before the municipality page"""
+        if self.direct:
+            return ()
+        hops = () if self.warmed else ('site', 'map')
+        if dept_id not in self.departments:
+            hops += ('department',)
+        return hops
+
+    def visited(self, hop, dept_id):
+        if hop == 'map':
+            self.warmed = True
+        elif hop == 'department':
+            self.departments.add(dept_id)
+
+    def rejected(self):
+        """The server refused a shortcut: forget the session state and stop going direct"""
+        self.fallbacks += 1
+        self.direct = False
+        self.warmed = False
+        self.departments.clear()
+
+    def finish(self, page_loads):
+        """Account for one municipality fetched with `page_loads` loads"""
+        self.municipalities += 1
+        self.page_loads += page_loads
+
+    @property
+    def page_loads_saved(self):
+        return self.municipalities * (len(self.FULL_CHAIN) + 1) - self.page_loads
+
+
+def navigate_hops(context, warmup, hops, department_name, load):
+    """
+    Visit the warm-up hops in order with `load(url, description)`.
+
     Returns:
-        dict: Contains schools_list (ordered), schools_lookup (legacy), modalities_lookup, programs_lookup
+        int: Number of page loads made
     """
-    soup = BeautifulSoup(page_source, 'html.parser')
-    
-    # Extract school IDs and names from "Buscar Centros Educativos" - PRESERVE ORDER
-    schools_list = []  # New: ordered list that preserves duplicates
-    schools_lookup = {}  # Legacy: for backward compatibility
-    school_select = soup.find('select', {'name': 'ctl00$ContentPlaceHolder1$ddlCentroEducativo'})
-    if not school_select:
-        school_select = soup.find('select', id=lambda x: x and 'ddlCentroEducativo' in x)
-    
-    if school_select:
-        for option in school_select.find_all('option'):
-            value = option.get('value')
-            text = option.text.strip()
-            # Filter out placeholder and empty options
-            if (value and value != '' and text and 
-                text != 'SELECCIONE' and 
-                text != '-- Escriba nombre del centro --' and
-                value != '-- Escriba nombre del centro --'):
-                
-                school_entry = {
-                    'school_id': value,
-                    'school_name': html.unescape(text)
-                }
-                
-                # Add to ordered list (preserves duplicates and order)
-                schools_list.append((text, school_entry))
-                
-                # Also add to lookup dict for legacy compatibility (will overwrite duplicates)
-                schools_lookup[text] = school_entry
-    
-    # Extract modality IDs from "Buscar por Modalidad"
-    modalities_lookup = {}
-    modality_select = soup.find('select', {'name': 'ctl00$ContentPlaceHolder1$ddlModalidad'})
-    if not modality_select:
-        modality_select = soup.find('select', id=lambda x: x and 'ddlModalidad' in x)
-    
-    if modality_select:
-        for option in modality_select.find_all('option'):
-            value = option.get('value')
-            text = option.text.strip()
-            if value and value != '' and text and text != 'SELECCIONE':
-                modalities_lookup[text] = {
-                    'modality_id': value,
-                    'modality_name': html.unescape(text)
-                }
-    
-    # Extract program IDs from "Buscar por Programa Educativo"
-    programs_lookup = {}
-    program_select = soup.find('select', {'name': 'ctl00$ContentPlaceHolder1$ddlPrograma'})
-    if not program_select:
-        program_select = soup.find('select', id=lambda x: x and 'ddlPrograma' in x)
-    
-    if program_select:
-        for option in program_select.find_all('option'):
-            value = option.get('value')
-            text = option.text.strip()
-            if value and value != '' and text and text != 'SELECCIONE':
-                programs_lookup[text] = {
-                    'program_id': value,
-                    'program_name': html.unescape(text)
-                }
-    
-    return {
-        'schools_list': schools_list,      # New: ordered list with duplicates preserved
-        'schools_lookup': schools_lookup,  # Legacy: dict for backward compatibility
-        'modalities_lookup': modalities_lookup,
-        'programs_lookup': programs_lookup
+    dept_id = DEPARTMENTS[department_name]['id']
+    urls = {
+        'site': (context.base_url + "/", "main website"),
+        'map': (context.map_url, "education map"),
+        'department': (context.department_url(dept_id), f"department {department_name}"),
     }
+    for hop in hops:
+        load(*urls[hop])
+        warmup.visited(hop, dept_id)
+    return len(hops)
 
 
-def extract_html_counter(page_source):
+class PooledDriver:
+    """A Chrome instance owned by a DriverPool plus its usage bookkeeping"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.warmup = None       # SessionWarmup, registered on first use
+        self.network = None      # NetworkMonitor, when performance logging is on
+        self.last_page = None    # (municipality_id, fingerprint) of the last page served
+        self.broken = False
+
+    def rss_mb(self):
+        """Resident memory of chromedriver and its Chrome processes, in MB (None if unknown)"""
+        if psutil is None:
+            return None
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except (psutil.Error, AttributeError):
+            return None
+
+    def is_healthy(self):
+        """Check that the browser still answers before lending it out"""
+        try:
+            self.driver.execute_script("return document.readyState")
+            return bool(self.driver.window_handles)
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class DriverPool:
     """
-    Extract the HTML counter (ContentPlaceHolder_H1Contador) from the page.
-    
+    Keeps warm Chrome instances across municipalities.
+
+    Drivers are lent to one municipality at a time and recycled after
+    max_pages pages, when their memory passes max_rss_mb, or when they fail
+    a health check. max_pages=1 reproduces the old fresh-browser behaviour.
+    """
+
+    def __init__(self, size=1, max_pages=25, max_rss_mb=1500, driver_factory=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.driver_factory = driver_factory or create_stealth_driver
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self.stats = {'created': 0, 'reused': 0, 'recycled_pages': 0,
+                      'recycled_memory': 0, 'recycled_unhealthy': 0}
+
+    def _create(self):
+        driver = self.driver_factory()
+        if driver is None:
+            with self._lock:
+                self._live -= 1
+            return None
+        with self._lock:
+            self.stats['created'] += 1
+        return PooledDriver(driver)
+
+    def _retire(self, pooled, reason=None):
+        pooled.quit()
+        with self._lock:
+            self._live -= 1
+            if reason:
+                self.stats[reason] += 1
+
+    def acquire(self):
+        """
+        Lend a healthy driver, creating one if the pool has room.
+
+        Returns:
+            PooledDriver: Driver wrapper, or None if Chrome could not be started
+        """
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._live < self.size
+                    if can_create:
+                        self._live += 1
+                if can_create:
+                    return self._create()
+                pooled = self._idle.get()
+
+            if pooled.is_healthy():
+                with self._lock:
+                    self.stats['reused'] += 1
+                return pooled
+            print("    🩺 Pooled driver failed health check, replacing it")
+            self._retire(pooled, 'recycled_unhealthy')
+
+    def release(self, pooled):
+        """Return a driver to the pool, or retire it if it is worn out"""
+        if pooled.broken:
+            self._retire(pooled, 'recycled_unhealthy')
+            return
+
+        if pooled.pages_served >= self.max_pages:
+            self._retire(pooled, 'recycled_pages')
+            return
+
+        rss = pooled.rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            print(f"    ♻️  Recycling driver using {rss:.0f} MB")
+            self._retire(pooled, 'recycled_memory')
+            return
+
+        self._idle.put(pooled)
+
+    @contextmanager
+    def driver(self):
+        """Context manager that lends a driver and returns it afterwards"""
+        pooled = self.acquire()
+        try:
+            yield pooled
+        except (WebDriverException, StalePageError):
+            if pooled is not None:
+                pooled.broken = True
+            raise
+        finally:
+            if pooled is not None:
+                self.release(pooled)
+
+    def close(self):
+        """Quit every idle driver"""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._retire(pooled)
+
+
+class TabDriver:
+    """
+    One tab of a SharedBrowser, usable wherever a WebDriver is expected.
+
+    Every command switches the browser to this tab under the browser lock.
+    Navigation is started from JavaScript and waited for outside the lock,
+    so several tabs load pages at the same time.
+    """
+
+    def __init__(self, browser, handle):
+        self.browser = browser
+        self.handle = handle
+
+    def _call(self, command):
+        with self.browser.lock:
+            self.browser.select(self.handle)
+            return command(self.browser.driver)
+
+    def get(self, url, timeout=60):
+        """Navigate like WebDriver.get: return once the new document has loaded"""
+        self._call(lambda d: d.execute_script(
+            "window.__tabNavigation = true; window.location.href = arguments[0];", url))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.1)
+            try:
+                if self._call(lambda d: d.execute_script(
+                        "return window.__tabNavigation === undefined && document.readyState === 'complete';")):
+                    return
+            except JavascriptException:
+                continue  # document replaced mid-call
+        raise TimeoutException(f"tab did not finish loading {url} within {timeout}s")
+
+    def execute_script(self, script, *args):
+        return self._call(lambda d: d.execute_script(script, *args))
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self._call(lambda d: d.execute_cdp_cmd(cmd, cmd_args))
+
+    def get_log(self, log_type):
+        return self.browser.read_log(self.handle)
+
+    @property
+    def page_source(self):
+        return self._call(lambda d: d.page_source)
+
+    @property
+    def current_url(self):
+        return self._call(lambda d: d.current_url)
+
+    @property
+    def window_handles(self):
+        with self.browser.lock:
+            return [h for h in self.browser.driver.window_handles if h == self.handle]
+
+    @property
+    def service(self):
+        return self.browser.driver.service
+
+    def quit(self):
+        self.browser.close_tab(self.handle)
+
+
+class SharedBrowser:
+    """
+    One Chrome process whose tabs are lent out as separate drivers.
+
+    A blank home tab is kept open so that closing worker tabs never ends the
+    session; if Chrome dies, the next tab request starts a new browser. All
+    tabs share the process, its cache and its cookies.
+    """
+
+    def __init__(self, driver_factory=None):
+        self.driver_factory = driver_factory or create_stealth_driver
+        self.driver = None
+        self.home = None
+        self.lock = threading.RLock()
+        self._current = None
+        self._logs = {}
+        self.stats = {'tabs_opened': 0, 'restarts': 0}
+
+    def _alive(self):
+        try:
+            return bool(self.driver.window_handles)
+        except Exception:
+            return False
+
+    def open_tab(self):
+        """
+        Open a new tab (starting Chrome if needed).
+
+        Returns:
+            TabDriver: The tab, or None if Chrome could not be started
+        """
+        with self.lock:
+            if self.driver is None or not self._alive():
+                if self.driver is not None:
+                    self.stats['restarts'] += 1
+                    self.quit()
+                self.driver = self.driver_factory()
+                if self.driver is None:
+                    return None
+                self.home = self._current = self.driver.current_window_handle
+            self.driver.switch_to.new_window('tab')
+            self._current = self.driver.current_window_handle
+            self.stats['tabs_opened'] += 1
+            return TabDriver(self, self._current)
+
+    def select(self, handle):
+        """Make `handle` the tab WebDriver commands go to; call with the lock held"""
+        if self._current != handle:
+            self.driver.switch_to.window(handle)
+            self._current = handle
+
+    def close_tab(self, handle):
+        with self.lock:
+            try:
+                self.select(handle)
+                self.driver.close()
+                self.driver.switch_to.window(self.home)
+                self._current = self.home
+            except Exception:
+                self._current = None
+            self._logs.pop(self._target_id(handle), None)
+
+    @staticmethod
+    def _target_id(handle):
+        return handle[len('CDwindow-'):] if handle.startswith('CDwindow-') else handle
+
+    def read_log(self, handle):
+        """Performance log entries of one tab; the log is shared, so entries are routed by tab"""
+        with self.lock:
+            for entry in self.driver.get_log('performance'):
+                webview = json.loads(entry['message']).get('webview')
+                self._logs.setdefault(webview, []).append(entry)
+            return self._logs.pop(self._target_id(handle), [])
+
+    def quit(self):
+        with self.lock:
+            if self.driver is not None:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+            self.driver = None
+            self._current = None
+            self._logs = {}
+
+
+def create_http_session(pool_size=4):
+    """
+    Create a pooled, keep-alive HTTP session for browserless page fetches.
+
+    The session reuses TCP connections and cookies across municipalities and
+    asks the server for compressed responses (requests decompresses them).
+
     Args:
-        page_source (str): HTML source of the page
-        
+        pool_size (int): Number of connections kept alive per host
+
     Returns:
-        dict: Contains counter information
+        requests.Session: Configured HTTP session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'es-NI,es;q=0.9,en;q=0.8',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+def fetch_page_http(session, url, timeout=45):
+    """
+    Fetch a page with the HTTP engine and return its decoded HTML.
+
+    Args:
+        session (requests.Session): Session created by create_http_session
+        url (str): URL to fetch
+        timeout (int): Request timeout in seconds
+
+    Returns:
+        str: Raw HTML exactly as served (after transfer decompression)
+    """
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+
+    # ASP.NET normally declares utf-8; requests falls back to latin-1 for text/html otherwise
+    if 'charset' not in response.headers.get('Content-Type', '').lower():
+        response.encoding = 'utf-8'
+
+    return response.text
+
+
+def marker_fingerprint(markers):
     """
-    counter_patterns = [
-        r'ContentPlaceHolder_H1Contador[^>]*>([^<]+)',
-        r'ContentPlaceHolder.*?H1.*?Contador[^>]*>([^<]+)', 
-        r'H1Contador[^>]*>([^<]+)',
-        r'id=["\'].*?contador.*?["\'][^>]*>([^<]+)',
-        r'class=["\'].*?contador.*?["\'][^>]*>([^<]+)'
-    ]
+    Hash the map markers of a page, however the page was read.
     
-    counter_info = {
-        'counter_found': False,
-        'counter_text': None,
-        'counter_number': None
-    }
+    Every marker is reduced to a (name, lat, lng, popup) tuple with the
+    coordinates at COORDINATE_DECIMALS decimals, and the tuples are sorted, so
+    the in-page extraction, the HTTP response, the rendered HTML and a
+    captured network response of the same map all hash the same. ASP.NET view
+    state and other per-request noise never enter the hash.
     
-    for pattern in counter_patterns:
-        matches = re.findall(pattern, page_source, re.IGNORECASE | re.DOTALL)
-        if matches:
-            counter_text = matches[0].strip()
-            counter_info['counter_found'] = True
-            counter_info['counter_text'] = counter_text
-            
-            # Try to extract number from counter text
-            number_matches = re.findall(r'\d+', counter_text)
-            if number_matches:
-                counter_info['counter_number'] = int(number_matches[-1])  # Take the last number found
-            
-            break
+    Args:
+        markers (iterable): (lat, lng, popup_html) marker triples
+        
+    Returns:
+        str: SHA-256 hex digest of the markers, or None if there are none
+    """
+    def coordinate(value):
+        try:
+            return f"{float(value):.{COORDINATE_DECIMALS}f}"
+        except (TypeError, ValueError):
+            return str(value).strip()
     
-    return counter_info
+    entries = sorted((parse_marker_popup(popup_html)[0], coordinate(lat), coordinate(lng), popup_html)
+                     for lat, lng, popup_html in markers)
+    if not entries:
+        return None
+    payload = json.dumps(entries, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 
-def get_school_data_from_page_source(page_source):
+def page_fingerprint(page_source):
     """
-    Extract comprehensive school data from page source including enhanced metadata.
-    Uses map marker data as primary source, supplements with dropdown for IDs.
+    Hash the map markers of a page source (see marker_fingerprint).
     
     Args:
         page_source (str): HTML source of the page
         
     Returns:
-        tuple: (enhanced_schools_list, extraction_stats_dict)
+        str: SHA-256 hex digest of the markers, or None if there are none
     """
-    # Extract HTML counter first
-    counter_info = extract_html_counter(page_source)
-    
-    # Extract dropdown data for ID matching
-    dropdown_data = extract_dropdown_data(page_source)
-    
-    # Extract map marker data from CDATA sections - this is the authoritative source
-    map_schools = []
-    
-    # First try the L.marker pattern for coordinates and details
-    marker_pattern = r'L\.marker\(\[([^,]+),\s*([^,]+)\].*?\.bindPopup\(\'([^\']*)\'\);'
-    coordinate_data = {}
+    return marker_fingerprint(iter_markers(page_source))
+
+
+def structured_fingerprint(page_data):
+    """
+    Hash the markers of a page read with extract_structured_page_data.
     
-    matches = re.finditer(marker_pattern, page_source, re.DOTALL)
+    Plays the role of page_fingerprint for the JavaScript extraction path and
+    returns the same digest for the same map (see marker_fingerprint).
     
-    for match in matches:
-        lat = match.group(1).strip()
-        lon = match.group(2).strip()
-        popup_html = match.group(3)
-        
-        # Extract name
-        name_pattern = r"<b>Nombre:</b>\s*([^<]+)"
-        name_match = re.search(name_pattern, popup_html)
-        name = html.unescape(name_match.group(1).strip()) if name_match else "N/A"
-        
-        # Extract address
-        address_pattern = r"<b>Dirección:</b>\s*([^<]+)"
-        address_match = re.search(address_pattern, popup_html)
-        address = html.unescape(address_match.group(1).strip()) if address_match else "N/A"
-        
-        # Extract modalities
-        modalities_pattern = r"<li>([^<]+)</li>"
-        modalities = [html.unescape(m.strip()) for m in re.findall(modalities_pattern, popup_html)]
-        modalities_text = ','.join(modalities) if modalities else "MISSING"
+    Args:
+        page_data (dict): Structured page data
         
-        # Store coordinate and detail data by school name
-        coordinate_data[name] = {
-            "Latitud": lat,
-            "Longitud": lon,
-            "Direccion": address,
-            "modality_labels": modalities_text  # Store modalities too!
+    Returns:
+        str: SHA-256 hex digest of the markers, or None if there are none
+    """
+    return marker_fingerprint(page_data.get('markers', []))
+
+
+class ScraperContext:
+    """Run-level scraping state shared by the scrape_* functions"""
+
+    def __init__(self, engine='selenium', base_url=BASE_URL, selenium_fallback=True,
+                 driver_pages=25, driver_max_rss_mb=1500, workers=1, max_host_requests=2,
+                 pacer='fixed', archive=None, freshness=None, refresh=False, resume=False,
+                 output_format='csv', extraction='js', capture='dom', block_assets=True,
+                 allowed_urls=None, tabs=0, completeness_refetches=2, circuit_breaker=True,
+                 first_pass_attempts=2, history=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
+        if extraction not in EXTRACTIONS:
+            raise ValueError(f"Unknown extraction: {extraction} (choose from {', '.join(EXTRACTIONS)})")
+        if capture not in CAPTURES:
+            raise ValueError(f"Unknown capture mode: {capture} (choose from {', '.join(CAPTURES)})")
+        if output_format not in SINKS:
+            raise ValueError(f"Unknown output format: {output_format} (choose from {', '.join(SINKS)})")
+
+        self.engine = engine
+        self.base_url = base_url.rstrip('/')
+        self.selenium_fallback = selenium_fallback
+        self.driver_pages = driver_pages
+        self.driver_max_rss_mb = driver_max_rss_mb
+        # tabs > 0 runs the Selenium workers as tabs of one shared browser
+        self.tabs = max(0, tabs)
+        self.workers = max(1, workers, self.tabs)
+        self._shared_browser = None
+        self._fingerprints = {}
+        # Re-fetches allowed when fewer schools than the HTML counter are extracted
+        self.completeness_refetches = max(0, completeness_refetches)
+        # Counter vs. extracted schools per (dep_id, mun_id)
+        self.completeness = {}
+        # Selenium pages are read in-page with JavaScript unless raw HTML is
+        # needed (extraction='html', or an archive that stores page sources)
+        self.extraction = extraction
+        # capture='network' reads the raw Georreferencia response through DevTools
+        self.capture = capture
+        # Requests blocked in Selenium pages, and the URLs that must still load
+        self.blocked_urls = list(BLOCKED_URL_PATTERNS) if block_assets else []
+        self.allowed_urls = ALLOWED_URL_PATTERNS + list(allowed_urls or [])
+        # Bytes/requests/blocked per Selenium municipality page, per (dep_id, mun_id)
+        self.page_weights = {}
+        self.pacer = pacer if isinstance(pacer, pacing.Pacer) else pacing.create_pacer(pacer)
+        # Host-level breaker that pauses every worker after a burst of timeouts
+        if isinstance(circuit_breaker, pacing.CircuitBreaker):
+            self.breaker = circuit_breaker
+        else:
+            self.breaker = pacing.CircuitBreaker() if circuit_breaker else None
+        # Attempts per municipality before it is moved to the deferred retry
+        # queue, which runs once every other municipality has been tried
+        self.first_pass_attempts = max(1, first_pass_attempts)
+        # Counter of failure kinds (see FAILURE_KINDS) per (dep_id, mun_id)
+        self.failures = {}
+        # Parallel runs start the largest municipalities first, sized by the
+        # school counts of a previous output CSV (see scheduling.py)
+        if isinstance(history, str):
+            history = MakespanScheduler.from_csv(history, self.workers)
+        self.scheduler = history
+        # Optional SnapshotArchive that keeps every page received
+        self.archive = SnapshotArchive(archive) if isinstance(archive, str) else archive
+        # Optional FreshnessStore recording every successful fetch, committed once
+        # the national CSV holds the rows; in refresh mode pages whose payload
+        # hash did not change are not re-parsed
+        self.freshness = FreshnessStore(freshness) if isinstance(freshness, str) else freshness
+        self.refresh = refresh
+        # RunJournal committing each finished municipality (set by scrape_all_departments);
+        # with resume=True, municipalities already committed are not scraped again
+        self.journal = None
+        self.resume = resume
+        # Record sink backend for department/national output (csv, jsonl or parquet)
+        self.output_format = output_format
+        self._driver_pool = None
+        # Global cap on in-flight page loads against the MINED host, shared by all workers
+        self._host_gate = threading.BoundedSemaphore(max(1, max_host_requests))
+        # HTTP sessions are per worker thread; requests.Session is not thread-safe
+        self._local = threading.local()
+        self._http_sessions = []
+        self._sessions_lock = threading.Lock()
+        self._warmups = []
+        # Seconds spent waiting for the map to render, per (dep_id, mun_id)
+        self.readiness = {}
+        # Modality/program catalogs shared by every page of the run
+        self.catalog = CatalogCache()
+
+    @contextmanager
+    def page_load(self, record=True):
+        """
+        Pace, gate and time one page load against the MINED host.
+
+        Waits while the circuit breaker is open and for the pacer, then holds
+        one of the global request slots while the load runs, and reports its
+        latency and outcome back to the pacer and the breaker.
+
+        Args:
+            record (bool): Report a successful load; False when the caller
+                decides its outcome later (after waiting for the map data) and
+                reports it with record_outcome. Failed loads are always reported.
+
+        Yields:
+            dict: Filled with the load's 'latency' once it succeeds
+        """
+        if self.breaker is not None:
+            self.breaker.wait()
+        self.pacer.wait(self.pacer.request_delay())
+        with self._host_gate:
+            load = {'latency': None}
+            start = time.perf_counter()
+            try:
+                yield load
+            except (TimeoutException, requests.Timeout):
+                self.record_outcome(pacing.TIMEOUT, time.perf_counter() - start)
+                raise
+            except Exception:
+                self.record_outcome(pacing.ERROR, time.perf_counter() - start)
+                raise
+            load['latency'] = time.perf_counter() - start
+            if record:
+                self.record_outcome(pacing.OK, load['latency'])
+
+    def record_outcome(self, outcome, latency=None):
+        """Report a page load outcome to the pacer and the circuit breaker"""
+        self.pacer.record(outcome, latency)
+        if self.breaker is not None:
+            self.breaker.record(outcome)
+
+    @property
+    def map_url(self):
+        return self.base_url + MAP_PATH
+
+    def department_url(self, department_id):
+        return f"{self.map_url}Departamento.aspx?Departamento={department_id}"
+
+    def municipality_url(self, municipality_id):
+        return f"{self.map_url}Georreferencia.aspx?Municipio={municipality_id}"
+
+    @property
+    def driver_pool(self):
+        with self._sessions_lock:
+            if self._driver_pool is None:
+                capture_network = self.capture == 'network' or bool(self.blocked_urls)
+                factory = partial(create_stealth_driver, capture_network=True) if capture_network else None
+                if self.tabs:
+                    self._shared_browser = SharedBrowser(factory)
+                    factory = self._shared_browser.open_tab
+                self._driver_pool = DriverPool(size=self.workers, max_pages=self.driver_pages,
+                                               max_rss_mb=self.driver_max_rss_mb, driver_factory=factory)
+        return self._driver_pool
+
+    @property
+    def http_session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = create_http_session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._http_sessions.append(session)
+        return session
+
+    @property
+    def _last_http_page(self):
+        """(municipality_id, fingerprint) of the last page this worker fetched over HTTP"""
+        return getattr(self._local, 'last_page', None)
+
+    @_last_http_page.setter
+    def _last_http_page(self, value):
+        self._local.last_page = value
+
+    def new_warmup(self, direct=False):
+        """Create a SessionWarmup whose savings are reported when the context closes"""
+        warmup = SessionWarmup(direct=direct)
+        with self._sessions_lock:
+            self._warmups.append(warmup)
+        return warmup
+
+    @property
+    def http_warmup(self):
+        """This worker's HTTP warm-up state; HTTP sessions start by requesting pages directly"""
+        warmup = getattr(self._local, 'warmup', None)
+        if warmup is None:
+            warmup = self._local.warmup = self.new_warmup(direct=True)
+        return warmup
+
+    def record_readiness(self, dep_id, mun_id, seconds, reason=None):
+        """Store how long a municipality map took to become ready"""
+        with self._sessions_lock:
+            self.readiness[(dep_id, mun_id)] = {'seconds': round(seconds, 3), 'reason': reason}
+
+    def claim_fingerprint(self, fingerprint, municipality_id):
+        """
+        Remember which municipality a page payload belongs to.
+
+        Tabs of a shared browser share one server session, so a page that
+        repeats another municipality's data can come from any tab.
+
+        Returns:
+            int: The other municipality that served this payload, or None
+        """
+        with self._sessions_lock:
+            owner = self._fingerprints.setdefault(fingerprint, municipality_id)
+        return owner if owner != municipality_id else None
+
+    def record_completeness(self, dep_id, mun_id, counter, extracted, attempts):
+        """Store how a municipality's extracted schools compare with its HTML counter"""
+        with self._sessions_lock:
+            self.completeness[(dep_id, mun_id)] = {
+                'counter': counter,
+                'extracted': extracted,
+                'attempts': attempts,
+                'complete': counter is None or extracted == counter,
+            }
+
+    def record_failure(self, dep_id, mun_id, kind):
+        """Count one failed attempt for a municipality by kind (see FAILURE_KINDS)"""
+        with self._sessions_lock:
+            self.failures.setdefault((dep_id, mun_id), Counter())[kind] += 1
+
+    def failure_reason(self, dep_id, mun_id):
+        """Most frequent failure kind of a municipality, or None"""
+        with self._sessions_lock:
+            kinds = self.failures.get((dep_id, mun_id))
+            return kinds.most_common(1)[0][0] if kinds else None
+
+    def record_page_weight(self, dep_id, mun_id, weight):
+        """Store the bytes, requests and blocked requests of a municipality page"""
+        with self._sessions_lock:
+            self.page_weights[(dep_id, mun_id)] = weight
+
+    def navigation_stats(self):
+        """Page loads made and saved by session warm-up reuse, across all workers"""
+        with self._sessions_lock:
+            warmups = list(self._warmups)
+        return {
+            'sessions': len(warmups),
+            'municipalities': sum(w.municipalities for w in warmups),
+            'page_loads': sum(w.page_loads for w in warmups),
+            'page_loads_saved': sum(w.page_loads_saved for w in warmups),
+            'fallbacks': sum(w.fallbacks for w in warmups),
         }
-    
-    # Now extract ALL schools from CDATA sections - use multiple strategies
-    target_cdata_pattern = r'//<!\[CDATA\[\s*var osmUrl\s*=(.*?)//\]\]>'
-    target_cdata_match = re.search(target_cdata_pattern, page_source, re.DOTALL)
-    
-    all_school_names = []  # Use list to preserve order for proper ID matching
-    
-    # Strategy 1: Primary target CDATA section
-    if target_cdata_match:
-        cdata_content = target_cdata_match.group(1)
-        print(f"    🔍 Found target CDATA section with 'var osmUrl =' (length: {len(cdata_content)})")
-        
-        # Extract all Nombre: entries from this specific CDATA section using multiple patterns
-        # Pattern 1: Standard <b>Nombre:</b> format
-        nombre_pattern_1 = r'<b>Nombre:</b>\s*([^<]+)'
-        nombres_1 = re.findall(nombre_pattern_1, cdata_content, re.IGNORECASE)
-        
-        # Pattern 2: Alternative Nombre: format (without <b> tags)
-        nombre_pattern_2 = r'Nombre:\s*([^\n\r,<]+)'
-        nombres_2 = re.findall(nombre_pattern_2, cdata_content, re.IGNORECASE)
-        
-        # Keep all schools in order - don't deduplicate by name since same-named schools
-        # are different institutions in different locations with different IDs
-        all_nombres_ordered = []
-        
-        # Process Pattern 1 results in order
-        for nombre in nombres_1:
-            school_name = html.unescape(nombre.strip())
-            if school_name and school_name != "N/A" and len(school_name) > 2:
-                all_nombres_ordered.append(school_name)
-        
-        # Process Pattern 2 results in order (if any)
-        for nombre in nombres_2:
-            school_name = html.unescape(nombre.strip())
-            # Clean up any trailing HTML or unwanted characters
-            school_name = re.sub(r'\s*</.*$', '', school_name)  # Remove trailing HTML tags
-            school_name = re.sub(r'\s*\|.*$', '', school_name)  # Remove trailing pipe separators
+
+    def reset_http_session(self):
+        """Drop this worker's cookies and pooled connections so the next fetch starts clean"""
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            session.close()
+            with self._sessions_lock:
+                self._http_sessions.remove(session)
+        self._local.session = None
+        self._local.last_page = None
+        self._local.warmup = None
+
+    def close(self):
+        print(f"⏱️  Pacing {self.pacer.describe()}")
+        if self.breaker is not None:
+            print(f"🚦 Circuit breaker {self.breaker.describe()}")
+        print(f"📚 Catalog cache: {self.catalog.describe()}")
+        nav = self.navigation_stats()
+        if nav['municipalities']:
+            print(f"🔥 Session warm-ups: {nav['page_loads']} page loads for {nav['municipalities']} municipalities "
+                  f"across {nav['sessions']} sessions, {nav['page_loads_saved']} saved vs. full navigation "
+                  f"({nav['fallbacks']} full-chain fallbacks)")
+        if self.page_weights:
+            weights = list(self.page_weights.values())
+            mean_kb = sum(w['bytes'] for w in weights) / len(weights) / 1024
+            print(f"📦 Page weight: mean {mean_kb:.0f} KB and "
+                  f"{sum(w['requests'] for w in weights) / len(weights):.1f} requests per municipality page, "
+                  f"{sum(w['blocked'] for w in weights)} requests blocked "
+                  f"({'blocking on' if self.blocked_urls else 'blocking off'})")
+        if self.readiness:
+            waits = [r['seconds'] for r in self.readiness.values()]
+            print(f"🗺️  Map readiness: mean {sum(waits) / len(waits):.2f}s, max {max(waits):.2f}s "
+                  f"over {len(waits)} municipalities")
+        with self._sessions_lock:
+            for session in self._http_sessions:
+                session.close()
+            self._http_sessions = []
+        self._local = threading.local()
+        if self._driver_pool is not None:
+            stats = self._driver_pool.stats
+            print(f"🚗 Driver pool: {stats['created']} started, {stats['reused']} reused, "
+                  f"{stats['recycled_pages'] + stats['recycled_memory'] + stats['recycled_unhealthy']} recycled")
+            self._driver_pool.close()
+            self._driver_pool = None
+        if self._shared_browser is not None:
+            stats = self._shared_browser.stats
+            print(f"🗂️  Shared browser: {stats['tabs_opened']} tabs opened, {stats['restarts']} restarts")
+            self._shared_browser.quit()
+            self._shared_browser = None
+
+
+def fetch_municipality_page_http(context, municipality_id, department_name=None):
+    """
+    Fetch a Georreferencia page directly over HTTP, without a browser.
+
+    The L.marker/CDATA payload is part of the server response, so the raw HTML
+    can go straight to get_school_data_from_page_source. The page is requested
+    directly first; if the server rejects that (no map markers), the session
+    walks the full navigation chain once and retries, and keeps visiting
+    department pages (once per department) from then on.
+
+    Args:
+        context (ScraperContext): Run context holding the HTTP session
+        municipality_id (int): Municipality ID
+        department_name (str): Name of the department, needed for the navigation fallback
+
+    Returns:
+        str: Raw HTML of the municipality page
+    """
+    warmup = context.http_warmup
+    dept_id = DEPARTMENTS[department_name]['id'] if department_name else None
+
+    def load(url, description):
+        print(f"    🌐 Fetching over HTTP: {description}")
+        with context.page_load():
+            return fetch_page_http(context.http_session, url)
+
+    hops = warmup.hops(dept_id)
+    page_loads = navigate_hops(context, warmup, hops, department_name, load)
+    # The pacer supplies the polite delay (no rendering time needed)
+    page_source = load(context.municipality_url(municipality_id), f"Georreferencia.aspx?Municipio={municipality_id}")
+    page_loads += 1
+
+    if "L.marker" not in page_source and department_name and hops != SessionWarmup.FULL_CHAIN:
+        print("    🔁 Direct request returned no map data, replaying the full navigation chain...")
+        warmup.rejected()
+        page_loads += navigate_hops(context, warmup, SessionWarmup.FULL_CHAIN, department_name, load)
+        page_source = load(context.municipality_url(municipality_id), f"Georreferencia.aspx?Municipio={municipality_id}")
+        page_loads += 1
+
+    # The map used to serve the previous municipality's data to a reused session
+    # (see docs/methodology.md); start a clean session if that happens.
+    fingerprint = page_fingerprint(page_source)
+    previous = context._last_http_page
+    if fingerprint is not None and previous and previous[0] != municipality_id and previous[1] == fingerprint:
+        print("    ♻️  Server returned the previous municipality's data, resetting HTTP session...")
+        warmup.finish(page_loads)
+        context.reset_http_session()
+        page_source = load(context.municipality_url(municipality_id), f"Georreferencia.aspx?Municipio={municipality_id}")
+        page_loads = 1
+        warmup = context.http_warmup
+        fingerprint = page_fingerprint(page_source)
+
+    warmup.finish(page_loads)
+    context._last_http_page = (municipality_id, fingerprint)
+    return page_source
+
+
+# Evaluated in the page instead of serializing the whole DOM on every poll
+MAP_READINESS_SCRIPT = """
+var counter = document.getElementById('ContentPlaceHolder_H1Contador');
+var match = counter ? counter.textContent.match(/\\d[\\d.,]*/) : null;
+var markers = 0;
+if (window.L && window.map && typeof window.map.eachLayer === 'function') {
+    window.map.eachLayer(function (layer) { if (layer instanceof L.Marker) { markers++; } });
+} else {
+    markers = document.querySelectorAll('.leaflet-marker-icon').length;
+}
+return {
+    state: document.readyState,
+    markers: markers,
+    counter: match ? parseInt(match[0].replace(/[.,]/g, ''), 10) : null
+};
+"""
+
+
+class MapReadiness:
+    """
+    WebDriverWait predicate: is the municipality map complete?
+
+    Ready as soon as the Leaflet marker count reaches the H1Contador counter,
+    or, when the counter is missing or larger (schools without coordinates),
+    once the document has loaded and the marker count has stayed the same for
+    `stable_polls` consecutive polls.
+    """
+
+    def __init__(self, stable_polls=3):
+        self.stable_polls = stable_polls
+        self.polls = 0
+        self.stable = 0
+        self.info = None
+        self.reason = None
+
+    def __call__(self, driver):
+        info = driver.execute_script(MAP_READINESS_SCRIPT) or {}
+        self.polls += 1
+        previous = self.info
+        self.info = info
+        markers = info.get('markers') or 0
+        counter = info.get('counter')
+
+        if markers > 0 and counter and markers >= counter:
+            self.reason = 'counter'
+            return info
+        if markers > 0 and info.get('state') == 'complete' and previous and previous.get('markers') == markers:
+            self.stable += 1
+            if self.stable >= self.stable_polls - 1:
+                self.reason = 'stable'
+                return info
+        else:
+            self.stable = 0
+        return False
+
+
+def wait_for_map_ready(driver, timeout=45, poll_frequency=0.25, stable_polls=3):
+    """
+    Wait until the map markers of a municipality page have rendered.
+
+    Args:
+        driver: WebDriver on a Georreferencia page
+        timeout (float): Seconds before TimeoutException
+        poll_frequency (float): Seconds between predicate checks
+        stable_polls (int): Equal marker counts needed when the counter does not match
+
+    Returns:
+        tuple: (seconds waited, MapReadiness with the last observation and reason)
+    """
+    readiness = MapReadiness(stable_polls=stable_polls)
+    start = time.perf_counter()
+    WebDriverWait(driver, timeout, poll_frequency=poll_frequency,
+                  ignored_exceptions=(JavascriptException,)).until(readiness)
+    return time.perf_counter() - start, readiness
+
+
+def fetch_municipality_page_selenium(context, department_name, municipality_name, municipality_id, patience=1):
+    """
+    Fetch a Georreferencia page with a warm Chrome instance from the driver pool.
+
+    Args:
+        context (ScraperContext): Run context holding the driver pool
+        department_name (str): Name of the department
+        municipality_name (str): Name of the municipality
+        municipality_id (int): Municipality ID
+        patience (int): Readiness window multiplier; completeness re-fetches
+            wait longer for markers to stop changing
+
+    With context.capture == 'network', the HTML is the Georreferencia response
+    body as the server sent it, read from the DevTools network events as soon
+    as the response finishes, without waiting for the map to render.
+
+    Returns:
+        str or dict: Page HTML (captured response or rendered page source),
+            structured page data (see extract_structured_page_data) when the
+            in-page extraction succeeds, or None if the driver could not be created
+    """
+    dept_id = DEPARTMENTS[department_name]['id']
+
+    with context.driver_pool.driver() as pooled:
+        if pooled is None:
+            return None
+        driver = pooled.driver
+        if pooled.warmup is None:
+            pooled.warmup = context.new_warmup()
+        warmup = pooled.warmup
+        if pooled.network is None and (context.capture == 'network' or context.blocked_urls):
+            pooled.network = NetworkMonitor(driver, context.blocked_urls, context.allowed_urls)
+        network = pooled.network
+
+        def load(url, description):
+            human_like_navigation(driver, url, description, context)
+
+        def load_municipality():
+            """Load the municipality page; its outcome is recorded once the map data arrives or not"""
+            if network is not None:
+                network.start_page()  # drop events from earlier pages
+            return human_like_navigation(driver, context.municipality_url(municipality_id),
+                                         f"municipality {municipality_name}", context, record=False)
+
+        def wait_for_data():
+            """(seconds, reason, markers, captured HTML or None) once the page data is available"""
+            if "Georreferencia" not in driver.current_url:
+                raise TimeoutException(f"redirected to {driver.current_url}")
+            if context.capture == 'network':
+                start = time.perf_counter()
+                try:
+                    body = network.response_body('Georreferencia.aspx')
+                except WebDriverException as e:
+                    if isinstance(e, TimeoutException):
+                        raise
+                    print(f"    ⚠️  Network capture failed, reading the DOM instead: {str(e)[:100]}")
+                else:
+                    if "L.marker" not in body:
+                        raise TimeoutException("captured response has no map markers")
+                    return time.perf_counter() - start, 'network', body.count('L.marker('), body
+            ready_seconds, readiness = wait_for_map_ready(driver, timeout=45 * patience,
+                                                          stable_polls=3 * patience)
+            return ready_seconds, readiness.reason, readiness.info.get('markers'), None
+
+        # Main site and education map once per browser, each department page once
+        hops = warmup.hops(dept_id)
+        page_loads = navigate_hops(context, warmup, hops, department_name, load)
+
+        # Navigate to municipality
+        latency = load_municipality()
+        page_loads += 1
+
+        # Wait for map data to load
+        print("    🗺️  Waiting for map data to load...")
+        try:
+            ready_seconds, reason, markers, captured = wait_for_data()
+        except TimeoutException:
+            context.record_outcome(pacing.TIMEOUT)
+            if hops == SessionWarmup.FULL_CHAIN:
+                warmup.finish(page_loads)
+                raise
+            # The shortcut may have been rejected: replay the full chain once
+            print("    🔁 No map data after a shortened navigation, replaying the full chain...")
+            warmup.rejected()
+            page_loads += navigate_hops(context, warmup, SessionWarmup.FULL_CHAIN, department_name, load)
+            latency = load_municipality()
+            page_loads += 1
+            try:
+                ready_seconds, reason, markers, captured = wait_for_data()
+            except TimeoutException:
+                warmup.finish(page_loads)
+                context.record_outcome(pacing.TIMEOUT)
+                raise
+        warmup.finish(page_loads)
+        context.record_outcome(pacing.OK, latency)
+
+        context.record_readiness(dept_id, municipality_id, ready_seconds, reason)
+        print(f"    ✅ Map data loaded successfully! ({markers} markers, "
+              f"ready in {ready_seconds:.2f}s by {reason})")
+        if network is not None:
+            weight = network.page_stats()
+            context.record_page_weight(dept_id, municipality_id, weight)
+            print(f"    📦 {weight['bytes'] / 1024:.0f} KB in {weight['requests']} requests, "
+                  f"{weight['blocked']} blocked")
+
+        page = captured
+        if page is None and context.extraction == 'js' and context.archive is None:
+            page = extract_structured_page_data(driver)
+        if isinstance(page, dict):
+            fingerprint = structured_fingerprint(page)
+        else:
+            if page is None:
+                page = driver.page_source
+            fingerprint = page_fingerprint(page)
+        pooled.pages_served += 1
+
+        # The map used to serve the previous municipality's data to a reused
+        # browser (see docs/methodology.md); retire the driver if that happens.
+        previous = pooled.last_page
+        if fingerprint is not None and previous and previous[0] != municipality_id and previous[1] == fingerprint:
+            raise StalePageError(f"driver served municipality {previous[0]}'s data for {municipality_id}")
+        if context.tabs and fingerprint is not None:
+            owner = context.claim_fingerprint(fingerprint, municipality_id)
+            if owner is not None:
+                raise StalePageError(f"tab served municipality {owner}'s data for {municipality_id}")
+        pooled.last_page = (municipality_id, fingerprint)
+
+        return page
+
+
+class NetworkMonitor:
+    """
+    Reads a driver's DevTools network events and applies URL blocking.
+
+    One monitor per browser (see create_stealth_driver(capture_network=True)):
+    the performance log can only be read once, so every consumer goes through
+    it. It counts the bytes and requests of the current page, reads raw
+    response bodies, and keeps the Network.setBlockedURLs list in sync with
+    the allow-list: a block pattern that catches an allowed URL is dropped
+    before the next page.
+    """
+
+    def __init__(self, driver, blocked_urls=(), allowed_urls=()):
+        self.driver = driver
+        self.blocked_urls = list(blocked_urls)
+        self.allowed_urls = list(allowed_urls)
+        self._urls = {}          # requestId -> URL of the current page's requests
+        self._responses = {}     # requestId -> (type, URL) of received responses
+        self._finished = set()
+        self._failed = {}
+        self.page = None
+        self.apply_blocking()
+        self.start_page()
+
+    def apply_blocking(self):
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls})
+
+    def is_allowed(self, url):
+        return any(fnmatch.fnmatchcase(url, pattern) for pattern in self.allowed_urls)
+
+    def poll(self):
+        """Consume pending performance log entries"""
+        unblock = set()
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method = message.get('method')
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                self._urls[request_id] = params['request']['url']
+                self.page['requests'] += 1
+            elif method == 'Network.responseReceived':
+                self._responses[request_id] = (params.get('type'), params['response']['url'])
+            elif method == 'Network.loadingFinished':
+                self._finished.add(request_id)
+                self.page['bytes'] += int(params.get('encodedDataLength') or 0)
+            elif method == 'Network.loadingFailed':
+                self._failed[request_id] = params.get('errorText')
+                if params.get('blockedReason'):
+                    self.page['blocked'] += 1
+                    url = self._urls.get(request_id, '')
+                    if self.is_allowed(url):
+                        unblock.update(p for p in self.blocked_urls if fnmatch.fnmatchcase(url, p))
+
+        if unblock:
+            print(f"    🔓 Unblocking patterns that caught allow-listed URLs: {', '.join(sorted(unblock))}")
+            self.blocked_urls = [p for p in self.blocked_urls if p not in unblock]
+            self.apply_blocking()
+
+    def start_page(self):
+        """Forget earlier pages; counters restart for the next navigation"""
+        if self.page is not None:
+            self.poll()
+        self._urls.clear()
+        self._responses.clear()
+        self._finished.clear()
+        self._failed.clear()
+        self.page = {'bytes': 0, 'requests': 0, 'blocked': 0}
+
+    def page_stats(self):
+        """Bytes received, requests made and requests blocked since start_page"""
+        self.poll()
+        return dict(self.page)
+
+    def response_body(self, url_fragment, timeout=45):
+        """
+        Read the body of the last document response whose URL contains url_fragment.
+
+        Follows Network.responseReceived / Network.loadingFinished and fetches
+        the body with Network.getResponseBody, so the HTML is exactly what the
+        server sent rather than the re-serialized DOM.
+
+        Args:
+            url_fragment (str): Part of the response URL to look for
+            timeout (float): Seconds to wait for the response to finish
+
+        Returns:
+            str: Response body
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            self.poll()
+            documents = [request_id for request_id, (kind, url) in self._responses.items()
+                         if kind == 'Document' and url_fragment in url]
+            request_id = documents[-1] if documents else None
+            if request_id in self._failed:
+                raise WebDriverException(f"loading failed: {self._failed[request_id]}")
+            if request_id in self._finished:
+                result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                body = result['body']
+                if result.get('base64Encoded'):
+                    body = base64.b64decode(body).decode('utf-8', errors='replace')
+                return body
+
+            if time.monotonic() > deadline:
+                raise TimeoutException(f"no finished {url_fragment} response after {timeout}s")
+            time.sleep(0.1)
+
+
+# Reads the Leaflet markers and dropdowns of a rendered Georreferencia page in
+# one round trip; returns null when no Leaflet map is found
+STRUCTURED_EXTRACTION_SCRIPT = """
+if (!window.L || !L.Map) { return null; }
+var map = window.map instanceof L.Map ? window.map : null;
+if (!map) {
+    for (var key in window) {
+        try { if (window[key] instanceof L.Map) { map = window[key]; break; } } catch (e) {}
+    }
+}
+if (!map) { return null; }
+var markers = [], seen = {};
+function walk(layer) {
+    var id = L.stamp(layer);
+    if (seen[id]) { return; }
+    seen[id] = true;
+    if (layer instanceof L.Marker) {
+        var latlng = layer.getLatLng(), popup = layer.getPopup();
+        var content = popup ? popup.getContent() : '';
+        markers.push([latlng.lat, latlng.lng, typeof content === 'string' ? content : (content && content.outerHTML) || '']);
+    } else if (typeof layer.eachLayer === 'function') {
+        layer.eachLayer(walk);  // layer and cluster groups
+    }
+}
+map.eachLayer(walk);
+function options(name) {
+    var select = document.querySelector('select[name="ctl00$ContentPlaceHolder1$' + name + '"]')
+        || document.querySelector('select[id*="' + name + '"]');
+    if (!select) { return []; }
+    return Array.prototype.map.call(select.options, function (o) { return [o.getAttribute('value'), o.textContent]; });
+}
+var counter = document.getElementById('ContentPlaceHolder_H1Contador');
+return {
+    markers: markers,
+    schools: options('ddlCentroEducativo'),
+    modalities: options('ddlModalidad'),
+    programs: options('ddlPrograma'),
+    counter: counter ? counter.textContent : null
+};
+"""
+
+# The MINED map renders coordinates with 8 decimals; JavaScript hands them back
+# as numbers, so they are formatted to match the page source
+COORDINATE_DECIMALS = 8
+
+
+def extract_structured_page_data(driver):
+    """
+    Read markers, dropdown options and the counter from a rendered page.
+    
+    Runs STRUCTURED_EXTRACTION_SCRIPT in the page, so the multi-megabyte HTML
+    is neither serialized nor re-parsed.
+    
+    Args:
+        driver: WebDriver on a Georreferencia page whose map is ready
+        
+    Returns:
+        dict: markers ([lat, lng, popup_html] lists), schools/modalities/programs
+            ([value, text] option lists) and counter text; None if the page has
+            no Leaflet map or no markers
+    """
+    try:
+        page_data = driver.execute_script(STRUCTURED_EXTRACTION_SCRIPT)
+    except JavascriptException as e:
+        print(f"    ⚠️  In-page extraction failed, using page source: {str(e)[:100]}")
+        return None
+    if not page_data or not page_data.get('markers'):
+        return None
+    return page_data
+
+
+def get_school_data_from_structured(page_data, catalog_cache=None):
+    """
+    Extract school data from the output of extract_structured_page_data.
+    
+    Produces the same records as get_school_data_from_page_source for the
+    same page, without the regex fallback strategies: the names come straight
+    from the map markers, in map order.
+    
+    Args:
+        page_data (dict): Structured page data
+        catalog_cache (CatalogCache): Run-level modality/program catalog cache
+        
+    Returns:
+        tuple: (enhanced_schools_list, extraction_stats_dict)
+    """
+    counter_info = parse_counter_text(page_data.get('counter'))
+    modality_options = page_data.get('modalities', [])
+    program_options = page_data.get('programs', [])
+    fingerprint = options_fingerprint(modality_options, program_options) if catalog_cache is not None else None
+    catalog = lookup_catalog(catalog_cache, fingerprint, lambda: (modality_options, program_options))
+    dropdown_data = build_dropdown_data(page_data.get('schools', []), catalog)
+    
+    coordinate_data = {}
+    all_school_names = []
+    for lat, lng, popup_html in page_data['markers']:
+        name, details = parse_marker_popup(popup_html)
+        coordinate_data[name] = {
+            "Latitud": f"{lat:.{COORDINATE_DECIMALS}f}",
+            "Longitud": f"{lng:.{COORDINATE_DECIMALS}f}",
+            **details
+        }
+        if name != "N/A" and len(name) > 2:
+            all_school_names.append(name)
+    
+    if not all_school_names:
+        all_school_names = list(coordinate_data.keys())
+    
+    print(f"    🧭 In-page extraction: {len(page_data['markers'])} markers, "
+          f"{len(all_school_names)} schools (order preserved)")
+    
+    return build_school_records(all_school_names, coordinate_data, dropdown_data, counter_info)
+
+
+def extract_dropdown_data(page_source, catalog_cache=None):
+    """
+    Extract school IDs, modality IDs, and program IDs from dropdown menus.
+    Preserves order and allows duplicate names for schools.
+    
+    Args:
+        page_source (str): HTML source of the page
+        catalog_cache (CatalogCache): Run-level catalog cache; when the modality
+            and program <select> blocks fingerprint the same as on an earlier
+            page, their options are not parsed again
+        
+    Returns:
+        dict: Contains schools_list (ordered), schools_lookup (legacy), modalities_lookup,
+            programs_lookup and catalog
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
+    
+    def select_options(name):
+        select = soup.find('select', {'name': f'ctl00$ContentPlaceHolder1${name}'})
+        if not select:
+            select = soup.find('select', id=lambda x: x and name in x)
+        if not select:
+            return []
+        return [(option.get('value'), option.text) for option in select.find_all('option')]
+    
+    fingerprint = dropdown_fingerprint(page_source) if catalog_cache is not None else None
+    catalog = lookup_catalog(catalog_cache, fingerprint,
+                             lambda: (select_options('ddlModalidad'), select_options('ddlPrograma')))
+    return build_dropdown_data(select_options('ddlCentroEducativo'), catalog)
+
+
+def lookup_catalog(catalog_cache, fingerprint, parse_options):
+    """
+    Modality/program catalog of a page: the cached one, or a freshly built one.
+    
+    Args:
+        catalog_cache (CatalogCache): Run-level cache, or None to always build
+        fingerprint (str): Dropdown fingerprint of the page
+        parse_options (callable): Returns (modality_options, program_options);
+            only called on a cache miss
+        
+    Returns:
+        DropdownCatalog: Catalog with the modality and program lookups
+    """
+    catalog = catalog_cache.get(fingerprint) if catalog_cache is not None else None
+    if catalog is None:
+        catalog = build_catalog(*parse_options(), fingerprint=fingerprint)
+        if catalog_cache is not None:
+            catalog = catalog_cache.add(catalog)
+    return catalog
+
+
+def build_catalog(modality_options, program_options, fingerprint=None):
+    """
+    Build the modality and program lookups from raw (value, text) option pairs.
+    
+    Args:
+        modality_options (list): (value, text) pairs of ddlModalidad
+        program_options (list): (value, text) pairs of ddlPrograma
+        fingerprint (str): Dropdown fingerprint the catalog is cached under
+        
+    Returns:
+        DropdownCatalog: Lookups plus their normalized labels for matching
+    """
+    # Extract modality IDs from "Buscar por Modalidad"
+    modalities_lookup = {}
+    for value, text in modality_options:
+        text = (text or '').strip()
+        if value and value != '' and text and text != 'SELECCIONE':
+            modalities_lookup[text] = {
+                'modality_id': value,
+                'modality_name': html.unescape(text)
+            }
+    
+    # Extract program IDs from "Buscar por Programa Educativo"
+    programs_lookup = {}
+    for value, text in program_options:
+        text = (text or '').strip()
+        if value and value != '' and text and text != 'SELECCIONE':
+            programs_lookup[text] = {
+                'program_id': value,
+                'program_name': html.unescape(text)
+            }
+    
+    return DropdownCatalog(modalities_lookup, programs_lookup, fingerprint)
+
+
+def build_dropdown_data(school_options, catalog):
+    """
+    Build the dropdown lookups from raw (value, text) school option pairs and a catalog.
+    
+    Shared by the HTML parser and the in-page JavaScript extraction, so both
+    filter placeholders and resolve duplicates the same way.
+    
+    Args:
+        school_options (list): (value, text) pairs of ddlCentroEducativo
+        catalog (DropdownCatalog): Modality and program lookups (see build_catalog)
+        
+    Returns:
+        dict: Contains schools_list (ordered), schools_lookup (legacy), modalities_lookup,
+            programs_lookup and catalog
+    """
+    # Extract school IDs and names from "Buscar Centros Educativos" - PRESERVE ORDER
+    schools_list = []  # New: ordered list that preserves duplicates
+    schools_lookup = {}  # Legacy: for backward compatibility
+    
+    for value, text in school_options:
+        text = (text or '').strip()
+        # Filter out placeholder and empty options
+        if (value and value != '' and text and 
+            text != 'SELECCIONE' and 
+            text != '-- Escriba nombre del centro --' and
+            value != '-- Escriba nombre del centro --'):
+            
+            school_entry = {
+                'school_id': value,
+                'school_name': html.unescape(text)
+            }
+            
+            # Add to ordered list (preserves duplicates and order)
+            schools_list.append((text, school_entry))
+            
+            # Also add to lookup dict for legacy compatibility (will overwrite duplicates)
+            schools_lookup[text] = school_entry
+    
+    return {
+        'schools_list': schools_list,      # New: ordered list with duplicates preserved
+        'schools_lookup': schools_lookup,  # Legacy: dict for backward compatibility
+        'modalities_lookup': catalog.modalities_lookup,
+        'programs_lookup': catalog.programs_lookup,
+        'catalog': catalog
+    }
+
+
+def extract_html_counter(page_source):
+    """
+    Extract the HTML counter (ContentPlaceHolder_H1Contador) from the page.
+    
+    The counter patterns (exact ID first, then looser id/class matches) are
+    run by page_scanner.find_counter_text, in linear time even on pages
+    without a counter.
+    
+    Args:
+        page_source (str): HTML source of the page
+        
+    Returns:
+        dict: Contains counter information
+    """
+    return parse_counter_text(find_counter_text(page_source))
+
+
+def parse_counter_text(counter_text):
+    """
+    Build counter information from the text of the H1Contador element.
+    
+    Args:
+        counter_text (str): Counter text, e.g. 'Centros Educativos: 42', or None
+        
+    Returns:
+        dict: Contains counter information
+    """
+    counter_info = {
+        'counter_found': False,
+        'counter_text': None,
+        'counter_number': None
+    }
+    
+    if counter_text is None:
+        return counter_info
+    
+    counter_text = counter_text.strip()
+    counter_info['counter_found'] = True
+    counter_info['counter_text'] = counter_text
+    
+    # Try to extract number from counter text
+    number_matches = re.findall(r'\d+', counter_text)
+    if number_matches:
+        counter_info['counter_number'] = int(number_matches[-1])  # Take the last number found
+    
+    return counter_info
+
+
+def parse_marker_popup(popup_html):
+    """
+    Extract the school name, address and modalities from a marker popup.
+    
+    Args:
+        popup_html (str): HTML passed to bindPopup
+        
+    Returns:
+        tuple: (name, {'Direccion': ..., 'modality_labels': ...})
+    """
+    # Extract name
+    name_pattern = r"<b>Nombre:</b>\s*([^<]+)"
+    name_match = re.search(name_pattern, popup_html)
+    name = html.unescape(name_match.group(1).strip()) if name_match else "N/A"
+    
+    # Extract address
+    address_pattern = r"<b>Dirección:</b>\s*([^<]+)"
+    address_match = re.search(address_pattern, popup_html)
+    address = html.unescape(address_match.group(1).strip()) if address_match else "N/A"
+    
+    # Extract modalities
+    modalities_pattern = r"<li>([^<]+)</li>"
+    modalities = [html.unescape(m.strip()) for m in re.findall(modalities_pattern, popup_html)]
+    modalities_text = ','.join(modalities) if modalities else "MISSING"
+    
+    return name, {
+        "Direccion": address,
+        "modality_labels": modalities_text  # Store modalities too!
+    }
+
+
+def get_school_data_from_page_source(page_source, catalog_cache=None):
+    """
+    Extract comprehensive school data from page source including enhanced metadata.
+    Uses map marker data as primary source, supplements with dropdown for IDs.
+    
+    The page is read in one pass by page_scanner.scan_page; the records are
+    identical to legacy_get_school_data_from_page_source, which is used
+    instead when the scanner cannot reproduce it exactly or when the target
+    CDATA section yields no names (fallback strategies 2-4).
+    
+    Args:
+        page_source (str): HTML source of the page
+        catalog_cache (CatalogCache): Run-level modality/program catalog cache
+        
+    Returns:
+        tuple: (enhanced_schools_list, extraction_stats_dict)
+    """
+    scan = scan_page(page_source)
+    if scan is None:
+        print("    🐢 Page markup outside the single-pass subset, using the legacy parser")
+        return legacy_get_school_data_from_page_source(page_source, catalog_cache)
+    
+    # Counter: patterns 2-5 of the legacy parser only run when the main one missed
+    if scan.counter_text is not None:
+        counter_info = parse_counter_text(scan.counter_text)
+    else:
+        counter_info = extract_html_counter(page_source)
+    
+    fingerprint = dropdown_fingerprint(page_source) if catalog_cache is not None else None
+    catalog = lookup_catalog(catalog_cache, fingerprint,
+                             lambda: (scan.options['ddlModalidad'], scan.options['ddlPrograma']))
+    dropdown_data = build_dropdown_data(scan.options['ddlCentroEducativo'], catalog)
+    
+    coordinate_data = {}
+    for lat, lon, popup_html in scan.markers:
+        name, details = parse_marker_popup(popup_html)
+        coordinate_data[name] = {"Latitud": lat, "Longitud": lon, **details}
+    
+    # Names from the target CDATA section: <b>Nombre:</b> matches, then plain Nombre: matches
+    all_school_names = []
+    for nombre in scan.nombres_bold:
+        school_name = html.unescape(nombre.strip())
+        if school_name and school_name != "N/A" and len(school_name) > 2:
+            all_school_names.append(school_name)
+    for nombre in scan.nombres_plain:
+        school_name = html.unescape(nombre.strip())
+        school_name = re.sub(r'\s*</.*$', '', school_name)
+        school_name = re.sub(r'\s*\|.*$', '', school_name)
+        school_name = school_name.strip()
+        if school_name and school_name != "N/A" and len(school_name) > 2:
+            all_school_names.append(school_name)
+    
+    if not all_school_names:
+        # The fallback strategies rescan every CDATA section; leave them to the reference parser
+        return legacy_get_school_data_from_page_source(page_source, catalog_cache)
+    
+    print(f"    ⚡ Single pass: {len(scan.markers)} markers, {len(all_school_names)} schools in the "
+          f"target CDATA ({len(scan.nombres_bold)} <b>Nombre:</b> + {len(scan.nombres_plain)} Nombre: "
+          f"matches, order preserved)")
+    
+    return build_school_records(all_school_names, coordinate_data, dropdown_data, counter_info)
+
+
+def legacy_get_school_data_from_page_source(page_source, catalog_cache=None):
+    """
+    Extract comprehensive school data from page source including enhanced metadata.
+    
+    Multi-pass reference parser: get_school_data_from_page_source must return
+    the same records, and falls back to this function for pages outside the
+    single-pass scanner's strict subset.
+    Uses map marker data as primary source, supplements with dropdown for IDs.
+    
+    Args:
+        page_source (str): HTML source of the page
+        catalog_cache (CatalogCache): Run-level modality/program catalog cache
+        
+    Returns:
+        tuple: (enhanced_schools_list, extraction_stats_dict)
+    """
+    # Extract HTML counter first
+    counter_info = extract_html_counter(page_source)
+    
+    # Extract dropdown data for ID matching
+    dropdown_data = extract_dropdown_data(page_source, catalog_cache)
+    
+    # Extract map marker data from CDATA sections - this is the authoritative source
+    map_schools = []
+    
+    # First try the L.marker calls for coordinates and details (bounded scan,
+    # each popup is searched for up to the next marker only)
+    coordinate_data = {}
+    
+    for lat, lon, popup_html in iter_markers(page_source):
+        # Store coordinate and detail data by school name
+        name, details = parse_marker_popup(popup_html)
+        coordinate_data[name] = {"Latitud": lat, "Longitud": lon, **details}
+    
+    # Now extract ALL schools from CDATA sections - use multiple strategies
+    target_cdata_span = find_target_cdata(page_source)
+    
+    all_school_names = []  # Use list to preserve order for proper ID matching
+    
+    # Strategy 1: Primary target CDATA section
+    if target_cdata_span:
+        cdata_content = page_source[target_cdata_span[0]:target_cdata_span[1]]
+        print(f"    🔍 Found target CDATA section with 'var osmUrl =' (length: {len(cdata_content)})")
+        
+        # Extract all Nombre: entries from this specific CDATA section using multiple patterns
+        # Pattern 1: Standard <b>Nombre:</b> format
+        nombre_pattern_1 = r'<b>Nombre:</b>\s*([^<]+)'
+        nombres_1 = re.findall(nombre_pattern_1, cdata_content, re.IGNORECASE)
+        
+        # Pattern 2: Alternative Nombre: format (without <b> tags)
+        nombre_pattern_2 = r'Nombre:\s*([^\n\r,<]+)'
+        nombres_2 = re.findall(nombre_pattern_2, cdata_content, re.IGNORECASE)
+        
+        # Keep all schools in order - don't deduplicate by name since same-named schools
+        # are different institutions in different locations with different IDs
+        all_nombres_ordered = []
+        
+        # Process Pattern 1 results in order
+        for nombre in nombres_1:
+            school_name = html.unescape(nombre.strip())
+            if school_name and school_name != "N/A" and len(school_name) > 2:
+                all_nombres_ordered.append(school_name)
+        
+        # Process Pattern 2 results in order (if any)
+        for nombre in nombres_2:
+            school_name = html.unescape(nombre.strip())
+            # Clean up any trailing HTML or unwanted characters
+            school_name = re.sub(r'\s*</.*$', '', school_name)  # Remove trailing HTML tags
+            school_name = re.sub(r'\s*\|.*$', '', school_name)  # Remove trailing pipe separators
             school_name = school_name.strip()
             
             if school_name and school_name != "N/A" and len(school_name) > 2:
@@ -607,10 +2095,7 @@ def get_school_data_from_page_source(page_source):
     # Strategy 2: Only use other CDATA sections if primary target failed
     if len(all_school_names) == 0:
         print(f"    🔍 Strategy 2 - Fallback to other CDATA sections")
-        cdata_pattern = r'//<!\[CDATA\[(.*?)//\]\]>'
-        cdata_matches = re.findall(cdata_pattern, page_source, re.DOTALL)
-        
-        for i, cdata_content in enumerate(cdata_matches):
+        for i, cdata_content in enumerate(iter_cdata_sections(page_source)):
             # Use both patterns for comprehensive extraction
             nombre_pattern_1 = r'<b>Nombre:</b>\s*([^<]+)'
             nombre_pattern_2 = r'Nombre:\s*([^\n\r,<]+)'
@@ -653,11 +2138,36 @@ def get_school_data_from_page_source(page_source):
     
     print(f"    🎯 FINAL EXTRACTION: {len(all_school_names)} schools found (order preserved)")
     
+    return build_school_records(all_school_names, coordinate_data, dropdown_data, counter_info)
+
+
+def build_school_records(all_school_names, coordinate_data, dropdown_data, counter_info):
+    """
+    Combine map names, marker details and dropdown lookups into school records.
+    
+    Shared by the HTML parser and the in-page JavaScript extraction.
+    
+    Args:
+        all_school_names (list): School names in map order (duplicates kept)
+        coordinate_data (dict): Marker details keyed by school name
+        dropdown_data (dict): Output of build_dropdown_data
+        counter_info (dict): Output of parse_counter_text
+        
+    Returns:
+        tuple: (enhanced_schools_list, extraction_stats_dict)
+    """
     # Create complete school list using ORDER-BASED matching
     # Schools appear in the same order in CDATA and dropdown
     schools_data = []
     matched_coords = 0
     missing_coords = 0
+    partial_coords = 0
+    
+    # Partial name matches go through a substring index of the marker names,
+    # built on the first school that is not an exact key
+    name_index = None
+    index_seconds = 0.0
+    partial_seconds = 0.0
     
     # Get dropdown schools in order (as list) - use new schools_list that preserves duplicates
     dropdown_schools_ordered = dropdown_data['schools_list']
@@ -685,14 +2195,18 @@ def get_school_data_from_page_source(page_source):
             school.update(coordinate_data[school_name])
             matched_coords += 1
         else:
-            # Try partial matching for coordinates
-            coord_match = None
-            for coord_name, coord_data in coordinate_data.items():
-                if (school_name.upper().strip() in coord_name.upper().strip() or 
-                    coord_name.upper().strip() in school_name.upper().strip()):
-                    coord_match = coord_data
-                    matched_coords += 1
-                    break
+            # Try partial matching for coordinates: first marker whose name
+            # contains the school name or is contained in it
+            started = time.perf_counter()
+            if name_index is None:
+                name_index = NameIndex(coordinate_data)
+                index_seconds = time.perf_counter() - started
+            coord_name = name_index.find(school_name)
+            partial_seconds += time.perf_counter() - started
+            coord_match = coordinate_data[coord_name] if coord_name is not None else None
+            if coord_match:
+                matched_coords += 1
+                partial_coords += 1
             
             if coord_match:
                 school.update(coord_match)
@@ -715,6 +2229,10 @@ def get_school_data_from_page_source(page_source):
         'total_cdata_schools': len(all_school_names),
         'schools_with_coords': matched_coords,
         'schools_missing_coords': missing_coords,
+        'coords_exact_matches': matched_coords - partial_coords,
+        'coords_partial_matches': partial_coords,
+        'name_index_seconds': index_seconds,
+        'partial_match_seconds': partial_seconds,
         'modalities_lookup': dropdown_data['modalities_lookup'],
         'programs_lookup': dropdown_data['programs_lookup'],
         'html_counter_found': counter_info['counter_found'],
@@ -722,7 +2240,9 @@ def get_school_data_from_page_source(page_source):
         'html_counter_number': counter_info['counter_number']
     }
     
-    # Enhance schools with modality and program matching
+    # Enhance schools with modality and program matching through the
+    # catalog's precompiled, memoizing label resolvers
+    catalog = dropdown_data['catalog']
     enhanced_schools = []
     for school in schools_data:
         enhanced_school = school.copy()
@@ -742,183 +2262,522 @@ def get_school_data_from_page_source(page_source):
             modalities_list = [m.strip() for m in modality_labels.split(',')]
             
             for modality in modalities_list:
-                modality_normalized = modality.upper().strip()
+                # Exact match on the normalized label first, then the first
+                # entry containing it or contained in it (labels over 3 characters)
+                modality_data = catalog.modality_resolver.resolve(modality)
+                if modality_data:
+                    matched_modality_ids.append(modality_data['modality_id'])
+                    matched_modality_names.append(modality_data['modality_name'])
                 
-                # Try exact match first for modalities
-                modality_matched = False
-                for lookup_modality, lookup_data in dropdown_data['modalities_lookup'].items():
-                    lookup_normalized = lookup_modality.upper().strip()
-                    if modality_normalized == lookup_normalized:
-                        matched_modality_ids.append(lookup_data['modality_id'])
-                        matched_modality_names.append(lookup_data['modality_name'])
-                        modality_matched = True
-                        break
+                program_data = catalog.program_resolver.resolve(modality)
+                if program_data:
+                    matched_program_ids.append(program_data['program_id'])
+                    matched_program_names.append(program_data['program_name'])
+        
+        enhanced_school['modality_ids'] = ','.join(matched_modality_ids) if matched_modality_ids else None
+        enhanced_school['modality_labels'] = ','.join(matched_modality_names) if matched_modality_names else None
+        enhanced_school['program_ids'] = ','.join(matched_program_ids) if matched_program_ids else None
+        enhanced_school['program_labels'] = ','.join(matched_program_names) if matched_program_names else None
+        
+        enhanced_schools.append(enhanced_school)
+    
+    return enhanced_schools, extraction_stats
+
+
+def add_location_info(schools_data, department_name, municipality_name, municipality_id):
+    """Add department and municipality columns to extracted school records"""
+    dept_id = DEPARTMENTS[department_name]['id']
+    for school in schools_data:
+        school['department'] = department_name
+        school['municipality'] = municipality_name
+        school['dep_id'] = dept_id
+        school['mun_id'] = municipality_id
+    return schools_data
+
+
+def scrape_municipality(department_name, municipality_name, municipality_id, context, max_retries=5):
+    """
+    Scrape all schools from a specific municipality with enhanced metadata.
+    
+    Args:
+        department_name (str): Name of the department
+        municipality_name (str): Name of the municipality  
+        municipality_id (int): Municipality ID
+        context (ScraperContext): Run context (engine, sessions); shared by every
+            municipality of a run so that they are paced together
+        max_retries (int): Maximum number of retry attempts
+        
+    Returns:
+        list: List of school dictionaries with enhanced data, None on failure,
+            or UNCHANGED in refresh mode when the markers match the stored hash
+    """
+    dept_id = DEPARTMENTS[department_name]['id']
+    
+    # The HTTP engine falls back to Selenium if it cannot get the data
+    engines = [context.engine]
+    if context.engine == 'http' and context.selenium_fallback:
+        engines.append('selenium')
+    
+    # Completeness policy: while fewer schools than the HTML counter are extracted,
+    # re-fetch with a longer readiness window and keep the best attempt
+    best = None
+    fetches = 0
+    refetches = 0
+    attempts = 0
+    
+    def failed(kind):
+        context.record_failure(dept_id, municipality_id, kind)
+    
+    def finish(schools_data, extraction_stats, content_hash):
+        counter_num = extraction_stats['html_counter_number']
+        context.record_completeness(dept_id, municipality_id, counter_num, len(schools_data), fetches)
+        if context.freshness is not None:
+            context.freshness.update(dept_id, municipality_id, content_hash,
+                                     department=department_name, municipality=municipality_name,
+                                     counter=counter_num, schools=len(schools_data))
+        return add_location_info(schools_data, department_name, municipality_name, municipality_id)
+    
+    for engine in engines:
+        if engine != context.engine:
+            print(f"    🔁 Falling back to the {engine} engine for {municipality_name}")
+        
+        for attempt in range(max_retries):
+            attempts += 1
+            try:
+                print(f"    🔧 FIXED scraping approach for: {municipality_name} (engine: {engine})")
+                
+                if engine == 'http':
+                    page_source = fetch_municipality_page_http(context, municipality_id, department_name)
+                else:
+                    page_source = fetch_municipality_page_selenium(context, department_name, municipality_name,
+                                                                   municipality_id, patience=1 + refetches)
+                    if page_source is None:
+                        print(f"    ❌ Failed to create driver (attempt {attempt + 1}/{max_retries})")
+                        failed('driver_crash')
+                        continue
+                
+                fetches += 1
+                
+                # The Selenium engine hands back structured data when the in-page extraction worked
+                page_data = page_source if isinstance(page_source, dict) else None
+                if page_data is not None:
+                    page_source = None
+                    content_hash = structured_fingerprint(page_data)
+                    has_marker = True
+                else:
+                    if context.archive is not None:
+                        context.archive.store(page_source, dept_id, municipality_id, department_name,
+                                              municipality_name, engine=engine)
+                    content_hash = page_fingerprint(page_source)
+                    has_marker = "L.marker" in page_source
+                
+                if (context.refresh and context.freshness is not None and content_hash is not None
+                        and context.freshness.is_unchanged(dept_id, municipality_id, content_hash)):
+                    print(f"    💤 {municipality_name} unchanged since last fetch, skipping parse")
+                    context.freshness.update(dept_id, municipality_id)
+                    return UNCHANGED
                 
-                # If no exact match, try partial matching (but more carefully)
-                if not modality_matched:
-                    for lookup_modality, lookup_data in dropdown_data['modalities_lookup'].items():
-                        lookup_normalized = lookup_modality.upper().strip()
-                        # Only match if the modality is a significant substring (avoid short matches)
-                        if (len(modality_normalized) > 3 and modality_normalized in lookup_normalized) or \
-                           (len(lookup_normalized) > 3 and lookup_normalized in modality_normalized):
-                            matched_modality_ids.append(lookup_data['modality_id'])
-                            matched_modality_names.append(lookup_data['modality_name'])
-                            break
+                # Extract all data
+                if page_data is not None:
+                    schools_data, extraction_stats = get_school_data_from_structured(page_data, context.catalog)
+                else:
+                    schools_data, extraction_stats = get_school_data_from_page_source(page_source,
+                                                                                      context.catalog)
                 
-                # Try exact match first for programs
-                program_matched = False
-                for lookup_program, lookup_data in dropdown_data['programs_lookup'].items():
-                    lookup_normalized = lookup_program.upper().strip()
-                    if modality_normalized == lookup_normalized:
-                        matched_program_ids.append(lookup_data['program_id'])
-                        matched_program_names.append(lookup_data['program_name'])
-                        program_matched = True
+                if schools_data:
+                    print(f"    📋 COMPLETE DATA EXTRACTION:")
+                    print(f"        • Schools from CDATA/map: {extraction_stats['total_cdata_schools']} (primary source)")
+                    print(f"        • Schools in dropdown: {extraction_stats['total_dropdown_schools']} (for ID matching)")
+                    print(f"        • Map markers with coords: {extraction_stats['total_map_markers']}")
+                    print(f"        • Schools with coordinates: {extraction_stats['schools_with_coords']}")
+                    print(f"        • Schools missing coordinates: {extraction_stats['schools_missing_coords']}")
+                    if extraction_stats['coords_partial_matches']:
+                        print(f"        • Coordinates by partial name match: {extraction_stats['coords_partial_matches']} "
+                              f"({extraction_stats['partial_match_seconds'] * 1000:.1f} ms incl. "
+                              f"{extraction_stats['name_index_seconds'] * 1000:.1f} ms index build)")
+                    print(f"        • Modalities available: {len(extraction_stats['modalities_lookup'])}")
+                    print(f"        • Programs available: {len(extraction_stats['programs_lookup'])}")
+                    
+                    # Display HTML counter information
+                    if extraction_stats['html_counter_found']:
+                        counter_num = extraction_stats['html_counter_number']
+                        counter_text = extraction_stats['html_counter_text']
+                        print(f"        • HTML Counter: {counter_num} schools ('{counter_text}')")
+                        
+                        # Compare with our extraction
+                        our_count = len(schools_data)
+                        if counter_num == our_count:
+                            print(f"        ✅ Perfect match: HTML counter = extracted schools = {our_count}!")
+                        else:
+                            diff = abs(counter_num - our_count)
+                            print(f"        ⚠️  Count difference: HTML shows {counter_num}, we extracted {our_count} (diff: {diff})")
+                    else:
+                        print(f"        ⚠️  HTML Counter: Not found")
+                    
+                    print(f"    🎉 TOTAL SCHOOLS: {len(schools_data)} from {municipality_name}!")
+                    
+                    if best is None or len(schools_data) > len(best[0]):
+                        best = (schools_data, extraction_stats, content_hash)
+                    
+                    counter_num = extraction_stats['html_counter_number']
+                    if (counter_num is not None and len(best[0]) < counter_num
+                            and refetches < context.completeness_refetches):
+                        refetches += 1
+                        print(f"    📏 Incomplete: {len(best[0])}/{counter_num} schools, re-fetching with a "
+                              f"longer readiness window ({refetches}/{context.completeness_refetches})")
+                        continue
+                    
+                    if best[0] is not schools_data:
+                        print(f"    📏 Keeping the best attempt: {len(best[0])} schools")
+                    return finish(*best)
+                else:
+                    print(f"    ⚠️  No schools found in CDATA/map data (attempt {attempt + 1}/{max_retries})")
+                    # Log page details for debugging
+                    page_length = len(page_source) if page_source else 0
+                    print(f"    🔍 Page source length: {page_length}, Contains markers: {has_marker}")
+                    print(f"    🔍 Dropdown schools found: {extraction_stats.get('total_dropdown_schools', 0)}")
+                    failed('no_schools' if has_marker else 'no_markers')
+                    
+                    # A complete HTTP response without markers will not change on retry
+                    if engine == 'http' and not has_marker:
                         break
-                
-                # If no exact match, try partial matching for programs
-                if not program_matched:
-                    for lookup_program, lookup_data in dropdown_data['programs_lookup'].items():
-                        lookup_normalized = lookup_program.upper().strip()
-                        # Only match if the modality is a significant substring
-                        if (len(modality_normalized) > 3 and modality_normalized in lookup_normalized) or \
-                           (len(lookup_normalized) > 3 and lookup_normalized in modality_normalized):
-                            matched_program_ids.append(lookup_data['program_id'])
-                            matched_program_names.append(lookup_data['program_name'])
-                            break
-        
-        enhanced_school['modality_ids'] = ','.join(matched_modality_ids) if matched_modality_ids else None
-        enhanced_school['modality_labels'] = ','.join(matched_modality_names) if matched_modality_names else None
-        enhanced_school['program_ids'] = ','.join(matched_program_ids) if matched_program_ids else None
-        enhanced_school['program_labels'] = ','.join(matched_program_names) if matched_program_names else None
-        
-        enhanced_schools.append(enhanced_school)
+                    
+            except (TimeoutException, requests.Timeout) as e:
+                print(f"    ⏰ Timeout waiting for page to load (attempt {attempt + 1}/{max_retries})")
+                print(f"    🔍 Timeout details: {str(e)[:100]}...")
+                failed('timeout')
+            except Exception as e:
+                print(f"    ❌ Unexpected error (attempt {attempt + 1}/{max_retries}): {type(e).__name__}: {str(e)[:100]}...")
+                if isinstance(e, StalePageError):
+                    failed('stale_page')
+                elif isinstance(e, WebDriverException):
+                    failed('driver_crash')
+                elif isinstance(e, requests.RequestException):
+                    failed('http_error')
+                else:
+                    failed('error')
+            
+            if attempt < max_retries - 1:
+                wait_time = context.pacer.retry_delay(attempt)
+                print(f"    ⏳ Waiting {wait_time:.1f} seconds before retry...")
+                context.pacer.wait(wait_time)
     
-    return enhanced_schools, extraction_stats
+    if best is not None:
+        print(f"    📏 Keeping the best attempt: {len(best[0])} schools")
+        return finish(*best)
+    
+    # Enhanced failure reporting: what actually went wrong on each attempt
+    print(f"    💥 FAILED: {municipality_name} after {attempts} attempts")
+    print(f"    🔍 Municipality ID: {municipality_id}, Department ID: {dept_id}")
+    kinds = context.failures.get((dept_id, municipality_id), Counter())
+    print(f"    📋 Failures: {describe_failures(kinds)}")
+    for kind in kinds:
+        print(f"        - {kind}: {FAILURE_KINDS[kind]}")
+    return None
+
 
+def describe_failures(kinds):
+    """Short form of a failure kind Counter, most frequent first (e.g. 'timeout ×3, no_markers ×1')"""
+    if not kinds:
+        return 'none recorded'
+    return ', '.join(f"{kind} ×{count}" for kind, count in kinds.most_common())
 
-def scrape_municipality(department_name, municipality_name, municipality_id, max_retries=5):
+
+def print_failure_summary(context, failed_tasks):
     """
-    Scrape all schools from a specific municipality with enhanced metadata.
+    Print the failure taxonomy of municipalities that failed for good.
     
     Args:
-        department_name (str): Name of the department
-        municipality_name (str): Name of the municipality  
-        municipality_id (int): Municipality ID
+        context (ScraperContext): Run context with failure records
+        failed_tasks (list): (department_name, municipality_name, municipality_id) tuples
+    """
+    if not failed_tasks:
+        return
+    
+    totals = Counter()
+    by_reason = {}
+    for department_name, municipality_name, municipality_id in failed_tasks:
+        kinds = context.failures.get((DEPARTMENTS[department_name]['id'], municipality_id), Counter())
+        totals.update(kinds)
+        reason = kinds.most_common(1)[0][0] if kinds else 'unknown'
+        by_reason.setdefault(reason, []).append(
+            f"{department_name} - {municipality_name} ({describe_failures(kinds)})")
+    
+    print(f"\n⚠️  Failed municipalities ({len(failed_tasks)}), by main failure:")
+    for reason, names in sorted(by_reason.items(), key=lambda item: -len(item[1])):
+        print(f"    {reason} — {FAILURE_KINDS.get(reason, 'no attempt recorded')} ({len(names)}):")
+        for name in names:
+            print(f"        - {name}")
+    print(f"📋 Failed attempts by kind: {describe_failures(totals)}")
+
+
+def print_completeness_summary(context, keys=None):
+    """
+    Print how the extracted school counts compare with the HTML counters.
+    
+    Args:
+        context (ScraperContext): Run context with completeness records
+        keys (iterable): (dep_id, mun_id) pairs to report; all recorded ones if None
+    """
+    records = context.completeness
+    if keys is not None:
+        records = {key: records[key] for key in keys if key in records}
+    if not records:
+        return
+    
+    names = {(d['id'], mun_id): f"{dept} - {mun}" for dept, d in DEPARTMENTS.items()
+             for mun, mun_id in d['municipalities'].items()}
+    incomplete = {key: r for key, r in records.items() if not r['complete']}
+    refetched = sum(1 for r in records.values() if r['attempts'] > 1)
+    
+    print(f"\n📏 Completeness: {len(records) - len(incomplete)}/{len(records)} municipalities match "
+          f"their HTML counter ({refetched} re-fetched)")
+    for key, r in incomplete.items():
+        print(f"    - {names.get(key, key)}: {r['extracted']}/{r['counter']} schools "
+              f"after {r['attempts']} fetches")
+
+
+def run_municipality_task(task, context, max_retries=5):
+    """
+    Scrape one municipality and commit the outcome to the run journal, if any.
+
+    Runs in the worker thread, so a finished municipality is durable as soon
+    as it completes, not when its turn comes in the ordered output. In resume
+    mode, municipalities already in the journal are read back instead.
+
+    Args:
+        task (tuple): (department_name, municipality_name, municipality_id)
+        context (ScraperContext): Run context
         max_retries (int): Maximum number of retry attempts
-        
+
     Returns:
-        list: List of school dictionaries with enhanced data
+        list: School records, None on failure, or UNCHANGED (see scrape_municipality)
     """
+    department_name, municipality_name, municipality_id = task
     dept_id = DEPARTMENTS[department_name]['id']
-    
-    for attempt in range(max_retries):
-        driver = create_stealth_driver()
-        if not driver:
-            print(f"    ❌ Failed to create driver (attempt {attempt + 1}/{max_retries})")
-            continue
-        
+    journal = context.journal
+
+    if journal is not None and context.resume and journal.is_completed(dept_id, municipality_id):
+        print(f"    ⏭️  {municipality_name} already committed in the journal, skipping")
+        return journal.load_rows(dept_id, municipality_id)
+
+    schools = scrape_municipality(department_name, municipality_name, municipality_id,
+                                  max_retries=max_retries, context=context)
+
+    if journal is not None and schools is not UNCHANGED:
+        if schools:
+            journal.commit(dept_id, municipality_id, department_name, municipality_name, schools)
+        elif not schools:
+            journal.commit_failure(dept_id, municipality_id, department_name, municipality_name,
+                                   reason=context.failure_reason(dept_id, municipality_id))
+
+    return schools
+
+
+def _run_tasks(tasks, context, max_retries):
+    """Run municipality tasks serially or on the worker pool; yield (task, schools) in task order"""
+    if context.workers <= 1:
+        for task in tasks:
+            yield task, run_municipality_task(task, context, max_retries)
+        return
+
+    # Longest tasks are submitted first; results are still yielded in task order
+    scheduler = context.scheduler
+    submit_order = tasks
+    if scheduler is not None:
+        submit_order = scheduler.order(tasks)
+        predicted = scheduler.predict(submit_order)
+        print(f"📐 Longest-first schedule: predicted makespan {format_duration(predicted)} "
+              f"({format_duration(scheduler.predict(tasks))} in list order) on {context.workers} workers")
+
+    start = time.perf_counter()
+    durations = {}
+    finished = []
+
+    def timed_task(task):
+        task_start = time.perf_counter()
         try:
-            print(f"    🔧 FIXED scraping approach for: {municipality_name}")
-            
-            # Navigate to the education map
-            human_like_navigation(driver, "https://serviciosenlinea.mined.gob.ni/", "main website")
-            human_like_navigation(driver, "https://serviciosenlinea.mined.gob.ni/mapa-de-la-educacion/", "education map")
-            
-            # Navigate to department
-            department_url = f"https://serviciosenlinea.mined.gob.ni/mapa-de-la-educacion/Departamento.aspx?Departamento={dept_id}"
-            human_like_navigation(driver, department_url, f"department {department_name}")
-            
-            # Navigate to municipality
-            municipality_url = f"https://serviciosenlinea.mined.gob.ni/mapa-de-la-educacion/Georreferencia.aspx?Municipio={municipality_id}"
-            human_like_navigation(driver, municipality_url, f"municipality {municipality_name}")
-            
-            # Wait for map data to load
-            print("    🗺️  Waiting for map data to load...")
-            WebDriverWait(driver, 45).until(lambda d: "L.marker" in d.page_source)
-            
-            time.sleep(3)  # Extra time for all content to load
-            print("    ✅ Map data loaded successfully!")
-            
-            # Extract all data
-            schools_data, extraction_stats = get_school_data_from_page_source(driver.page_source)
-            
-            if schools_data:
-                print(f"    📋 COMPLETE DATA EXTRACTION:")
-                print(f"        • Schools from CDATA/map: {extraction_stats['total_cdata_schools']} (primary source)")
-                print(f"        • Schools in dropdown: {extraction_stats['total_dropdown_schools']} (for ID matching)")
-                print(f"        • Map markers with coords: {extraction_stats['total_map_markers']}")
-                print(f"        • Schools with coordinates: {extraction_stats['schools_with_coords']}")
-                print(f"        • Schools missing coordinates: {extraction_stats['schools_missing_coords']}")
-                print(f"        • Modalities available: {len(extraction_stats['modalities_lookup'])}")
-                print(f"        • Programs available: {len(extraction_stats['programs_lookup'])}")
-                
-                # Display HTML counter information
-                if extraction_stats['html_counter_found']:
-                    counter_num = extraction_stats['html_counter_number']
-                    counter_text = extraction_stats['html_counter_text']
-                    print(f"        • HTML Counter: {counter_num} schools ('{counter_text}')")
-                    
-                    # Compare with our extraction
-                    our_count = len(schools_data)
-                    if counter_num == our_count:
-                        print(f"        ✅ Perfect match: HTML counter = extracted schools = {our_count}!")
-                    else:
-                        diff = abs(counter_num - our_count)
-                        print(f"        ⚠️  Count difference: HTML shows {counter_num}, we extracted {our_count} (diff: {diff})")
-                else:
-                    print(f"        ⚠️  HTML Counter: Not found")
-                
-                print(f"    🎉 TOTAL SCHOOLS: {len(schools_data)} from {municipality_name}!")
-                
-                # Add department and municipality info
-                for school in schools_data:
-                    school['department'] = department_name
-                    school['municipality'] = municipality_name
-                    school['dep_id'] = dept_id
-                    school['mun_id'] = municipality_id
-                
-                return schools_data
-            else:
-                print(f"    ⚠️  No schools found in CDATA/map data (attempt {attempt + 1}/{max_retries})")
-                # Log page details for debugging
-                page_length = len(driver.page_source) if driver.page_source else 0
-                has_marker = "L.marker" in driver.page_source if driver.page_source else False
-                print(f"    🔍 Page source length: {page_length}, Contains markers: {has_marker}")
-                print(f"    🔍 Dropdown schools found: {extraction_stats.get('total_dropdown_schools', 0)}")
-                
-        except TimeoutException as e:
-            print(f"    ⏰ Timeout waiting for page to load (attempt {attempt + 1}/{max_retries})")
-            print(f"    🔍 Timeout details: {str(e)[:100]}...")
-        except Exception as e:
-            print(f"    ❌ Unexpected error (attempt {attempt + 1}/{max_retries}): {type(e).__name__}: {str(e)[:100]}...")
+            return run_municipality_task(task, context, max_retries)
         finally:
-            if driver:
-                driver.quit()
-        
-        if attempt < max_retries - 1:
-            wait_time = random.uniform(15, 25)  # Increased wait time
-            print(f"    ⏳ Waiting {wait_time:.1f} seconds before retry...")
-            time.sleep(wait_time)
+            now = time.perf_counter()
+            durations[task] = now - task_start
+            finished.append(now)
+            if scheduler is not None:
+                scheduler.record(task, now - task_start)
+
+    # Without a schedule tasks are submitted in yield order, a window ahead of
+    # the one being yielded, so finished results do not pile up behind a slow
+    # task. A longest-first schedule is submitted whole; results that finish
+    # ahead of their turn in task order are held until then.
+    window = len(tasks) if scheduler is not None else 2 * context.workers
+    executor = ThreadPoolExecutor(max_workers=context.workers, thread_name_prefix='scraper')
+    try:
+        futures = {}
+        submitted = 0
+        for i, task in enumerate(tasks):
+            while submitted < min(len(submit_order), i + window):
+                futures[submit_order[submitted]] = executor.submit(timed_task, submit_order[submitted])
+                submitted += 1
+            try:
+                schools = futures.pop(task).result()
+            except Exception as e:
+                print(f"    ❌ Worker error for {task[1]}: {type(e).__name__}: {str(e)[:100]}...")
+                schools = None
+            yield task, schools
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if scheduler is not None and finished:
+        scheduler.report(predicted, max(finished) - start, tasks, durations)
+
+
+def iter_municipality_results(tasks, context=None, max_retries=5):
+    """
+    Scrape municipality tasks and yield their results in task order.
+
+    With context.workers > 1 the tasks run concurrently on isolated drivers or
+    HTTP sessions, but results are still yielded in the order of `tasks`, so
+    output stays ordered by department and municipality whichever task
+    finishes first.
+
+    Each task first gets context.first_pass_attempts attempts. Tasks that
+    fail are yielded with None and pushed to a deferred retry queue; once
+    every task has been yielded, the queue is retried with the remaining
+    attempts and those tasks are yielded a second time, in task order.
+    Callers should let a later result for a task replace an earlier one.
+
+    Args:
+        tasks (list): (department_name, municipality_name, municipality_id) tuples
+        context (ScraperContext): Run context
+        max_retries (int): Maximum number of attempts per municipality
+
+    Yields:
+        tuple: (task, schools) where schools is a list, None on failure or UNCHANGED
+    """
+    context = context or ScraperContext()
+    first_pass = min(context.first_pass_attempts, max_retries)
+
+    deferred = []
+    for task, schools in _run_tasks(tasks, context, first_pass):
+        if schools is not UNCHANGED and not schools:
+            deferred.append(task)
+        yield task, schools
+
+    if not deferred or first_pass >= max_retries:
+        return
+
+    # The server has had the rest of the run to recover before these are retried
+    print(f"\n🔁 DEFERRED RETRIES: {len(deferred)} municipalities, "
+          f"up to {max_retries - first_pass} more attempts each")
+    print("=" * 60)
+    pause = context.pacer.retry_delay(0)
+    print(f"⏳ Waiting {pause:.1f} seconds before the deferred retries...")
+    context.pacer.wait(pause)
+    for task, schools in _run_tasks(deferred, context, max_retries - first_pass):
+        print(f"    {'✅ Recovered' if schools else '❌ Still failing'}: {task[0]} - {task[1]}")
+        yield task, schools
+
+
+def iter_schools(departments=None, municipalities=None, engine='selenium', context=None,
+                 on_event=None, max_retries=5, **context_options):
+    """
+    Library API: yield school records one at a time, as each municipality is parsed.
+
+    Memory stays bounded by the records of the municipalities in flight (two
+    per worker); with a longest-first schedule (see scheduling.py), results
+    that finish before their turn in task order are held until then. Nothing
+    is written to disk. Per-municipality stats are reported through
+    `on_event` instead of being mixed into the records.
+
+    Args:
+        departments (list): Department names to scrape (default: all)
+        municipalities (list): Municipality names or IDs to keep within those
+            departments (default: all)
+        engine (str): 'selenium' or 'http'; ignored when a context is given
+        context (ScraperContext): Run context; by default one is created from
+            engine and context_options and closed when the generator finishes
+        on_event (callable): Called with one dict per event:
+            {'event': 'start', 'municipalities': N} before the first fetch,
+            {'event': 'municipality', 'department', 'municipality', 'dep_id',
+            'mun_id', 'status', 'schools', 'failures', 'completeness'} after
+            each municipality, where status is 'ok', 'unchanged', 'deferred'
+            (failed, retried at the end) or 'failed', and
+            {'event': 'finish', 'schools', 'ok', 'unchanged', 'failed'} at the end
+        max_retries (int): Maximum number of attempts per municipality
+        **context_options: Extra ScraperContext arguments (workers, pacer, ...)
+
+    Yields:
+        dict: School record with the OUTPUT_COLUMNS fields
+
+    Example:
+        >>> for school in iter_schools(['Boaco'], engine='http', on_event=print):
+        ...     store.insert(school)
+    """
+    departments = list(departments or DEPARTMENTS)
+    unknown = [name for name in departments if name not in DEPARTMENTS]
+    if unknown:
+        raise ValueError(f"Unknown departments: {', '.join(unknown)}")
+    wanted = {str(m) for m in municipalities} if municipalities is not None else None
+    tasks = [(department_name, municipality_name, municipality_id)
+             for department_name in departments
+             for municipality_name, municipality_id in DEPARTMENTS[department_name]['municipalities'].items()
+             if wanted is None or municipality_name in wanted or str(municipality_id) in wanted]
     
-    # Enhanced failure reporting
-    print(f"    💥 FAILED: {municipality_name} after {max_retries} attempts")
-    print(f"    🔍 Municipality ID: {municipality_id}, Department ID: {dept_id}")
-    print(f"    📋 Possible reasons:")
-    print(f"        - Network connectivity issues")
-    print(f"        - Website temporarily unavailable")
-    print(f"        - No schools registered in this municipality")
-    print(f"        - Municipality data not yet available online")
-    print(f"        - Browser/driver compatibility issues")
-    return None
+    def emit(event):
+        if on_event is not None:
+            on_event(event)
+    
+    owns_context = context is None
+    context = context or ScraperContext(engine=engine, **context_options)
+    retried = min(context.first_pass_attempts, max_retries) < max_retries
+    totals = Counter()
+    seen = set()
+    try:
+        emit({'event': 'start', 'municipalities': len(tasks)})
+        for task, schools in iter_municipality_results(tasks, context, max_retries):
+            department_name, municipality_name, municipality_id = task
+            dept_id = DEPARTMENTS[department_name]['id']
+            if schools is UNCHANGED:
+                status = 'unchanged'
+            elif schools:
+                status = 'ok'
+            else:
+                status = 'deferred' if retried and task not in seen else 'failed'
+            seen.add(task)
+            if status != 'deferred':
+                totals[status] += 1
+            
+            if status == 'ok':
+                for school in schools:
+                    totals['schools'] += 1
+                    yield school
+            
+            emit({
+                'event': 'municipality',
+                'department': department_name,
+                'municipality': municipality_name,
+                'dep_id': dept_id,
+                'mun_id': municipality_id,
+                'status': status,
+                'schools': len(schools) if status == 'ok' else 0,
+                'failures': dict(context.failures.get((dept_id, municipality_id), {})),
+                'completeness': context.completeness.get((dept_id, municipality_id)),
+            })
+        emit({'event': 'finish', 'schools': totals['schools'], 'ok': totals['ok'],
+              'unchanged': totals['unchanged'], 'failed': totals['failed']})
+    finally:
+        if owns_context:
+            context.close()
 
 
-def scrape_department(department_name, output_dir="data/raw"):
+def scrape_department(department_name, output_dir="data/raw", context=None):
     """
     Scrape all municipalities in a department.
     
     Args:
         department_name (str): Name of the department to scrape
         output_dir (str): Directory to save output files
+        context (ScraperContext): Run context (engine, sessions)
         
     Returns:
         bool: True if successful, False otherwise
@@ -928,71 +2787,85 @@ def scrape_department(department_name, output_dir="data/raw"):
         print(f"Available departments: {', '.join(DEPARTMENTS.keys())}")
         return False
     
+    context = context or ScraperContext()
+    
     print(f"\n🏛️  SCRAPING DEPARTMENT: {department_name.upper()}")
     print("=" * 60)
     
     department_data = DEPARTMENTS[department_name]
     municipalities = department_data['municipalities']
-    all_schools = []
+    total_schools = 0
     failed_municipalities = []  # Track failed municipalities
     
     total_municipalities = len(municipalities)
     
-    for i, (municipality_name, municipality_id) in enumerate(municipalities.items(), 1):
-        print(f"\n📍 Municipality {i}/{total_municipalities}: {municipality_name}")
-        print("-" * 40)
-        
-        schools = scrape_municipality(department_name, municipality_name, municipality_id, max_retries=5)
-        
-        if schools:
-            all_schools.extend(schools)
-            print(f"    ✅ Successfully scraped {len(schools)} schools from {municipality_name}")
-        else:
-            failed_municipalities.append(municipality_name)
-            print(f"    ❌ Failed to scrape {municipality_name}")
-        
-        # Progress update
-        print(f"    📊 Total schools collected so far: {len(all_schools)}")
-        
-        # Save partial results periodically
-        if len(all_schools) > 0 and i % 3 == 0:
-            partial_file = os.path.join(output_dir, f"partial_{department_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
-            df_partial = pd.DataFrame(all_schools)
-            df_partial.to_csv(partial_file, index=False, encoding='utf-8')
-            print(f"    💾 Saved partial results to: {partial_file}")
-    
-    # Save final results
-    if all_schools:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        final_file = os.path.join(output_dir, f"nicaragua_schools_{department_name}_{timestamp}.csv")
-        
-        df_final = pd.DataFrame(all_schools)
-        df_final.to_csv(final_file, index=False, encoding='utf-8')
+    # Rows are appended to the output file as each municipality finishes
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_base = os.path.join(output_dir, f"nicaragua_schools_{department_name}_{timestamp}")
+    sink = create_sink(context.output_format, output_base, OUTPUT_COLUMNS)
+    
+    tasks = [(department_name, name, mun_id) for name, mun_id in municipalities.items()]
+    results = iter_municipality_results(tasks, context)
+    
+    with sink:
+        for i, (municipality_name, municipality_id) in enumerate(municipalities.items(), 1):
+            print(f"\n📍 Municipality {i}/{total_municipalities}: {municipality_name}")
+            print("-" * 40)
+            
+            task, schools = next(results)
+            
+            if schools is UNCHANGED:
+                print(f"    💤 {municipality_name} unchanged since last fetch, nothing to write")
+            elif schools:
+                sink.write(schools)
+                total_schools += len(schools)
+                print(f"    ✅ Successfully scraped {len(schools)} schools from {municipality_name}")
+            else:
+                failed_municipalities.append(task)
+                print(f"    ❌ Failed to scrape {municipality_name}, deferred for retry")
+            
+            # Progress update
+            print(f"    📊 Total schools collected so far: {total_schools}")
+            print(f"    ⏱️  Pacing {context.pacer.describe()}")
         
+        # Deferred retries of the failed municipalities; their rows go at the end of the file
+        for task, schools in results:
+            if schools is not UNCHANGED and schools:
+                sink.write(schools)
+                total_schools += len(schools)
+                failed_municipalities.remove(task)
+    
+    print_completeness_summary(context, [(department_data['id'], mun_id) for mun_id in municipalities.values()])
+    context.catalog.save(f"{output_base}_catalog.json")
+    
+    # Final results are already on disk
+    if total_schools:
         print(f"\n🎉 DEPARTMENT {department_name.upper()} COMPLETED!")
-        print(f"📊 Total schools scraped: {len(all_schools)}")
-        print(f"💾 Final results saved to: {final_file}")
+        print(f"📊 Total schools scraped: {total_schools}")
+        print(f"💾 Final results saved to: {sink.path}")
         
         # Show failed municipalities summary if any
-        if failed_municipalities:
-            print(f"\n⚠️  Failed municipalities in {department_name} ({len(failed_municipalities)}):")
-            for failed_mun in failed_municipalities:
-                print(f"    - {failed_mun}")
+        print_failure_summary(context, failed_municipalities)
         
         return True
     else:
         print(f"\n❌ No schools collected from {department_name}")
-        if failed_municipalities:
-            print(f"⚠️  All municipalities failed: {', '.join(failed_municipalities)}")
+        print_failure_summary(context, failed_municipalities)
         return False
 
 
-def scrape_all_departments(output_dir="data/raw"):
+def scrape_all_departments(output_dir="data/raw", context=None):
     """
     Scrape all departments in Nicaragua and save to a single combined file.
     
+    Each finished municipality is committed to a journal
+    (scrape_journal.jsonl in output_dir). With context.resume, municipalities
+    already committed are skipped, and the final CSV is streamed from the
+    journal.
+    
     Args:
         output_dir (str): Directory to save output files
+        context (ScraperContext): Run context (engine, sessions)
         
     Returns:
         bool: True if at least one department was successful
@@ -1001,13 +2874,28 @@ def scrape_all_departments(output_dir="data/raw"):
     print("=" * 70)
     
     os.makedirs(output_dir, exist_ok=True)
+    context = context or ScraperContext()
     
-    all_schools_complete = []
-    successful_departments = []
-    failed_departments = []
-    failed_municipalities = []  # Track failed municipalities
+    if context.journal is None:
+        context.journal = RunJournal(os.path.join(output_dir, 'scrape_journal.jsonl'), resume=context.resume)
+    journal = context.journal
+    resumed = journal.completed() if context.resume else set()
+    if resumed:
+        print(f"📒 Resuming: {len(resumed)} municipalities already committed in {journal.path}")
+    
+    total_schools = 0
+    department_schools_counts = {}
+    failed_municipalities = []  # Failed tasks, until the deferred retries recover them
     
     total_departments = len(DEPARTMENTS)
+    parallel = context.workers > 1
+    
+    # Results arrive in DEPARTMENTS order; in parallel mode the tasks of later
+    # departments are already running while earlier ones are being reported
+    tasks = [(department_name, municipality_name, municipality_id)
+             for department_name, department_data in DEPARTMENTS.items()
+             for municipality_name, municipality_id in department_data['municipalities'].items()]
+    results = iter_municipality_results(tasks, context)
     
     for i, department_name in enumerate(DEPARTMENTS.keys(), 1):
         print(f"\n🏛️  DEPARTMENT {i}/{total_departments}: {department_name.upper()}")
@@ -1016,7 +2904,7 @@ def scrape_all_departments(output_dir="data/raw"):
         # Scrape individual department
         department_data = DEPARTMENTS[department_name]
         municipalities = department_data['municipalities']
-        department_schools = []
+        department_schools = 0
         
         total_municipalities = len(municipalities)
         
@@ -1024,50 +2912,63 @@ def scrape_all_departments(output_dir="data/raw"):
             print(f"\n📍 Municipality {j}/{total_municipalities}: {municipality_name}")
             print("-" * 40)
             
-            schools = scrape_municipality(department_name, municipality_name, municipality_id, max_retries=5)
+            task, schools = next(results)
             
-            if schools:
-                department_schools.extend(schools)
-                all_schools_complete.extend(schools)
+            if schools is UNCHANGED:
+                print(f"    💤 {municipality_name} unchanged since last fetch, nothing to write")
+            elif schools:
+                department_schools += len(schools)
+                total_schools += len(schools)
                 print(f"    ✅ Successfully scraped {len(schools)} schools from {municipality_name}")
             else:
-                failed_municipalities.append(f"{department_name} - {municipality_name}")
-                print(f"    ❌ Failed to scrape {municipality_name}")
+                failed_municipalities.append(task)
+                print(f"    ❌ Failed to scrape {municipality_name}, deferred for retry")
             
             # Progress update
-            print(f"    📊 Total schools collected so far: {len(all_schools_complete)}")
+            print(f"    📊 Total schools collected so far: {total_schools}")
+            print(f"    ⏱️  Pacing {context.pacer.describe()}")
         
+        department_schools_counts[department_name] = department_schools
         if department_schools:
-            successful_departments.append(department_name)
-            print(f"    ✅ {department_name} completed successfully ({len(department_schools)} schools)")
+            print(f"    ✅ {department_name} completed successfully ({department_schools} schools)")
         else:
-            failed_departments.append(department_name)
-            print(f"    ❌ {department_name} failed")
+            print(f"    ❌ {department_name} failed, pending deferred retries")
         
-        # Save progress after each department
-        if all_schools_complete:
-            timestamp = datetime.now().strftime("%y%m%d")
-            progress_file = os.path.join(output_dir, f"nicaraguan_schools_{timestamp}_progress.csv")
-            df_progress = pd.DataFrame(all_schools_complete)
-            df_progress.to_csv(progress_file, index=False, encoding='utf-8')
-            print(f"    💾 Progress saved: {len(all_schools_complete)} schools in {progress_file}")
+        # Progress is already durable: every municipality was committed to the journal
+        print(f"    📒 Journal: {len(journal.completed())} municipalities committed in {journal.path}")
         
-        # Brief pause between departments
-        if i < total_departments:
-            print(f"\n⏳ Pausing briefly before next department...")
-            time.sleep(random.uniform(30, 60))
+        # Brief pause between departments (parallel runs are paced by the host request cap)
+        fully_resumed = all((department_data['id'], mun_id) in resumed for mun_id in municipalities.values())
+        if i < total_departments and not parallel and not fully_resumed:
+            pause = context.pacer.department_pause()
+            print(f"\n⏳ Pausing {pause:.0f} seconds before next department...")
+            context.pacer.wait(pause)
+    
+    # Deferred retries of every failed municipality, once the whole country has been tried
+    for task, schools in results:
+        if schools is not UNCHANGED and schools:
+            department_schools_counts[task[0]] += len(schools)
+            total_schools += len(schools)
+            failed_municipalities.remove(task)
     
-    # Save final complete file
-    if all_schools_complete:
+    successful_departments = [name for name, count in department_schools_counts.items() if count]
+    failed_departments = [name for name, count in department_schools_counts.items() if not count]
+    
+    # Save final complete file, streamed from the journal in DEPARTMENTS order
+    if total_schools:
         timestamp = datetime.now().strftime("%y%m%d")
-        final_file = os.path.join(output_dir, f"nicaraguan_schools_{timestamp}.csv")
-        
-        df_final = pd.DataFrame(all_schools_complete)
-        df_final.to_csv(final_file, index=False, encoding='utf-8')
+        order = [(DEPARTMENTS[task[0]]['id'], task[2]) for task in tasks]
+        output_base = os.path.join(output_dir, f"nicaraguan_schools_{timestamp}")
+        with create_sink(context.output_format, output_base, OUTPUT_COLUMNS) as sink:
+            written = journal.export(sink, order)
+        context.catalog.save(f"{output_base}_catalog.json")
+        # Refreshes patch the national CSV; fetches recorded for another format stay uncommitted
+        if context.freshness is not None and context.output_format == 'csv':
+            context.freshness.commit()
         
         print(f"\n🎉 COMPLETE SCRAPING FINISHED!")
-        print(f"📊 Total schools collected: {len(all_schools_complete)}")
-        print(f"💾 Final file saved: {final_file}")
+        print(f"📊 Total schools collected: {written}")
+        print(f"💾 Final file saved: {sink.path}")
     
     # Final summary
     print(f"\n🎯 SCRAPING SUMMARY")
@@ -1075,21 +2976,356 @@ def scrape_all_departments(output_dir="data/raw"):
     print(f"✅ Successful departments ({len(successful_departments)}): {', '.join(successful_departments)}")
     if failed_departments:
         print(f"❌ Failed departments ({len(failed_departments)}): {', '.join(failed_departments)}")
-    if failed_municipalities:
-        print(f"\n⚠️  Failed municipalities ({len(failed_municipalities)}):")
-        for failed_mun in failed_municipalities:
-            print(f"    - {failed_mun}")
-        print(f"\n📋 Possible reasons for municipality failures:")
-        print(f"    • Network connectivity issues during scraping")
-        print(f"    • Website temporarily unavailable or overloaded")
-        print(f"    • No schools currently registered in these municipalities")
-        print(f"    • Municipality data not yet available in the online system")
-        print(f"    • Browser/driver compatibility issues")
-        print(f"    • Rate limiting or anti-bot measures")
+    print_completeness_summary(context)
+    print_failure_summary(context, failed_municipalities)
     
     return len(successful_departments) > 0
 
 
+def find_latest_national_csv(output_dir="data/raw"):
+    """Newest national CSV (nicaraguan_schools_<date>.csv) in output_dir, or None"""
+    pattern = re.compile(r'^nicaraguan_schools_\d{6}\.csv$')
+    candidates = [os.path.join(output_dir, name) for name in os.listdir(output_dir) if pattern.match(name)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def refresh_dataset(output_dir="data/raw", context=None, ttl_hours=24, previous_csv=None):
+    """
+    Incrementally refresh a national CSV.
+
+    Municipalities fetched within ttl_hours are skipped. The rest are
+    fetched, but only pages whose marker/CDATA hash changed are re-parsed,
+    and only their rows are replaced in the previous national CSV. Rows of
+    skipped, unchanged or failed municipalities are kept as they were.
+    
+    Args:
+        output_dir (str): Directory holding the national CSV and freshness.json
+        context (ScraperContext): Run context
+        ttl_hours (float): Skip municipalities fetched less than this many hours ago
+        previous_csv (str): National CSV to patch (default: newest in output_dir)
+        
+    Returns:
+        bool: True if the CSV was refreshed
+    """
+    previous_csv = previous_csv or find_latest_national_csv(output_dir)
+    if not previous_csv or not os.path.exists(previous_csv):
+        print(f"❌ No previous national CSV found in {output_dir}; run a full scrape first")
+        return False
+    
+    context = context or ScraperContext()
+    if context.freshness is None:
+        context.freshness = FreshnessStore(os.path.join(output_dir, 'freshness.json'))
+    context.refresh = True
+    
+    print(f"\n🔄 INCREMENTAL REFRESH OF {previous_csv} (TTL {ttl_hours:g}h)")
+    print("=" * 70)
+    
+    # Read everything as text so untouched rows are written back byte for byte
+    previous = pd.read_csv(previous_csv, dtype=str, keep_default_na=False, encoding='utf-8')
+    previous_rows = {key: rows for key, rows in previous.groupby(['dep_id', 'mun_id'], sort=False)}
+    
+    tasks = []
+    skipped = []
+    for department_name, department_data in DEPARTMENTS.items():
+        for municipality_name, municipality_id in department_data['municipalities'].items():
+            if context.freshness.is_fresh(department_data['id'], municipality_id, ttl_hours):
+                skipped.append(municipality_name)
+            else:
+                tasks.append((department_name, municipality_name, municipality_id))
+    
+    print(f"⏭️  {len(skipped)} municipalities within TTL, {len(tasks)} to check")
+    
+    # A deferred retry yields a task again; its later result replaces the earlier one
+    outcomes = dict(iter_municipality_results(tasks, context))
+    
+    updated_rows = {}
+    unchanged = []
+    changed = []
+    failed = []
+    for (department_name, municipality_name, municipality_id), schools in outcomes.items():
+        if schools is UNCHANGED:
+            unchanged.append(municipality_name)
+        elif schools:
+            key = (str(DEPARTMENTS[department_name]['id']), str(municipality_id))
+            updated_rows[key] = pd.DataFrame(schools, columns=previous.columns).fillna('').astype(str)
+            changed.append(municipality_name)
+        else:
+            failed.append((department_name, municipality_name, municipality_id))
+    
+    if updated_rows:
+        # Splice the re-parsed municipalities into the previous rows, in DEPARTMENTS order
+        blocks = []
+        for department_name, department_data in DEPARTMENTS.items():
+            for municipality_name, municipality_id in department_data['municipalities'].items():
+                key = (str(department_data['id']), str(municipality_id))
+                block = updated_rows.pop(key, None)
+                if block is None:
+                    block = previous_rows.pop(key, None)
+                else:
+                    previous_rows.pop(key, None)
+                if block is not None:
+                    blocks.append(block)
+        blocks.extend(previous_rows.values())  # rows for municipalities not in DEPARTMENTS
+        
+        tmp_file = f"{previous_csv}.tmp"
+        pd.concat(blocks, ignore_index=True).to_csv(tmp_file, index=False, encoding='utf-8')
+        os.replace(tmp_file, previous_csv)
+    
+    # Only now that the patched rows are in place may the next refresh trust the new hashes
+    context.freshness.commit()
+    
+    print(f"\n🎯 REFRESH SUMMARY")
+    print("=" * 50)
+    print(f"⏭️  Skipped (fresh): {len(skipped)}")
+    print(f"💤 Unchanged: {len(unchanged)}")
+    print(f"🔁 Re-parsed and patched: {len(changed)}")
+    if failed:
+        print_failure_summary(context, failed)
+        print(f"📄 Previous rows kept for the {len(failed)} failed municipalities")
+    if changed:
+        print(f"💾 Patched file: {previous_csv}")
+    
+    return True
+
+
+def replay_archive(archive_dir, output_dir="data/raw", output_format='csv'):
+    """
+    Re-derive the national dataset from archived pages, without a browser.
+
+    Runs get_school_data_from_page_source over the latest snapshot of every
+    municipality in the archive and streams the records into a combined file.
+    
+    Args:
+        archive_dir (str): Snapshot archive directory (see snapshot_archive.py)
+        output_dir (str): Directory to save the replayed file
+        output_format (str): csv, jsonl or parquet
+        
+    Returns:
+        bool: True if any schools were extracted
+    """
+    print(f"\n📼 REPLAYING SNAPSHOT ARCHIVE: {archive_dir}")
+    print("=" * 70)
+    
+    archive = SnapshotArchive(archive_dir)
+    latest = archive.latest_entries()
+    if not latest:
+        print(f"❌ No snapshots found in {archive_dir}")
+        return False
+    
+    start = time.perf_counter()
+    missing_municipalities = []
+    empty_municipalities = []
+    
+    timestamp = datetime.now().strftime("%y%m%d")
+    output_base = os.path.join(output_dir, f"nicaraguan_schools_{timestamp}_replay")
+    sink = create_sink(output_format, output_base, OUTPUT_COLUMNS)
+    catalog_cache = CatalogCache()
+    
+    with sink:
+        for department_name, department_data in DEPARTMENTS.items():
+            for municipality_name, municipality_id in department_data['municipalities'].items():
+                entry = latest.get((department_data['id'], municipality_id))
+                if entry is None:
+                    missing_municipalities.append(f"{department_name} - {municipality_name}")
+                    continue
+                
+                print(f"\n📍 {department_name} - {municipality_name} (snapshot {entry['timestamp']}, {entry['sha256'][:12]})")
+                schools_data, _ = get_school_data_from_page_source(archive.load(entry['sha256']), catalog_cache)
+                if schools_data:
+                    sink.write(add_location_info(schools_data, department_name, municipality_name, municipality_id))
+                else:
+                    empty_municipalities.append(f"{department_name} - {municipality_name}")
+    
+    elapsed = time.perf_counter() - start
+    catalog_cache.save(f"{output_base}_catalog.json")
+    
+    print(f"\n🎯 REPLAY SUMMARY")
+    print("=" * 50)
+    print(f"📊 Schools extracted: {sink.rows_written} from {len(latest)} snapshots in {elapsed:.1f} seconds")
+    print(f"📚 Catalog cache: {catalog_cache.describe()}")
+    if missing_municipalities:
+        print(f"⚠️  Municipalities without snapshots ({len(missing_municipalities)}):")
+        for name in missing_municipalities:
+            print(f"    - {name}")
+    if empty_municipalities:
+        print(f"⚠️  Snapshots with no schools extracted ({len(empty_municipalities)}):")
+        for name in empty_municipalities:
+            print(f"    - {name}")
+    
+    if not sink.rows_written:
+        return False
+    
+    print(f"💾 Replayed file saved: {sink.path}")
+    return True
+
+
+def create_work_queue(queue_path, departments=None, history=None, max_attempts=3):
+    """
+    Coordinator: fill a shared work queue with municipality tasks.
+
+    Running it again on an existing queue adds missing tasks, gives failed
+    tasks a new set of attempts and leaves done and leased tasks alone.
+
+    Args:
+        queue_path (str): SQLite queue file (see work_queue.py)
+        departments (list): Department names to queue (default: all)
+        history (str): Previous output CSV; larger municipalities are leased first
+        max_attempts (int): Leases per task before it is marked failed
+
+    Returns:
+        WorkQueue: The populated queue
+    """
+    work_queue = WorkQueue(queue_path, max_attempts=max_attempts)
+    tasks = [(DEPARTMENTS[department_name]['id'], municipality_id, department_name, municipality_name)
+             for department_name in (departments or DEPARTMENTS)
+             for municipality_name, municipality_id in DEPARTMENTS[department_name]['municipalities'].items()]
+    weights = load_school_counts(history) if history else None
+    
+    added = work_queue.populate(tasks, weights)
+    reset = work_queue.reset_failed()
+    print(f"🗃️  Work queue {queue_path}: {added} tasks added, {reset} failed tasks reset")
+    print(f"    {work_queue.describe()}")
+    return work_queue
+
+
+def run_queue_worker(queue_path, context=None, lease_seconds=600, poll_interval=30, max_attempts=3):
+    """
+    Worker: lease municipality tasks from a shared work queue until it is drained.
+
+    Runs context.workers lease loops in this process. A heartbeat thread
+    renews the leases held by the process every lease_seconds / 3, so a
+    lease only expires if the process or its host dies. Each lease scrapes
+    the municipality with context.first_pass_attempts attempts; a task that
+    fails goes back to the queue behind the untried ones.
+
+    Args:
+        queue_path (str): SQLite queue file created by create_work_queue
+        context (ScraperContext): Run context
+        lease_seconds (float): Lease length; expired leases are reclaimed by other workers
+        poll_interval (float): Seconds to wait for leased tasks of other workers
+            to finish or come back to the queue
+        max_attempts (int): Leases per task before it is marked failed
+
+    Returns:
+        dict: Tasks committed and failed by this process
+    """
+    context = context or ScraperContext()
+    work_queue = WorkQueue(queue_path, max_attempts=max_attempts)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    held = set()
+    held_lock = threading.Lock()
+    stop = threading.Event()
+    stats = Counter()
+    
+    print(f"\n👷 QUEUE WORKER {owner}: {context.workers} lease loops on {queue_path}")
+    print(f"    {work_queue.describe()}")
+    print("=" * 60)
+    
+    def heartbeat_loop():
+        while not stop.wait(lease_seconds / 3):
+            with held_lock:
+                leases = list(held)
+            try:
+                renewed = work_queue.heartbeat(owner, leases, lease_seconds)
+            except sqlite3.Error as e:
+                print(f"    ⚠️  Heartbeat failed: {e}")
+                continue
+            if renewed < len(leases):
+                print(f"    ⚠️  {len(leases) - renewed} leases expired before their heartbeat")
+    
+    def lease_loop():
+        while not stop.is_set():
+            task = work_queue.lease(owner, lease_seconds)
+            if task is None:
+                if not work_queue.has_open_tasks():
+                    return
+                stop.wait(poll_interval)  # other workers hold the remaining tasks
+                continue
+            
+            dept_id, municipality_id = task['dep_id'], task['mun_id']
+            department_name, municipality_name = task['department'], task['municipality']
+            print(f"\n📍 {department_name} - {municipality_name} (lease {task['attempts']}/{max_attempts})")
+            print("-" * 40)
+            with held_lock:
+                held.add((dept_id, municipality_id))
+            try:
+                schools = scrape_municipality(department_name, municipality_name, municipality_id,
+                                              max_retries=context.first_pass_attempts, context=context)
+            except Exception as e:
+                print(f"    ❌ Worker error for {municipality_name}: {type(e).__name__}: {str(e)[:100]}...")
+                context.record_failure(dept_id, municipality_id, 'error')
+                schools = None
+            finally:
+                with held_lock:
+                    held.discard((dept_id, municipality_id))
+            
+            if schools:
+                if work_queue.commit(owner, dept_id, municipality_id, schools):
+                    stats['committed'] += 1
+                    print(f"    ✅ Committed {len(schools)} schools from {municipality_name}")
+                else:
+                    print(f"    ⏭️  {municipality_name} was already committed by another worker")
+            else:
+                status = work_queue.commit_failure(owner, dept_id, municipality_id,
+                                                   reason=context.failure_reason(dept_id, municipality_id))
+                stats['failed'] += 1
+                print(f"    ❌ Failed to scrape {municipality_name}, task is now {status}")
+    
+    heartbeat = threading.Thread(target=heartbeat_loop, name='queue-heartbeat', daemon=True)
+    heartbeat.start()
+    loops = [threading.Thread(target=lease_loop, name=f'queue-worker-{i}') for i in range(context.workers)]
+    try:
+        for loop in loops:
+            loop.start()
+        for loop in loops:
+            loop.join()
+    finally:
+        stop.set()
+        for loop in loops:
+            if loop.is_alive():
+                loop.join()
+        heartbeat.join()
+    
+    print(f"\n👷 Worker {owner} finished: {stats['committed']} committed, {stats['failed']} failed attempts")
+    print(f"    Queue: {work_queue.describe()}")
+    return dict(stats)
+
+
+def merge_work_queue(queue_path, output_dir="data/raw", output_format='csv'):
+    """
+    Write the national file from the rows committed to a work queue.
+
+    Args:
+        queue_path (str): SQLite queue file
+        output_dir (str): Directory for nicaraguan_schools_<date>
+        output_format (str): csv, jsonl or parquet
+
+    Returns:
+        bool: True if any rows were written
+    """
+    work_queue = WorkQueue(queue_path)
+    print(f"\n🧩 MERGING WORK QUEUE {queue_path}")
+    print(f"    {work_queue.describe()}")
+    
+    timestamp = datetime.now().strftime("%y%m%d")
+    with create_sink(output_format, os.path.join(output_dir, f"nicaraguan_schools_{timestamp}"),
+                     OUTPUT_COLUMNS) as sink:
+        written = work_queue.export(sink)
+    
+    unfinished = work_queue.unfinished()
+    if unfinished:
+        print(f"\n⚠️  Municipalities missing from the merge ({len(unfinished)}):")
+        for task in unfinished:
+            print(f"    - {task['department']} - {task['municipality']}: {task['status']} after "
+                  f"{task['attempts']} leases ({task['reason'] or 'no failure recorded'})")
+    
+    if not written:
+        return False
+    print(f"📊 Total schools merged: {written}")
+    print(f"💾 Final file saved: {sink.path}")
+    return True
+
+
 def main():
     """Main function with command line interface."""
     parser = argparse.ArgumentParser(
@@ -1101,6 +3337,17 @@ Examples:
   python main_scraper.py --all              # Scrape all departments  
   python main_scraper.py --dept Managua     # Scrape specific department
   python main_scraper.py --dept Boaco --output custom_folder
+  python main_scraper.py --all --engine http      # Browserless fetch, Selenium fallback
+  python main_scraper.py --all --workers 4 --max-host-requests 2
+  python main_scraper.py --all --tabs 6                # Six tabs in one Chrome process
+  python main_scraper.py --all --resume                # Continue a crashed national run
+  python main_scraper.py --dept Boaco --format parquet  # Stream output as Parquet parts
+  python main_scraper.py --all --archive data/archive   # Keep raw pages for replay
+  python main_scraper.py --replay data/archive          # Re-parse archived pages offline
+  python main_scraper.py --refresh --ttl 24 --engine http  # Patch the latest national CSV
+  python main_scraper.py --coordinator                 # Queue every municipality in work_queue.sqlite
+  python main_scraper.py --worker --engine http        # Lease tasks (run on any number of hosts)
+  python main_scraper.py --merge                       # National file from the queue
         """
     )
     
@@ -1110,83 +3357,210 @@ Examples:
                        help='Scrape specific department')
     parser.add_argument('--output', type=str, default='data/raw',
                        help='Output directory (default: data/raw)')
+    parser.add_argument('--engine', choices=ENGINES, default='selenium',
+                       help='Page fetch engine: selenium (full browser) or http (raw HTML, '
+                            'falls back to selenium) (default: selenium)')
+    parser.add_argument('--extraction', choices=EXTRACTIONS, default='js',
+                       help='Selenium engine: read markers and dropdowns with in-page JavaScript (js) '
+                            'or parse the serialized page source (html); --archive implies html '
+                            '(default: js)')
+    parser.add_argument('--capture', choices=CAPTURES, default='dom',
+                       help='Selenium engine: take the page from the rendered DOM, or capture the raw '
+                            'Georreferencia response from the network without waiting for the map '
+                            'to render (default: dom)')
+    parser.add_argument('--no-block-assets', action='store_true',
+                       help='Selenium engine: load map tiles, fonts, stylesheets and images '
+                            'instead of blocking them')
+    parser.add_argument('--allow-url', action='append', default=[], metavar='PATTERN',
+                       help='Selenium engine: never block URLs matching PATTERN (wildcard "*"; '
+                            'can be repeated)')
+    parser.add_argument('--no-fallback', action='store_true',
+                       help='With --engine http, do not fall back to selenium')
+    parser.add_argument('--recycle-after', type=int, default=25, metavar='N',
+                       help='Restart a Chrome instance after N municipality pages; 1 uses a '
+                            'fresh browser per municipality (default: 25)')
+    parser.add_argument('--max-driver-rss', type=int, default=1500, metavar='MB',
+                       help='Restart a Chrome instance once it uses more than MB of memory '
+                            '(requires psutil, default: 1500)')
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                       help='Scrape N municipalities concurrently, each on its own driver '
+                            'or HTTP session (default: 1)')
+    parser.add_argument('--tabs', type=int, default=0, metavar='N',
+                       help='Selenium engine: scrape N municipalities at once as tabs of a single '
+                            'Chrome process instead of one browser per worker (default: off)')
+    parser.add_argument('--completeness-refetches', type=int, default=2, metavar='N',
+                       help='Re-fetch a municipality up to N times, with a longer readiness window, '
+                            'while fewer schools than its HTML counter are extracted (default: 2)')
+    parser.add_argument('--max-host-requests', type=int, default=2, metavar='N',
+                       help='Global cap on concurrent page loads against the MINED host (default: 2)')
+    parser.add_argument('--archive', type=str, metavar='DIR',
+                       help='Keep every received municipality page in a compressed snapshot archive')
+    parser.add_argument('--replay', type=str, metavar='DIR',
+                       help='Rebuild the dataset from a snapshot archive without scraping')
+    parser.add_argument('--refresh', action='store_true',
+                       help='Incrementally refresh the latest national CSV in the output directory')
+    parser.add_argument('--ttl', type=float, default=24, metavar='HOURS',
+                       help='With --refresh, skip municipalities fetched within HOURS (default: 24)')
+    parser.add_argument('--previous', type=str, metavar='CSV',
+                       help='With --refresh, the national CSV to patch (default: newest in output)')
+    parser.add_argument('--resume', action='store_true',
+                       help='With --all, continue from scrape_journal.jsonl in the output directory, '
+                            'skipping municipalities already committed')
+    parser.add_argument('--format', choices=list(SINKS), default='csv', dest='output_format',
+                       help='Output format: csv, jsonl, or parquet (a directory of part files, '
+                            'requires pyarrow); --refresh always patches the CSV (default: csv)')
+    parser.add_argument('--pacing', choices=list(pacing.PACERS), default='fixed',
+                       help='Request pacing: fixed random sleeps, or aimd/token-bucket which adapt '
+                            'to server latency, timeouts and errors (default: fixed)')
+    parser.add_argument('--first-pass-attempts', type=int, default=2, metavar='N',
+                       help='Attempts per municipality before it is deferred; failed municipalities '
+                            'get the rest of their 5 attempts after all others (default: 2)')
+    parser.add_argument('--no-circuit-breaker', action='store_true',
+                       help='Do not pause all workers after a burst of timeouts')
+    parser.add_argument('--history', type=str, metavar='CSV',
+                       help='With --workers/--tabs, start the largest municipalities first, sized by '
+                            'their school counts in CSV (default: newest national CSV in the output '
+                            'directory, if any)')
+    parser.add_argument('--no-schedule', action='store_true',
+                       help='Submit parallel tasks in department order instead of longest-first')
+    parser.add_argument('--coordinator', action='store_true',
+                       help='Fill the shared work queue with every municipality (or those of --dept); '
+                            'rerun to re-queue failed tasks')
+    parser.add_argument('--worker', action='store_true',
+                       help='Lease and scrape municipalities from the shared work queue until it is '
+                            'drained; --workers sets the lease loops per process')
+    parser.add_argument('--merge', action='store_true',
+                       help='Write the national file from the rows committed to the work queue')
+    parser.add_argument('--queue', type=str, metavar='FILE',
+                       help='Shared SQLite work queue (default: work_queue.sqlite in the output directory)')
+    parser.add_argument('--lease', type=float, default=600, metavar='SECONDS',
+                       help='Work queue lease length; leases are renewed by heartbeats and reclaimed '
+                            'once they expire (default: 600)')
+    parser.add_argument('--max-attempts', type=int, default=3, metavar='N',
+                       help='Work queue leases per municipality before it is marked failed (default: 3)')
     
     args = parser.parse_args()
     
     # Create output directory
     os.makedirs(args.output, exist_ok=True)
     
-    print("🇳🇮 Nicaragua Schools Scraper - Complete Edition")
-    print("Author: Rony Rodriguez")
-    print("=" * 60)
+    history = None
+    if (max(args.workers, args.tabs) > 1 or args.coordinator) and not args.no_schedule:
+        history = args.history or find_latest_national_csv(args.output)
+        if history:
+            print(f"📐 Scheduling longest municipalities first, by school counts in {history}")
+    queue_path = args.queue or os.path.join(args.output, 'work_queue.sqlite')
     
-    if args.all:
-        print("🚀 Starting complete scraping of all departments...")
-        success = scrape_all_departments(args.output)
-        if success:
-            print("\n🎉 Scraping completed! Check the output directory for results.")
-        else:
-            print("\n❌ Scraping failed. Check the logs for details.")
-            
-    elif args.dept:
-        if args.dept not in DEPARTMENTS:
-            print(f"❌ Unknown department: {args.dept}")
-            print(f"Available departments: {', '.join(DEPARTMENTS.keys())}")
-            return
+    context = ScraperContext(engine=args.engine, selenium_fallback=not args.no_fallback,
+                             driver_pages=args.recycle_after, driver_max_rss_mb=args.max_driver_rss,
+                             workers=args.workers, max_host_requests=args.max_host_requests,
+                             pacer=args.pacing, archive=args.archive,
+                             # freshness.json is rewritten whole; queue workers on other hosts would race on it
+                             freshness=None if args.worker else os.path.join(args.output, 'freshness.json'),
+                             resume=args.resume, output_format=args.output_format,
+                             extraction=args.extraction, capture=args.capture,
+                             block_assets=not args.no_block_assets, allowed_urls=args.allow_url,
+                             tabs=args.tabs, completeness_refetches=args.completeness_refetches,
+                             circuit_breaker=not args.no_circuit_breaker,
+                             first_pass_attempts=args.first_pass_attempts, history=history)
+    
+    try:
+        print("🇳🇮 Nicaragua Schools Scraper - Complete Edition")
+        print("Author: Rony Rodriguez")
+        print("=" * 60)
         
-        print(f"🚀 Starting scraping of {args.dept} department...")
-        success = scrape_department(args.dept, args.output)
-        if success:
-            print(f"\n🎉 {args.dept} scraping completed!")
-        else:
-            print(f"\n❌ {args.dept} scraping failed.")
+        if args.replay:
+            success = replay_archive(args.replay, args.output, args.output_format)
+            if not success:
+                print("\n❌ Replay produced no schools.")
+                
+        elif args.coordinator or args.worker or args.merge:
+            if args.dept and args.dept not in DEPARTMENTS:
+                print(f"❌ Unknown department: {args.dept}")
+                print(f"Available departments: {', '.join(DEPARTMENTS.keys())}")
+                return
+            if args.coordinator:
+                create_work_queue(queue_path, [args.dept] if args.dept else None, history=history,
+                                  max_attempts=args.max_attempts)
+            if args.worker:
+                run_queue_worker(queue_path, context, lease_seconds=args.lease, max_attempts=args.max_attempts)
+            if args.merge and not merge_work_queue(queue_path, args.output, args.output_format):
+                print("\n❌ The work queue has no committed schools yet.")
+                
+        elif args.refresh:
+            success = refresh_dataset(args.output, context, ttl_hours=args.ttl, previous_csv=args.previous)
+            if not success:
+                print("\n❌ Refresh failed.")
+                
+        elif args.all:
+            print("🚀 Starting complete scraping of all departments...")
+            success = scrape_all_departments(args.output, context)
+            if success:
+                print("\n🎉 Scraping completed! Check the output directory for results.")
+            else:
+                print("\n❌ Scraping failed. Check the logs for details.")
+                
+        elif args.dept:
+            if args.dept not in DEPARTMENTS:
+                print(f"❌ Unknown department: {args.dept}")
+                print(f"Available departments: {', '.join(DEPARTMENTS.keys())}")
+                return
             
-    else:
-        # Interactive mode
-        print("\n🤖 Interactive Mode")
-        print("Choose an option:")
-        print("1. Scrape all departments")
-        print("2. Scrape specific department")
-        print("3. Exit")
-        
-        choice = input("\nEnter your choice (1-3): ").strip()
-        
-        if choice == '1':
-            confirm = input("This will scrape ALL departments. Continue? (y/N): ").strip().lower()
-            if confirm == 'y':
-                success = scrape_all_departments(args.output)
-                if success:
-                    print("\n🎉 Complete scraping finished!")
-                else:
-                    print("\n❌ Scraping failed.")
+            print(f"🚀 Starting scraping of {args.dept} department...")
+            success = scrape_department(args.dept, args.output, context)
+            if success:
+                print(f"\n🎉 {args.dept} scraping completed!")
             else:
-                print("Cancelled.")
+                print(f"\n❌ {args.dept} scraping failed.")
                 
-        elif choice == '2':
-            print(f"\nAvailable departments:")
-            for i, dept in enumerate(DEPARTMENTS.keys(), 1):
-                print(f"{i:2d}. {dept}")
+        else:
+            # Interactive mode
+            print("\n🤖 Interactive Mode")
+            print("Choose an option:")
+            print("1. Scrape all departments")
+            print("2. Scrape specific department")
+            print("3. Exit")
             
-            try:
-                dept_choice = int(input(f"\nEnter department number (1-{len(DEPARTMENTS)}): "))
-                dept_names = list(DEPARTMENTS.keys())
-                if 1 <= dept_choice <= len(dept_names):
-                    selected_dept = dept_names[dept_choice - 1]
-                    print(f"\n🚀 Starting scraping of {selected_dept}...")
-                    success = scrape_department(selected_dept, args.output)
+            choice = input("\nEnter your choice (1-3): ").strip()
+            
+            if choice == '1':
+                confirm = input("This will scrape ALL departments. Continue? (y/N): ").strip().lower()
+                if confirm == 'y':
+                    success = scrape_all_departments(args.output, context)
                     if success:
-                        print(f"\n🎉 {selected_dept} scraping completed!")
+                        print("\n🎉 Complete scraping finished!")
                     else:
-                        print(f"\n❌ {selected_dept} scraping failed.")
+                        print("\n❌ Scraping failed.")
                 else:
-                    print("Invalid department number.")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
+                    print("Cancelled.")
+                    
+            elif choice == '2':
+                print(f"\nAvailable departments:")
+                for i, dept in enumerate(DEPARTMENTS.keys(), 1):
+                    print(f"{i:2d}. {dept}")
                 
-        elif choice == '3':
-            print("Goodbye! 👋")
-        else:
-            print("Invalid choice.")
+                try:
+                    dept_choice = int(input(f"\nEnter department number (1-{len(DEPARTMENTS)}): "))
+                    dept_names = list(DEPARTMENTS.keys())
+                    if 1 <= dept_choice <= len(dept_names):
+                        selected_dept = dept_names[dept_choice - 1]
+                        print(f"\n🚀 Starting scraping of {selected_dept}...")
+                        success = scrape_department(selected_dept, args.output, context)
+                        if success:
+                            print(f"\n🎉 {selected_dept} scraping completed!")
+                        else:
+                            print(f"\n❌ {selected_dept} scraping failed.")
+                    else:
+                        print("Invalid department number.")
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+                    
+            elif choice == '3':
+                print("Goodbye! 👋")
+            else:
+                print("Invalid choice.")
+    finally:
+        context.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+Substring Index for Matching Map Names to Marker Popups
+
+A school name from the map's CDATA section that is not an exact key of the
+marker data is matched to the first marker (in page order) whose name
+contains it or is contained in it, compared in upper case without
+surrounding spaces. Scanning every marker for every such school is
+O(schools x markers) per municipality. This module indexes the marker names
+once per page, so each lookup costs about the length of the name instead:
+
+- marker names contained in the query are found by hashing the query's
+  substrings, for the name lengths present only;
+- marker names containing the query are found through trigram posting
+  lists, verifying the candidates of the query's rarest trigram in page
+  order.
+
+The first match is the same one the linear scan returns.
+"""
+
+from collections import defaultdict
+
+NGRAM = 3
+
+
+def normalize_name(name):
+    """Name as compared by the partial matching"""
+    return name.upper().strip()
+
+
+class NameIndex:
+    """Marker names indexed for first-match containment lookups"""
+
+    def __init__(self, names):
+        """
+        Args:
+            names (iterable): Marker names (coordinate_data keys) in page order
+        """
+        self.names = list(names)
+        self.by_name = {}                  # normalized name -> first position
+        self.lengths = set()               # lengths of the normalized names
+        self.postings = defaultdict(list)  # trigram -> positions of names containing it, ascending
+        self.normalized = []
+        for position, name in enumerate(self.names):
+            key = normalize_name(name)
+            self.normalized.append(key)
+            self.by_name.setdefault(key, position)
+            self.lengths.add(len(key))
+            grams = {key[i:i + NGRAM] for i in range(len(key) - NGRAM + 1)}
+            for gram in grams:
+                self.postings[gram].append(position)
+        self.lengths = sorted(self.lengths)
+
+    def _first_contained_in(self, query):
+        """Position of the first marker name that is a substring of query"""
+        best = None
+        for length in self.lengths:
+            if length > len(query):
+                break
+            for start in range(len(query) - length + 1):
+                position = self.by_name.get(query[start:start + length])
+                if position is not None and (best is None or position < best):
+                    best = position
+                    if best == 0:
+                        return best
+        return best
+
+    def _first_containing(self, query):
+        """Position of the first marker name that has query as a substring"""
+        grams = {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+        if not grams:
+            # Too short for the trigram index (never the case for CDATA names)
+            return next((position for position, key in enumerate(self.normalized) if query in key), None)
+        candidates = min((self.postings.get(gram, ()) for gram in grams), key=len)
+        return next((position for position in candidates if query in self.normalized[position]), None)
+
+    def find(self, name):
+        """
+        First marker name that contains the name or is contained in it.
+
+        Returns:
+            str: The marker name (coordinate_data key), or None
+        """
+        query = normalize_name(name)
+        matches = [position for position in (self._first_contained_in(query), self._first_containing(query))
+                   if position is not None]
+        return self.names[min(matches)] if matches else None
+
+
+def linear_find(names, name):
+    """The unindexed first-match scan NameIndex.find reproduces (kept for differential checks)"""
+    query = normalize_name(name)
+    for candidate in names:
+        key = normalize_name(candidate)
+        if query in key or key in query:
+            return candidate
+    return None
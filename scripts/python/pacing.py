@@ -0,0 +1,321 @@
+"""
+Request Pacing Controllers for the Nicaragua Schools Scraper
+
+This module decides how long the scraper waits before each page load, after
+a failed attempt and between departments. The fixed pacer keeps the original
+random sleeps; the adaptive pacers react to the latency, timeouts and errors
+observed against the MINED server, speeding up while it is healthy and
+backing off when it struggles. The circuit breaker pauses every worker after
+a burst of timeouts.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+# Outcomes reported to the pacers
+OK = 'ok'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+
+
+class Pacer:
+    """Base pacer: shared bookkeeping and the metrics interface"""
+
+    name = 'base'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latency_ewma = None
+        self.total_wait = 0.0
+
+    # --- delays -----------------------------------------------------------
+    def request_delay(self):
+        """Seconds to wait before the next page load"""
+        raise NotImplementedError
+
+    def reading_time(self):
+        """Seconds to linger on a page after it loads"""
+        raise NotImplementedError
+
+    def retry_delay(self, attempt):
+        """Seconds to wait after failed attempt number `attempt` (0-based)"""
+        raise NotImplementedError
+
+    def department_pause(self):
+        """Seconds to pause between departments in serial runs"""
+        raise NotImplementedError
+
+    def wait(self, seconds):
+        """Sleep and account for the time spent waiting"""
+        if seconds > 0:
+            time.sleep(seconds)
+            with self._lock:
+                self.total_wait += seconds
+        return seconds
+
+    # --- feedback ---------------------------------------------------------
+    def record(self, outcome, latency=None):
+        """Report the outcome of a page load"""
+        with self._lock:
+            self.requests += 1
+            if outcome == TIMEOUT:
+                self.timeouts += 1
+            elif outcome == ERROR:
+                self.errors += 1
+            if latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            self._adjust(outcome, latency)
+
+    def _adjust(self, outcome, latency):
+        """Update the pacing state; called with the lock held"""
+
+    @property
+    def current_delay(self):
+        raise NotImplementedError
+
+    def metrics(self):
+        """Current rate, delay and counters"""
+        delay = self.current_delay
+        return {
+            'pacer': self.name,
+            'delay_s': round(delay, 3),
+            'rate_per_min': round(60.0 / delay, 2) if delay > 0 else None,
+            'requests': self.requests,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'latency_ewma_s': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            'total_wait_s': round(self.total_wait, 1),
+        }
+
+    def describe(self):
+        """One-line summary for progress output"""
+        m = self.metrics()
+        latency = f"{m['latency_ewma_s']:.2f}s" if m['latency_ewma_s'] is not None else "n/a"
+        return (f"{m['pacer']}: delay {m['delay_s']:.2f}s, {m['rate_per_min']} req/min, "
+                f"latency {latency}, {m['timeouts']} timeouts, {m['errors']} errors")
+
+
+class FixedPacer(Pacer):
+    """The original random sleeps, regardless of how the server behaves"""
+
+    name = 'fixed'
+
+    def request_delay(self):
+        return random.uniform(1.5, 3.5)
+
+    def reading_time(self):
+        return random.uniform(2.0, 5.0)
+
+    def retry_delay(self, attempt):
+        return random.uniform(15, 25)
+
+    def department_pause(self):
+        return random.uniform(30, 60)
+
+    @property
+    def current_delay(self):
+        return 2.5
+
+
+class AIMDPacer(Pacer):
+    """
+    Additive-increase / multiplicative-decrease on the request rate.
+
+    Every healthy response (fast and successful) adds `increase` requests per
+    second to the rate; a timeout, error or response slower than
+    `slow_latency` multiplies it by `backoff`. Requests from all workers are
+    spaced on one shared schedule.
+    """
+
+    name = 'aimd'
+
+    def __init__(self, initial_delay=2.5, min_delay=0.5, max_delay=60.0,
+                 increase=0.02, backoff=0.5, slow_latency=8.0):
+        super().__init__()
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.increase = increase
+        self.backoff = backoff
+        self.slow_latency = slow_latency
+        self.rate = 1.0 / initial_delay
+        self._next_slot = 0.0
+
+    @property
+    def current_delay(self):
+        return min(self.max_delay, max(self.min_delay, 1.0 / self.rate))
+
+    def _adjust(self, outcome, latency):
+        healthy = outcome == OK and (latency is None or latency <= self.slow_latency)
+        if healthy:
+            self.rate += self.increase
+        else:
+            self.rate *= self.backoff
+        # Keep the rate inside the delay bounds so recovery is not unbounded
+        self.rate = min(1.0 / self.min_delay, max(1.0 / self.max_delay, self.rate))
+
+    def request_delay(self):
+        jittered = self.current_delay * random.uniform(0.8, 1.2)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + jittered
+        return start - now
+
+    def reading_time(self):
+        return random.uniform(0, 0.5) * self.current_delay
+
+    def retry_delay(self, attempt):
+        return min(self.max_delay, self.current_delay * (2 ** (attempt + 1))) * random.uniform(0.8, 1.2)
+
+    def department_pause(self):
+        return min(self.max_delay, self.current_delay * 5) * random.uniform(0.8, 1.2)
+
+
+class TokenBucketPacer(Pacer):
+    """
+    Token bucket whose refill rate follows the recent error rate.
+
+    Requests spend one token; tokens refill at `rate` per second up to
+    `burst`. Over the last `window` outcomes, an error/timeout share above
+    `max_error_rate` halves the rate, while a clean window with latency under
+    `target_latency` raises it by 10%.
+    """
+
+    name = 'token-bucket'
+
+    def __init__(self, rate=0.4, burst=3, min_rate=1 / 60.0, max_rate=2.0,
+                 target_latency=4.0, max_error_rate=0.2, window=20):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.recent = deque(maxlen=window)
+        self.tokens = float(burst)
+        self._refilled_at = time.monotonic()
+
+    @property
+    def current_delay(self):
+        return 1.0 / self.rate
+
+    def _adjust(self, outcome, latency):
+        self.recent.append(outcome)
+        failures = sum(1 for o in self.recent if o != OK)
+        if failures / len(self.recent) > self.max_error_rate or outcome == TIMEOUT:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self.recent.clear()
+        elif failures == 0 and (self.latency_ewma or 0) <= self.target_latency:
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+    def request_delay(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            # Reserve a token; a negative balance is the caller's wait
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def reading_time(self):
+        return random.uniform(0, 0.5) * self.current_delay
+
+    def retry_delay(self, attempt):
+        return min(120.0, self.current_delay * (2 ** (attempt + 1))) * random.uniform(0.8, 1.2)
+
+    def department_pause(self):
+        return min(120.0, self.current_delay * 5) * random.uniform(0.8, 1.2)
+
+
+class CircuitBreaker:
+    """
+    Host-level circuit breaker shared by all workers.
+
+    `threshold` timeouts within `window` seconds open the breaker: every
+    worker waits for `cooldown` seconds before its next page load instead of
+    each one retrying against a struggling server. The first result after a
+    cooldown decides: a success closes the breaker and resets the cooldown,
+    another timeout reopens it with the cooldown doubled (up to `max_cooldown`).
+    """
+
+    def __init__(self, threshold=4, window=120.0, cooldown=60.0, max_cooldown=600.0):
+        self._lock = threading.Lock()
+        self.threshold = threshold
+        self.window = window
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.timeouts = deque()
+        self.open_until = 0.0
+        self.half_open = False
+        self.trips = 0
+        self.total_paused = 0.0
+
+    @property
+    def is_open(self):
+        return time.monotonic() < self.open_until
+
+    def wait(self):
+        """Block while the breaker is open; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                if waited:
+                    with self._lock:
+                        self.total_paused += waited
+                return waited
+            time.sleep(remaining)
+            waited += remaining
+
+    def record(self, outcome):
+        """Report the outcome of a page load"""
+        with self._lock:
+            now = time.monotonic()
+            if outcome == TIMEOUT:
+                self.timeouts.append(now)
+                while self.timeouts and now - self.timeouts[0] > self.window:
+                    self.timeouts.popleft()
+                if self.half_open or len(self.timeouts) >= self.threshold:
+                    self._trip(now)
+            elif outcome == OK and self.half_open and now >= self.open_until:
+                self.half_open = False
+                self.cooldown = self.base_cooldown
+
+    def _trip(self, now):
+        """Open the breaker; called with the lock held"""
+        if now < self.open_until:
+            return  # already open; late timeouts from the same burst do not extend it
+        self.open_until = now + self.cooldown
+        self.trips += 1
+        print(f"    🚦 Circuit breaker open: {len(self.timeouts)} timeouts, pausing all workers "
+              f"for {self.cooldown:.0f}s")
+        self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+        self.half_open = True
+        self.timeouts.clear()
+
+    def describe(self):
+        """One-line summary for progress output"""
+        state = 'open' if self.is_open else ('half-open' if self.half_open else 'closed')
+        return f"{state}, {self.trips} trips, {self.total_paused:.0f}s paused"
+
+
+PACERS = {
+    FixedPacer.name: FixedPacer,
+    AIMDPacer.name: AIMDPacer,
+    TokenBucketPacer.name: TokenBucketPacer,
+}
+
+
+def create_pacer(name='fixed', **kwargs):
+    """Create a pacer by name (fixed, aimd or token-bucket)"""
+    if name not in PACERS:
+        raise ValueError(f"Unknown pacer: {name} (choose from {', '.join(PACERS)})")
+    return PACERS[name](**kwargs)
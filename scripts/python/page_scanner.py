@@ -0,0 +1,485 @@
+"""
+Single-Pass Scanner for Georreferencia Pages
+
+The legacy page parser makes many passes over a municipality page: a
+BeautifulSoup tree for three <select> elements, up to five counter regexes,
+the marker regex, the CDATA regex and two Nombre: patterns. This module walks
+the page once with a single anchor regex and, at each anchor, runs the legacy
+pattern at that position only (with pos/endpos), which reproduces the
+legacy leftmost, non-overlapping matches exactly:
+
+    L.marker([                  marker coordinates and popup
+    //<![CDATA[                 the 'var osmUrl =' script holding the map
+    Nombre:                     school names inside that script
+    ContentPlaceHolder_H1Contador   the school counter
+    <                           markup, including the three <select> dropdowns
+
+Dropdown options are read without building a tree, so the markup is only
+accepted in the plain form ASP.NET renders: every tag outside scripts,
+styles and comments must be well formed (quoted or simple attribute values,
+no stray '<![' or '<?'), and the dropdowns must hold <option> elements with
+text and known character references. Then html.parser tokenizes the page the
+same way and the options are exactly the ones BeautifulSoup finds. Anything
+else makes scan_page return None and the caller falls back to the legacy
+parser.
+
+The legacy patterns with lazy '.*?' parts (the marker, the counter
+fallbacks, the CDATA sections) scan to the end of the page for every
+candidate that does not match, which goes quadratic on truncated or
+malformed pages. Both parsers use the bounded scanners below instead: they
+return the same matches as those patterns, except that a marker's popup is
+only searched for up to the next L.marker([ call, and every character is
+looked at a bounded number of times (linear worst-case time).
+"""
+
+import html
+import re
+
+# The three dropdowns read by the parser, by the name suffix used in their attributes
+DROPDOWNS = ('ddlCentroEducativo', 'ddlModalidad', 'ddlPrograma')
+DROPDOWN_NAME_PREFIX = 'ctl00$ContentPlaceHolder1$'
+
+TEXT_ANCHORS = (
+    r'(?P<marker>L\.marker\(\[)'
+    r'|(?P<cdata>//<!\[CDATA\[)'
+    r'|(?P<nombre>(?i:nombre:))'
+    r'|(?P<counter>(?i:ContentPlaceHolder_H1Contador))'
+)
+# Inside scripts, styles and comments only the text anchors matter. The
+# lookahead on the first characters lets the regex engine skip plain text fast.
+RAW_ANCHORS = re.compile(r'(?=[L/nNcC])(?:' + TEXT_ANCHORS + ')')
+ANCHORS = re.compile(r'(?=[L/nNcC<])(?:' + TEXT_ANCHORS + r'|(?P<tag><))')
+TAG_ANCHORS = re.compile(r'(?P<tag><)')
+
+# Legacy patterns, matched at an anchor position instead of searched for
+NOMBRE_BOLD = re.compile(r'<b>Nombre:</b>\s*([^<]+)', re.IGNORECASE)
+NOMBRE_PLAIN = re.compile(r'Nombre:\s*([^\n\r,<]+)', re.IGNORECASE)
+
+# Pieces of the bounded scanners
+MARKER_HEAD = 'L.marker(['
+POPUP_HEAD = ".bindPopup('"
+POPUP_END = "');"
+CDATA_HEAD = '//<![CDATA['
+CDATA_END = '//]]>'
+OSM_HEAD = re.compile(r'\s*var osmUrl\s*=')
+COUNTER_ID = re.compile('ContentPlaceHolder_H1Contador', re.IGNORECASE)
+COUNTER_SHORT_ID = re.compile('H1Contador', re.IGNORECASE)
+PLACEHOLDER = re.compile('ContentPlaceHolder', re.IGNORECASE)
+H1 = re.compile('H1', re.IGNORECASE)
+CONTADOR = re.compile('contador', re.IGNORECASE)
+ID_OPEN = re.compile('id=["\']', re.IGNORECASE)
+CLASS_OPEN = re.compile('class=["\']', re.IGNORECASE)
+QUOTE = re.compile('["\']')
+
+# Strict markup accepted outside raw text; quoted values may not contain '<'
+START_TAG = re.compile(r'<([a-zA-Z][-a-zA-Z0-9:_.]*)'
+                       r'(?:\s+[^\s"\'<>/=]+(?:\s*=\s*(?:"[^"<]*"|\'[^\'<]*\'|[^\s"\'=<>`]+))?)*\s*/?>')
+END_TAG = re.compile(r'</[a-zA-Z][-a-zA-Z0-9:_.]*\s*>')
+DOCTYPE = re.compile(r'<!doctype[^<>]*>', re.IGNORECASE)
+RAW_TEXT = ('script', 'style')        # content is never parsed as markup
+ESCAPABLE_RAW_TEXT = ('textarea', 'title')  # parsed as markup by older html.parser versions only
+
+# Strict markup accepted for the dropdowns
+ATTRIBUTE = r'\s+[a-z][-a-z0-9_:.]*(?:="[^"]*"|=\'[^\']*\')?'
+SELECT_TAG = re.compile(r'<select((?:' + ATTRIBUTE + r')*)\s*>')
+OPTION = re.compile(r'\s*<option((?:' + ATTRIBUTE + r')*)\s*>([^<]*)</option>')
+SELECT_END = re.compile(r'\s*</select>')
+ATTRIBUTE_PAIR = re.compile(r'([a-z][-a-z0-9_:.]*)(?:="([^"]*)"|=\'([^\']*)\')?')
+RAW_END = {name: re.compile(r'</' + name + r'(?=\s*>)', re.IGNORECASE) for name in RAW_TEXT + ESCAPABLE_RAW_TEXT}
+CHARREF = re.compile(r'&(?:#(\d{1,7})|#[xX]([0-9a-fA-F]{1,6})|([a-zA-Z]+));')
+# Named references that BeautifulSoup and html.unescape decode the same way
+SAFE_ENTITIES = {
+    'amp', 'lt', 'gt', 'quot', 'apos', 'nbsp',
+    'aacute', 'eacute', 'iacute', 'oacute', 'uacute', 'ntilde', 'uuml',
+    'Aacute', 'Eacute', 'Iacute', 'Oacute', 'Uacute', 'Ntilde', 'Uuml',
+}
+
+
+def match_marker(page_source, pos, endpos):
+    """
+    Bounded match of the legacy marker pattern at pos.
+
+    Same result as re.match(r"L\\.marker\\(\\[([^,]+),\\s*([^,]+)\\].*?\\.bindPopup\\('([^']*)'\\);",
+    re.DOTALL) with endpos, in time linear in endpos - pos.
+
+    Args:
+        page_source (str): HTML source of the page
+        pos (int): Position of an 'L.marker([' call
+        endpos (int): Where the search stops (the next 'L.marker([' call)
+
+    Returns:
+        tuple: (lat, lon, popup_html) with the coordinates stripped, or None
+    """
+    lat_start = pos + len(MARKER_HEAD)
+    comma = page_source.find(',', lat_start, endpos)
+    if comma <= lat_start:
+        return None
+    run_end = page_source.find(',', comma + 1, endpos)
+    if run_end == -1:
+        run_end = endpos
+    lon_start = comma + 1
+    while lon_start < run_end and page_source[lon_start].isspace():
+        lon_start += 1
+
+    # Brackets that can close the longitude, in the order the regex backtracks
+    # through them: the last one first; one right after the spaces only once
+    # \s* gives a space back to the longitude
+    brackets = []
+    if lon_start < run_end and page_source[lon_start] == ']' and lon_start > comma + 1:
+        brackets.append(lon_start)
+    bracket = page_source.find(']', lon_start + 1, run_end)
+    while bracket != -1:
+        brackets.append(bracket)
+        bracket = page_source.find(']', bracket + 1, run_end)
+    if not brackets:
+        return None
+
+    # Popups that can follow a bracket: .bindPopup(' whose next quote starts ');
+    popups = []
+    quote = -1
+    start = page_source.find(POPUP_HEAD, brackets[0] + 1, endpos)
+    while start != -1:
+        text_start = start + len(POPUP_HEAD)
+        if quote < text_start:
+            quote = page_source.find("'", text_start, endpos)
+            if quote == -1:
+                break
+        if page_source.startswith(POPUP_END, quote, endpos):
+            popups.append((start, page_source[text_start:quote]))
+        start = page_source.find(POPUP_HEAD, start + 1, endpos)
+    if not popups:
+        return None
+
+    last_popup = popups[-1][0]
+    bracket = max(b for b in brackets if b < last_popup)
+    lon_begin = lon_start if bracket > lon_start else lon_start - 1
+    popup_html = next(text for start, text in popups if start > bracket)
+    return page_source[lat_start:comma].strip(), page_source[lon_begin:bracket].strip(), popup_html
+
+
+def iter_markers(page_source):
+    """(lat, lon, popup_html) of every marker, each popup searched for up to the next marker"""
+    pos = page_source.find(MARKER_HEAD)
+    while pos != -1:
+        next_pos = page_source.find(MARKER_HEAD, pos + len(MARKER_HEAD))
+        marker = match_marker(page_source, pos, len(page_source) if next_pos == -1 else next_pos)
+        if marker is not None:
+            yield marker
+        pos = next_pos
+
+
+def _element_text(page_source, pos):
+    """
+    Bounded match of the legacy counter tail [^>]*>([^<]+) at pos.
+
+    Returns:
+        tuple: (text or None, position of the '>' it stopped at, -1 if there is none).
+            Every candidate before that '>' ends the same way.
+    """
+    gt = page_source.find('>', pos)
+    if gt == -1:
+        return None, -1
+    text_end = page_source.find('<', gt + 1)
+    if text_end == -1:
+        text_end = len(page_source)
+    return (page_source[gt + 1:text_end] if text_end > gt + 1 else None), gt
+
+
+def _first_element_text(page_source, candidates, pos=0):
+    """Text after the first candidate match from pos whose element text is not empty"""
+    while True:
+        match = candidates.search(page_source, pos)
+        if match is None:
+            return None
+        text, gt = _element_text(page_source, match.end())
+        if gt == -1:
+            return None
+        if text is not None:
+            return text
+        pos = gt + 1
+
+
+def find_counter_text(page_source):
+    """
+    Text of the H1Contador counter, by the legacy counter patterns in order.
+
+    Same result as the first of these that matches (re.IGNORECASE | re.DOTALL),
+    in linear time: only the first start of the lazy patterns can match,
+    because any later start sees a subset of its candidates.
+
+        ContentPlaceHolder_H1Contador[^>]*>([^<]+)
+        ContentPlaceHolder.*?H1.*?Contador[^>]*>([^<]+)
+        H1Contador[^>]*>([^<]+)
+        id=["'].*?contador.*?["'][^>]*>([^<]+)
+        class=["'].*?contador.*?["'][^>]*>([^<]+)
+
+    Returns:
+        str: Raw counter text, or None if no pattern matches
+    """
+    text = _first_element_text(page_source, COUNTER_ID)
+    if text is not None:
+        return text
+
+    placeholder = PLACEHOLDER.search(page_source)
+    h1 = H1.search(page_source, placeholder.end()) if placeholder else None
+    if h1 is not None:
+        text = _first_element_text(page_source, CONTADOR, h1.end())
+        if text is not None:
+            return text
+
+    text = _first_element_text(page_source, COUNTER_SHORT_ID)
+    if text is not None:
+        return text
+
+    for opener in (ID_OPEN, CLASS_OPEN):
+        attribute = opener.search(page_source)
+        contador = CONTADOR.search(page_source, attribute.end()) if attribute else None
+        if contador is not None:
+            text = _first_element_text(page_source, QUOTE, contador.end())
+            if text is not None:
+                return text
+    return None
+
+
+def find_target_cdata(page_source):
+    """
+    Content span of the map's CDATA section, like the legacy
+    //<!\\[CDATA\\[\\s*var osmUrl\\s*=(.*?)//\\]\\]> search, in linear time.
+    """
+    pos = page_source.find(CDATA_HEAD)
+    while pos != -1:
+        head = OSM_HEAD.match(page_source, pos + len(CDATA_HEAD))
+        if head is not None:
+            # Without a terminator here, no later section can have one either
+            end = page_source.find(CDATA_END, head.end())
+            return (head.end(), end) if end != -1 else None
+        pos = page_source.find(CDATA_HEAD, pos + 1)
+    return None
+
+
+def iter_cdata_sections(page_source):
+    """Contents of the //<![CDATA[ ... //]]> sections, like the legacy findall, in linear time"""
+    pos = page_source.find(CDATA_HEAD)
+    while pos != -1:
+        end = page_source.find(CDATA_END, pos + len(CDATA_HEAD))
+        if end == -1:
+            return
+        yield page_source[pos + len(CDATA_HEAD):end]
+        pos = page_source.find(CDATA_HEAD, end + len(CDATA_END))
+
+
+class ScanFallback(Exception):
+    """The page is outside the strict subset the scanner reproduces exactly"""
+
+
+class PageScan:
+    """Raw page pieces found by scan_page, before any post-processing"""
+
+    def __init__(self):
+        self.counter_text = None          # group of the first counter match, None if pattern 1 missed
+        self.markers = []                 # (lat, lon, popup_html) in page order
+        self.cdata_found = False          # target 'var osmUrl' CDATA section present
+        self.cdata_length = 0
+        self.nombres_bold = []            # <b>Nombre:</b> groups in the target CDATA
+        self.nombres_plain = []           # Nombre: groups in the target CDATA
+        self.options = {name: [] for name in DROPDOWNS}  # (value, text) pairs per dropdown
+
+
+def _attributes(attribute_text):
+    """Attribute dict of a strict tag, values unescaped like html.parser does"""
+    attributes = {}
+    for match in ATTRIBUTE_PAIR.finditer(attribute_text):
+        name = match.group(1)
+        if name in attributes:
+            raise ScanFallback(f"duplicate attribute {name}")
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        attributes[name] = html.unescape(value) if value is not None else ''
+    return attributes
+
+
+def _option_text(text):
+    """Option text as BeautifulSoup decodes it, for the character references both decode alike"""
+    if '&' not in text:
+        return text
+    if text.count('&') != len(CHARREF.findall(text)):
+        raise ScanFallback("bare '&' in option text")
+    for decimal, hexadecimal, name in CHARREF.findall(text):
+        if name:
+            if name not in SAFE_ENTITIES:
+                raise ScanFallback(f"entity &{name};")
+        else:
+            code = int(decimal) if decimal else int(hexadecimal, 16)
+            if not (32 <= code <= 126 or 160 <= code <= 0xD7FF or 0xE000 <= code <= 0xFFFD):
+                raise ScanFallback(f"character reference {code}")
+    return html.unescape(text)
+
+
+def _read_select(page_source, pos):
+    """(attributes, options, end) of a strict <select> block starting at pos"""
+    tag = SELECT_TAG.match(page_source, pos)
+    if tag is None:
+        raise ScanFallback("unexpected <select> markup")
+    attributes = _attributes(tag.group(1))
+    options = []
+    end = tag.end()
+    while True:
+        closing = SELECT_END.match(page_source, end)
+        if closing is not None:
+            return attributes, options, closing.end()
+        option = OPTION.match(page_source, end)
+        if option is None:
+            raise ScanFallback("unexpected markup inside <select>")
+        options.append((_attributes(option.group(1)).get('value'), _option_text(option.group(2))))
+        end = option.end()
+
+
+def _markup_end(page_source, pos):
+    """
+    (end, raw_end, start tag name) of the markup starting with the '<' at pos.
+
+    raw_end is the end of the raw text the markup opens (a comment, or the
+    content of a script, style, textarea or title element), or 0.
+    """
+    following = page_source[pos + 1:pos + 2]
+    if page_source.startswith('<!--', pos):
+        close = page_source.find('-->', pos + 4)
+        body = page_source[pos + 4:close]
+        # Comment forms whose end differs between html.parser versions
+        if close == -1 or body.startswith(('>', '->')) or '--!>' in body:
+            raise ScanFallback("unusual comment")
+        return close + 3, close + 3, None
+    if following == '!':
+        doctype = DOCTYPE.match(page_source, pos)
+        if doctype is None:
+            raise ScanFallback("declaration or marked section outside a script")
+        return doctype.end(), 0, None
+    if following == '/':
+        end_tag = END_TAG.match(page_source, pos)
+        if end_tag is None:
+            raise ScanFallback("unexpected end tag markup")
+        return end_tag.end(), 0, None
+    if not following.isascii() or not following.isalpha():
+        return pos + 1, 0, None  # a literal '<' in text
+    tag = START_TAG.match(page_source, pos)
+    if tag is None:
+        raise ScanFallback("unexpected tag markup")
+    name = tag.group(1).lower()
+    if name in RAW_END:
+        closing = RAW_END[name].search(page_source, tag.end())
+        if closing is None:
+            raise ScanFallback(f"unterminated <{name}>")
+        if name in ESCAPABLE_RAW_TEXT and '<' in page_source[tag.end():closing.start()]:
+            raise ScanFallback(f"markup inside <{name}>")
+        return tag.end(), closing.start(), tag.group(1)
+    return tag.end(), 0, tag.group(1)
+
+
+def scan_page(page_source, dropdowns_only=False):
+    """
+    Walk a Georreferencia page once and collect what the parser needs.
+
+    Args:
+        page_source (str): HTML source of the page
+        dropdowns_only (bool): Only validate the markup and read the dropdowns,
+            skipping scripts and comments entirely (how benchmarks.py times
+            the dropdown reading on its own)
+
+    Returns:
+        PageScan: Raw markers, counter text, target CDATA names and dropdown
+            options, or None if the page needs the legacy parser
+    """
+    scan = PageScan()
+    cdata_span = None                     # (start, end) of the target CDATA content
+    cdata_done = False                    # the target CDATA section was found or cannot exist
+    bold_end = plain_end = 0
+    raw_end = 0                           # end of the current script, style or comment content
+    select_end = 0                        # end of the last dropdown read
+    counter_from = 0                      # counter anchors before this position end like a failed one
+    by_name = {}                          # dropdown -> options of the first select with its exact name
+    by_id = {}                            # dropdown -> options of the first select whose id contains it
+
+    anchors = TAG_ANCHORS if dropdowns_only else ANCHORS
+    pos = 0
+    try:
+        while True:
+            if pos < raw_end:
+                anchor = None if dropdowns_only else RAW_ANCHORS.search(page_source, pos, raw_end)
+                if anchor is None:
+                    pos = raw_end
+                    continue
+            else:
+                anchor = anchors.search(page_source, pos)
+                if anchor is None:
+                    break
+            kind = anchor.lastgroup
+            start = anchor.start()
+            pos = anchor.end()
+
+            if kind == 'marker':
+                next_marker = page_source.find(MARKER_HEAD, pos)
+                marker = match_marker(page_source, start, len(page_source) if next_marker == -1 else next_marker)
+                if marker is not None:
+                    scan.markers.append(marker)
+
+            elif kind == 'cdata':
+                if start + 2 >= raw_end:
+                    raise ScanFallback("marked section outside a script")
+                head = None if cdata_done else OSM_HEAD.match(page_source, pos)
+                if head is not None:
+                    cdata_done = True
+                    end = page_source.find(CDATA_END, head.end())
+                    if end != -1:
+                        cdata_span = (head.end(), end)
+                        scan.cdata_found = True
+                        scan.cdata_length = end - head.end()
+
+            elif kind == 'nombre':
+                if cdata_span is None or not cdata_span[0] <= start < cdata_span[1]:
+                    continue
+                content_start, content_end = cdata_span
+                if start - 3 >= max(content_start, bold_end):
+                    match = NOMBRE_BOLD.match(page_source, start - 3, content_end)
+                    if match is not None:
+                        scan.nombres_bold.append(match.group(1))
+                        bold_end = match.end()
+                if start >= plain_end:
+                    match = NOMBRE_PLAIN.match(page_source, start, content_end)
+                    if match is not None:
+                        scan.nombres_plain.append(match.group(1))
+                        plain_end = match.end()
+
+            elif kind == 'counter':
+                if scan.counter_text is None and 0 <= counter_from <= start:
+                    text, gt = _element_text(page_source, pos)
+                    scan.counter_text = text
+                    counter_from = gt + 1 if gt != -1 else -1
+
+            elif kind == 'tag':
+                if start < select_end:
+                    continue
+                tag_end, raw_end, tag_name = _markup_end(page_source, start)
+                if tag_name is None or tag_name.lower() != 'select':
+                    continue
+                tag_text = page_source[start:tag_end]
+                if not any(name in tag_text for name in DROPDOWNS):
+                    # Other dropdowns are never read; their tag may still hide
+                    # a dropdown name behind a character reference
+                    if '&' in tag_text:
+                        raise ScanFallback("character reference in a <select> tag")
+                    continue
+                if tag_name != 'select':
+                    raise ScanFallback("upper-case <select>")
+                attributes, options, select_end = _read_select(page_source, start)
+                if RAW_ANCHORS.search(page_source, start, select_end) is None:
+                    pos = select_end  # nothing else to see among the options
+                for name in DROPDOWNS:
+                    if attributes.get('name') == DROPDOWN_NAME_PREFIX + name:
+                        by_name.setdefault(name, options)
+                    if name in (attributes.get('id') or ''):
+                        by_id.setdefault(name, options)
+    except ScanFallback:
+        return None
+
+    for name in DROPDOWNS:
+        scan.options[name] = by_name.get(name, by_id.get(name, []))
+    return scan
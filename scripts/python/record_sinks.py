@@ -0,0 +1,203 @@
+"""
+Streaming Record Sinks for Scraper Output
+
+This module writes school records as they arrive, one municipality at a time,
+instead of holding every record in memory and rewriting a DataFrame. Memory
+stays constant and every row is written once.
+
+Backends:
+    csv      Appends rows to a single CSV file
+    jsonl    Appends one JSON object per row
+    parquet  Writes a directory of part files (requires pyarrow)
+
+Each batch of rows is written with a single write call and fsynced, and
+Parquet parts are written to a temporary name and renamed, so a file read
+while the scraper is running only ever contains complete rows.
+"""
+
+import csv
+import io
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Columns written as integers in typed formats; everything else is text
+INTEGER_COLUMNS = ('dep_id', 'mun_id')
+
+
+class RecordSink:
+    """Base sink: append batches of records, flush durably, close"""
+
+    format = None
+    extension = ''
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.rows_written = 0
+        self.batches_written = 0
+        self._closed = False
+
+    def write(self, rows):
+        """
+        Append one batch of records (usually one municipality).
+
+        Returns:
+            int: Number of rows written
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        if self._closed:
+            raise ValueError(f"Sink {self.path} is closed")
+        self._write_batch(rows)
+        self.rows_written += len(rows)
+        self.batches_written += 1
+        return len(rows)
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _append_durably(path, data):
+        """Append a complete chunk in one write and fsync it"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class CSVSink(RecordSink):
+    """Single CSV file; the header is written with the first batch"""
+
+    format = 'csv'
+    extension = '.csv'
+
+    def _write_batch(self, rows):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.columns, extrasaction='ignore', lineterminator='\n')
+        if self.batches_written == 0:
+            # Start from an empty file so a rerun with the same name does not append to old rows
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            writer.writeheader()
+        writer.writerows(rows)
+        self._append_durably(self.path, buffer.getvalue().encode('utf-8'))
+
+
+class JSONLSink(RecordSink):
+    """JSON Lines file with one object per record, keys in column order"""
+
+    format = 'jsonl'
+    extension = '.jsonl'
+
+    def _write_batch(self, rows):
+        if self.batches_written == 0 and os.path.exists(self.path):
+            os.remove(self.path)
+        lines = [json.dumps({column: row.get(column) for column in self.columns}, ensure_ascii=False)
+                 for row in rows]
+        self._append_durably(self.path, ('\n'.join(lines) + '\n').encode('utf-8'))
+
+
+class ParquetSink(RecordSink):
+    """
+    Directory of Parquet part files.
+
+    Rows are buffered up to `rows_per_part` and written as part-NNNNN.parquet;
+    each part is written to a temporary name and renamed into place, so the
+    directory can be read with pyarrow/pandas at any time.
+    """
+
+    format = 'parquet'
+    extension = ''
+
+    def __init__(self, path, columns, rows_per_part=5000):
+        if pa is None:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        super().__init__(path, columns)
+        self.rows_per_part = rows_per_part
+        self.parts_written = 0
+        self._buffer = []
+        self.schema = pa.schema([(column, pa.int64() if column in INTEGER_COLUMNS else pa.string())
+                                 for column in self.columns])
+
+    def _write_batch(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a new part file"""
+        if not self._buffer:
+            return
+        if self.parts_written == 0:
+            os.makedirs(self.path, exist_ok=True)
+            for name in os.listdir(self.path):
+                if name.startswith('part-'):
+                    os.remove(os.path.join(self.path, name))
+
+        data = {column: [self._cell(row.get(column), column) for row in self._buffer]
+                for column in self.columns}
+        table = pa.Table.from_pydict(data, schema=self.schema)
+
+        part_path = os.path.join(self.path, f"part-{self.parts_written:05d}.parquet")
+        tmp_path = os.path.join(self.path, f".part-{self.parts_written:05d}.parquet.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_path)
+
+        self.parts_written += 1
+        self._buffer = []
+
+    @staticmethod
+    def _cell(value, column):
+        if value is None or value == '':
+            return None
+        if column in INTEGER_COLUMNS:
+            return int(value)
+        return str(value)
+
+    def close(self):
+        if not self._closed:
+            self.flush()
+        super().close()
+
+
+SINKS = {
+    CSVSink.format: CSVSink,
+    JSONLSink.format: JSONLSink,
+    ParquetSink.format: ParquetSink,
+}
+
+
+def create_sink(output_format, base_path, columns, **kwargs):
+    """
+    Create a sink by format name.
+
+    Args:
+        output_format (str): csv, jsonl or parquet
+        base_path (str): Output path without extension; the format adds its own
+        columns (list): Record fields, in output order
+
+    Returns:
+        RecordSink: The sink; use it as a context manager or call close()
+    """
+    if output_format not in SINKS:
+        raise ValueError(f"Unknown output format: {output_format} (choose from {', '.join(SINKS)})")
+    sink_class = SINKS[output_format]
+    return sink_class(base_path + sink_class.extension, columns, **kwargs)
@@ -0,0 +1,159 @@
+"""
+Crash-Safe Run Journal for National Scrapes
+
+This module keeps an append-only JSON Lines journal with one committed record
+per finished municipality. Each record is flushed and fsynced before the
+scraper moves on, so a crash loses at most the municipality in flight, and a
+restarted run can skip everything already committed. The final output is
+built from the journal with a streaming merge instead of rewriting a growing
+progress file after every department.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+OK = 'ok'
+FAILED = 'failed'
+
+
+class RunJournal:
+    """Append-only journal of finished municipalities"""
+
+    def __init__(self, path, resume=False):
+        """
+        Args:
+            path (str): Journal file (JSON Lines)
+            resume (bool): Keep the existing journal; otherwise it is moved aside and a
+                new one is started
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        if not resume and os.path.exists(path) and os.path.getsize(path) > 0:
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            root, ext = os.path.splitext(path)
+            os.replace(path, f"{root}_{stamp}{ext}")
+        elif resume:
+            self._truncate_torn_tail()
+
+        self._offsets = self._index()
+
+    def _truncate_torn_tail(self):
+        """Cut a line left unfinished by a crash, so the next append starts on a line of its own"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 65536)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                f.truncate(position)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _records(self):
+        """Yield (byte offset, record) for every intact line"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    record = None  # torn write from a crash
+                if record is not None:
+                    yield offset, record
+                offset += len(line)
+
+    def _index(self):
+        """Offsets of the latest successful record per (dep_id, mun_id)"""
+        offsets = {}
+        for offset, record in self._records():
+            if record.get('status') == OK:
+                offsets[(record['dep_id'], record['mun_id'])] = offset
+        return offsets
+
+    def _append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            return offset
+
+    def commit(self, dep_id, mun_id, department, municipality, rows):
+        """Durably record a finished municipality and its rows"""
+        offset = self._append({
+            'dep_id': dep_id,
+            'mun_id': mun_id,
+            'department': department,
+            'municipality': municipality,
+            'status': OK,
+            'schools': len(rows),
+            'committed_at': datetime.now().isoformat(timespec='seconds'),
+            'rows': rows,
+        })
+        with self._lock:
+            self._offsets[(dep_id, mun_id)] = offset
+
+    def commit_failure(self, dep_id, mun_id, department, municipality, reason=None):
+        """Record a municipality that failed; it is retried on resume"""
+        self._append({
+            'dep_id': dep_id,
+            'mun_id': mun_id,
+            'department': department,
+            'municipality': municipality,
+            'status': FAILED,
+            'reason': reason,
+            'committed_at': datetime.now().isoformat(timespec='seconds'),
+        })
+
+    def completed(self):
+        """(dep_id, mun_id) pairs with a committed successful record"""
+        with self._lock:
+            return set(self._offsets)
+
+    def is_completed(self, dep_id, mun_id):
+        with self._lock:
+            return (dep_id, mun_id) in self._offsets
+
+    def load_rows(self, dep_id, mun_id):
+        """Rows of the latest successful record for a municipality"""
+        with self._lock:
+            offset = self._offsets.get((dep_id, mun_id))
+        if offset is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())['rows']
+
+    def export(self, sink, order):
+        """
+        Stream the committed rows into a record sink, one municipality at a time.
+
+        Args:
+            sink: RecordSink to write to (see record_sinks.py); the caller closes it
+            order (list): (dep_id, mun_id) pairs in output order
+
+        Returns:
+            int: Number of rows written
+        """
+        written = 0
+        for dep_id, mun_id in order:
+            rows = self.load_rows(dep_id, mun_id)
+            if rows:
+                written += sink.write(rows)
+        return written
@@ -0,0 +1,142 @@
+"""
+Longest-First Task Scheduling for Parallel Scrapes
+
+Municipalities differ a lot in size: Managua has hundreds of schools, small
+towns a few dozen, and page load and parse time grow with that. This module
+estimates each municipality's scrape time from the school counts of a
+previous dataset and orders the tasks longest-first (LPT), so that the big
+municipalities start early and do not become stragglers at the end of a
+parallel run. It also predicts the run's makespan by simulating the worker
+pool and compares it with the measured one.
+"""
+
+import csv
+import heapq
+import statistics
+import threading
+from collections import Counter
+
+
+def load_school_counts(csv_path):
+    """
+    Count schools per municipality in a previous output file.
+
+    Args:
+        csv_path (str): National or department CSV with a mun_id column
+
+    Returns:
+        dict: mun_id -> number of schools
+    """
+    counts = Counter()
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('mun_id'):
+                counts[int(row['mun_id'])] += 1
+    return dict(counts)
+
+
+def format_duration(seconds):
+    """Seconds as '42s' or '12.5 min'"""
+    return f"{seconds:.0f}s" if seconds < 120 else f"{seconds / 60:.1f} min"
+
+
+def simulate_makespan(durations, workers):
+    """
+    Makespan of running durations in order on a pool of workers.
+
+    Each task starts on the first worker to become free, which is how
+    ThreadPoolExecutor hands out submitted tasks.
+    """
+    free_at = [0.0] * max(1, workers)
+    for duration in durations:
+        heapq.heappush(free_at, heapq.heappop(free_at) + duration)
+    return max(free_at)
+
+
+class MakespanScheduler:
+    """
+    Orders municipality tasks longest-first and checks the makespan estimate.
+
+    A task is estimated at `base_seconds + seconds_per_school * schools`,
+    with the school count of its municipality in the previous dataset
+    (municipalities missing from it get the median count). Measured task
+    durations refit the two coefficients, so later passes of the same run
+    (the deferred retries) are predicted with the calibrated model.
+
+    The default coefficients are not measured. With any positive
+    `seconds_per_school` the order is simply by school count, so they only
+    set the scale of the first makespan prediction: 10 s is the fixed
+    pacer's mean request delay and reading time (2.5 s + 3.5 s) plus a few
+    seconds of page load, and 0.05 s per school is a rough allowance for the
+    larger pages (half a minute for 600 schools). report() prints the model
+    calibrated on the run's own durations.
+    """
+
+    def __init__(self, counts, workers, base_seconds=10.0, seconds_per_school=0.05):
+        self.counts = dict(counts)
+        self.workers = max(1, workers)
+        self.base_seconds = base_seconds
+        self.seconds_per_school = seconds_per_school
+        self.default_count = statistics.median(self.counts.values()) if self.counts else 0
+        self._lock = threading.Lock()
+        self.samples = []  # (schools, seconds) per finished task
+
+    @classmethod
+    def from_csv(cls, csv_path, workers, **kwargs):
+        return cls(load_school_counts(csv_path), workers, **kwargs)
+
+    def schools(self, task):
+        """Historical school count of a (department, municipality, mun_id) task"""
+        return self.counts.get(task[2], self.default_count)
+
+    def estimate(self, task):
+        """Predicted seconds to scrape a task"""
+        return self.base_seconds + self.seconds_per_school * self.schools(task)
+
+    def order(self, tasks):
+        """Tasks sorted longest-first; ties keep their original order"""
+        return sorted(tasks, key=self.estimate, reverse=True)
+
+    def predict(self, tasks):
+        """Predicted makespan of running tasks in this order on the worker pool"""
+        return simulate_makespan([self.estimate(task) for task in tasks], self.workers)
+
+    def record(self, task, seconds):
+        """Store the measured duration of a finished task"""
+        with self._lock:
+            self.samples.append((self.schools(task), seconds))
+
+    def calibrate(self):
+        """
+        Refit the time model to the measured durations (least squares).
+
+        Returns:
+            bool: True if the model was updated
+        """
+        with self._lock:
+            samples = list(self.samples)
+        if len(samples) < 3:
+            return False
+        xs = [x for x, _ in samples]
+        ys = [y for _, y in samples]
+        mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        if var_x == 0:
+            return False
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x
+        self.seconds_per_school = max(0.0, slope)
+        self.base_seconds = max(0.0, mean_y - self.seconds_per_school * mean_x)
+        return True
+
+    def report(self, predicted, actual, tasks, durations=None):
+        """Print predicted vs. actual makespan and the calibrated model"""
+        error = (actual - predicted) / predicted * 100 if predicted else 0.0
+        print(f"📐 Makespan: predicted {format_duration(predicted)}, actual {format_duration(actual)} "
+              f"({error:+.0f}%) for {len(tasks)} tasks on {self.workers} workers")
+        if durations:
+            task, longest = max(durations.items(), key=lambda item: item[1])
+            print(f"    Longest task: {task[0]} - {task[1]} ({longest:.0f}s, "
+                  f"{self.schools(task):.0f} schools in the previous dataset)")
+        if self.calibrate():
+            print(f"    Calibrated model: {self.base_seconds:.1f}s + "
+                  f"{self.seconds_per_school:.3f}s per school")
@@ -0,0 +1,117 @@
+"""
+Raw HTML Snapshot Archive for the Nicaragua Schools Scraper
+
+This module stores every municipality page the scraper receives in a
+compressed, content-addressed archive, so the parser can be re-run offline
+(replay) after a fix instead of scraping the MINED site again.
+
+Layout:
+    <root>/objects/<sha[:2]>/<sha>.html.gz   gzip-compressed page, named by SHA-256
+    <root>/manifest.jsonl                    one JSON line per received page
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+
+class SnapshotArchive:
+    """Content-addressed store of raw municipality pages with a JSON Lines manifest"""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifest_path = os.path.join(root, 'manifest.jsonl')
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.html.gz")
+
+    def store(self, page_source, dep_id, mun_id, department=None,
+              municipality=None, engine=None, timestamp=None):
+        """
+        Store a page and append its manifest entry.
+
+        Identical pages are stored once; every call still adds a manifest
+        entry keyed by dep_id/mun_id/timestamp.
+
+        Returns:
+            dict: The manifest entry
+        """
+        data = page_source.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.object_path(sha256)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=6))
+            os.replace(tmp_path, path)
+
+        timestamp = timestamp or datetime.now().isoformat(timespec='seconds')
+        entry = {
+            'key': f"{dep_id}/{mun_id}/{timestamp}",
+            'dep_id': dep_id,
+            'mun_id': mun_id,
+            'department': department,
+            'municipality': municipality,
+            'timestamp': timestamp,
+            'sha256': sha256,
+            'bytes': len(data),
+            'stored_bytes': os.path.getsize(path),
+            'has_markers': 'L.marker' in page_source,
+            'engine': engine,
+        }
+
+        with self._lock:
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+
+        return entry
+
+    def entries(self):
+        """Iterate over all manifest entries in the order they were stored"""
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-write can leave a truncated last line
+                        continue
+
+    def latest_entries(self):
+        """
+        Pick one snapshot per municipality for replay.
+
+        The newest snapshot that contains map markers wins; municipalities
+        that never returned markers fall back to their newest snapshot.
+
+        Returns:
+            dict: (dep_id, mun_id) -> manifest entry
+        """
+        latest = {}
+        for entry in self.entries():
+            key = (entry['dep_id'], entry['mun_id'])
+            current = latest.get(key)
+            if (current is None or entry.get('has_markers') or not current.get('has_markers')):
+                latest[key] = entry
+        return latest
+
+    def load(self, sha256):
+        """Read a stored page back as text"""
+        with gzip.open(self.object_path(sha256), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def find(self, dep_id, mun_id):
+        """Latest replayable entry for one municipality, if any"""
+        return self.latest_entries().get((dep_id, mun_id))
@@ -0,0 +1,241 @@
+"""
+Shared SQLite Work Queue for Multi-Process Scrapes
+
+This module keeps every (dep_id, mun_id) task of a national scrape in one
+SQLite file. Any number of worker processes, on one machine or on several
+machines sharing a filesystem, lease tasks from it, renew their leases with
+heartbeats while they scrape, and commit the resulting rows back to it. A
+lease that is not renewed (a crashed process or an unreachable host) expires
+and the task is leased again by another worker. Failed tasks go back to the
+queue behind the untried ones until they run out of attempts. The national
+file is merged from the committed rows, in task order.
+
+Every change happens in a short BEGIN IMMEDIATE transaction, so only one
+process at a time can lease a given task. SQLite relies on the filesystem's
+locks for this: a local disk or a network filesystem with working POSIX
+locks (NFSv4, SMB) is fine; leases use wall-clock time, so hosts should
+keep their clocks in sync (NTP).
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY,
+    dep_id INTEGER NOT NULL,
+    mun_id INTEGER NOT NULL,
+    department TEXT NOT NULL,
+    municipality TEXT NOT NULL,
+    weight REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    schools INTEGER,
+    reason TEXT,
+    updated_at TEXT,
+    rows TEXT,
+    UNIQUE (dep_id, mun_id)
+)
+"""
+
+
+class WorkQueue:
+    """Task queue with leases, heartbeats and committed results, in one SQLite file"""
+
+    def __init__(self, path, max_attempts=3):
+        """
+        Args:
+            path (str): SQLite file shared by the coordinator and all workers
+            max_attempts (int): Leases a task gets before it is marked failed
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as db:
+            db.execute(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """One short write transaction on a fresh connection (safe across threads and processes)"""
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        finally:
+            db.close()
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec='seconds')
+
+    def populate(self, tasks, weights=None):
+        """
+        Add tasks that are not in the queue yet; existing ones keep their state.
+
+        Args:
+            tasks (iterable): (dep_id, mun_id, department, municipality) in output order
+            weights (dict): Optional mun_id -> expected size; larger tasks are leased first
+
+        Returns:
+            int: Number of tasks added
+        """
+        weights = weights or {}
+        with self._transaction() as db:
+            before = db.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+            db.executemany(
+                'INSERT OR IGNORE INTO tasks (dep_id, mun_id, department, municipality, weight, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(dep_id, mun_id, department, municipality, weights.get(mun_id, 0), self._now())
+                 for dep_id, mun_id, department, municipality in tasks])
+            return db.execute('SELECT COUNT(*) FROM tasks').fetchone()[0] - before
+
+    def lease(self, owner, lease_seconds=600):
+        """
+        Lease the next task: untried before retried, then largest first.
+
+        Expired leases are reclaimed here; one that has used up its attempts
+        is marked failed instead.
+
+        Returns:
+            dict: Task row (dep_id, mun_id, department, municipality, attempts),
+                or None if nothing can be leased right now
+        """
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE tasks SET status = ?, owner = NULL, reason = 'lease_expired', updated_at = ? "
+                       "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                       (FAILED, self._now(), LEASED, now, self.max_attempts))
+            row = db.execute(
+                'SELECT seq, dep_id, mun_id, department, municipality, status, attempts FROM tasks '
+                'WHERE status = ? OR (status = ? AND lease_expires < ?) '
+                'ORDER BY attempts, weight DESC, seq LIMIT 1',
+                (PENDING, LEASED, now)).fetchone()
+            if row is None:
+                return None
+            if row['status'] == LEASED:
+                print(f"    ♻️  Reclaiming expired lease on {row['department']} - {row['municipality']}")
+            db.execute('UPDATE tasks SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, '
+                       'updated_at = ? WHERE seq = ?',
+                       (LEASED, owner, now + lease_seconds, self._now(), row['seq']))
+            task = dict(row)
+            task['attempts'] += 1
+            return task
+
+    def heartbeat(self, owner, leases, lease_seconds=600):
+        """
+        Extend the leases this owner still holds.
+
+        Returns:
+            int: Number of leases renewed (fewer than requested if some expired
+                and were taken over)
+        """
+        leases = list(leases)
+        if not leases:
+            return 0
+        expires = time.time() + lease_seconds
+        with self._transaction() as db:
+            return sum(db.execute('UPDATE tasks SET lease_expires = ? '
+                                  'WHERE dep_id = ? AND mun_id = ? AND status = ? AND owner = ?',
+                                  (expires, dep_id, mun_id, LEASED, owner)).rowcount
+                       for dep_id, mun_id in leases)
+
+    def commit(self, owner, dep_id, mun_id, rows):
+        """
+        Store the rows of a finished task.
+
+        A result is accepted even if the lease expired meanwhile, unless the
+        task was already completed by another worker.
+
+        Returns:
+            bool: True if the rows were stored
+        """
+        with self._transaction() as db:
+            return db.execute('UPDATE tasks SET status = ?, owner = ?, schools = ?, rows = ?, reason = NULL, '
+                              'lease_expires = NULL, updated_at = ? '
+                              'WHERE dep_id = ? AND mun_id = ? AND status != ?',
+                              (DONE, owner, len(rows), json.dumps(rows, ensure_ascii=False), self._now(),
+                               dep_id, mun_id, DONE)).rowcount > 0
+
+    def commit_failure(self, owner, dep_id, mun_id, reason=None):
+        """
+        Return a failed task to the queue, or mark it failed if it has no attempts left.
+
+        Returns:
+            str: The task's new status
+        """
+        with self._transaction() as db:
+            row = db.execute('SELECT status, owner, attempts FROM tasks WHERE dep_id = ? AND mun_id = ?',
+                             (dep_id, mun_id)).fetchone()
+            if row is None or row['status'] != LEASED or row['owner'] != owner:
+                return row['status'] if row else None  # completed or re-leased elsewhere meanwhile
+            status = FAILED if row['attempts'] >= self.max_attempts else PENDING
+            db.execute('UPDATE tasks SET status = ?, owner = NULL, lease_expires = NULL, reason = ?, '
+                       'updated_at = ? WHERE dep_id = ? AND mun_id = ?',
+                       (status, reason, self._now(), dep_id, mun_id))
+            return status
+
+    def reset_failed(self):
+        """Give failed tasks a fresh set of attempts; returns how many were reset"""
+        with self._transaction() as db:
+            return db.execute('UPDATE tasks SET status = ?, attempts = 0, updated_at = ? WHERE status = ?',
+                              (PENDING, self._now(), FAILED)).rowcount
+
+    def counts(self):
+        """Number of tasks per status"""
+        with self._transaction() as db:
+            counts = {status: 0 for status in (PENDING, LEASED, DONE, FAILED)}
+            for row in db.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status'):
+                counts[row[0]] = row[1]
+            return counts
+
+    def has_open_tasks(self):
+        """True while some task is pending or leased (it may still come back to the queue)"""
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED] > 0
+
+    def unfinished(self):
+        """Tasks not done, in output order, with status, attempts and last failure reason"""
+        with self._transaction() as db:
+            return [dict(row) for row in db.execute(
+                'SELECT dep_id, mun_id, department, municipality, status, attempts, owner, reason '
+                'FROM tasks WHERE status != ? ORDER BY seq', (DONE,))]
+
+    def export(self, sink):
+        """
+        Stream the committed rows into a record sink, in task order.
+
+        Args:
+            sink: RecordSink to write to (see record_sinks.py); the caller closes it
+
+        Returns:
+            int: Number of rows written
+        """
+        db = sqlite3.connect(self.path, timeout=60)
+        try:
+            written = 0
+            for (rows,) in db.execute('SELECT rows FROM tasks WHERE status = ? ORDER BY seq', (DONE,)):
+                written += sink.write(json.loads(rows))
+            return written
+        finally:
+            db.close()
+
+    def describe(self):
+        counts = self.counts()
+        return ', '.join(f"{count} {status}" for status, count in counts.items())
@@ -0,0 +1,444 @@
+"""
+Frozen Baseline Page Parser
+
+A verbatim copy of extract_dropdown_data, extract_html_counter and
+get_school_data_from_page_source from the first commit of main_scraper.py,
+with the original lazy regexes and full-tree dropdown reading. The page
+parsers in main_scraper.py have been rewritten several times since; the
+tests compare them with this copy, so they cannot drift together. Do not
+edit it to follow main_scraper.py.
+"""
+
+import html
+import re
+
+from bs4 import BeautifulSoup
+
+
+def extract_dropdown_data(page_source):
+    """
+    Extract school IDs, modality IDs, and program IDs from dropdown menus.
+    Preserves order and allows duplicate names for schools.
+    
+    Args:
+        page_source (str): HTML source of the page
+        
+    Returns:
+        dict: Contains schools_list (ordered), schools_lookup (legacy), modalities_lookup, programs_lookup
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
+    
+    # Extract school IDs and names from "Buscar Centros Educativos" - PRESERVE ORDER
+    schools_list = []  # New: ordered list that preserves duplicates
+    schools_lookup = {}  # Legacy: for backward compatibility
+    school_select = soup.find('select', {'name': 'ctl00$ContentPlaceHolder1$ddlCentroEducativo'})
+    if not school_select:
+        school_select = soup.find('select', id=lambda x: x and 'ddlCentroEducativo' in x)
+    
+    if school_select:
+        for option in school_select.find_all('option'):
+            value = option.get('value')
+            text = option.text.strip()
+            # Filter out placeholder and empty options
+            if (value and value != '' and text and 
+                text != 'SELECCIONE' and 
+                text != '-- Escriba nombre del centro --' and
+                value != '-- Escriba nombre del centro --'):
+                
+                school_entry = {
+                    'school_id': value,
+                    'school_name': html.unescape(text)
+                }
+                
+                # Add to ordered list (preserves duplicates and order)
+                schools_list.append((text, school_entry))
+                
+                # Also add to lookup dict for legacy compatibility (will overwrite duplicates)
+                schools_lookup[text] = school_entry
+    
+    # Extract modality IDs from "Buscar por Modalidad"
+    modalities_lookup = {}
+    modality_select = soup.find('select', {'name': 'ctl00$ContentPlaceHolder1$ddlModalidad'})
+    if not modality_select:
+        modality_select = soup.find('select', id=lambda x: x and 'ddlModalidad' in x)
+    
+    if modality_select:
+        for option in modality_select.find_all('option'):
+            value = option.get('value')
+            text = option.text.strip()
+            if value and value != '' and text and text != 'SELECCIONE':
+                modalities_lookup[text] = {
+                    'modality_id': value,
+                    'modality_name': html.unescape(text)
+                }
+    
+    # Extract program IDs from "Buscar por Programa Educativo"
+    programs_lookup = {}
+    program_select = soup.find('select', {'name': 'ctl00$ContentPlaceHolder1$ddlPrograma'})
+    if not program_select:
+        program_select = soup.find('select', id=lambda x: x and 'ddlPrograma' in x)
+    
+    if program_select:
+        for option in program_select.find_all('option'):
+            value = option.get('value')
+            text = option.text.strip()
+            if value and value != '' and text and text != 'SELECCIONE':
+                programs_lookup[text] = {
+                    'program_id': value,
+                    'program_name': html.unescape(text)
+                }
+    
+    return {
+        'schools_list': schools_list,      # New: ordered list with duplicates preserved
+        'schools_lookup': schools_lookup,  # Legacy: dict for backward compatibility
+        'modalities_lookup': modalities_lookup,
+        'programs_lookup': programs_lookup
+    }
+
+
+def extract_html_counter(page_source):
+    """
+    Extract the HTML counter (ContentPlaceHolder_H1Contador) from the page.
+    
+    Args:
+        page_source (str): HTML source of the page
+        
+    Returns:
+        dict: Contains counter information
+    """
+    counter_patterns = [
+        r'ContentPlaceHolder_H1Contador[^>]*>([^<]+)',
+        r'ContentPlaceHolder.*?H1.*?Contador[^>]*>([^<]+)', 
+        r'H1Contador[^>]*>([^<]+)',
+        r'id=["\'].*?contador.*?["\'][^>]*>([^<]+)',
+        r'class=["\'].*?contador.*?["\'][^>]*>([^<]+)'
+    ]
+    
+    counter_info = {
+        'counter_found': False,
+        'counter_text': None,
+        'counter_number': None
+    }
+    
+    for pattern in counter_patterns:
+        matches = re.findall(pattern, page_source, re.IGNORECASE | re.DOTALL)
+        if matches:
+            counter_text = matches[0].strip()
+            counter_info['counter_found'] = True
+            counter_info['counter_text'] = counter_text
+            
+            # Try to extract number from counter text
+            number_matches = re.findall(r'\d+', counter_text)
+            if number_matches:
+                counter_info['counter_number'] = int(number_matches[-1])  # Take the last number found
+            
+            break
+    
+    return counter_info
+
+
+def get_school_data_from_page_source(page_source):
+    """
+    Extract comprehensive school data from page source including enhanced metadata.
+    Uses map marker data as primary source, supplements with dropdown for IDs.
+    
+    Args:
+        page_source (str): HTML source of the page
+        
+    Returns:
+        tuple: (enhanced_schools_list, extraction_stats_dict)
+    """
+    # Extract HTML counter first
+    counter_info = extract_html_counter(page_source)
+    
+    # Extract dropdown data for ID matching
+    dropdown_data = extract_dropdown_data(page_source)
+    
+    # Extract map marker data from CDATA sections - this is the authoritative source
+    map_schools = []
+    
+    # First try the L.marker pattern for coordinates and details
+    marker_pattern = r'L\.marker\(\[([^,]+),\s*([^,]+)\].*?\.bindPopup\(\'([^\']*)\'\);'
+    coordinate_data = {}
+    
+    matches = re.finditer(marker_pattern, page_source, re.DOTALL)
+    
+    for match in matches:
+        lat = match.group(1).strip()
+        lon = match.group(2).strip()
+        popup_html = match.group(3)
+        
+        # Extract name
+        name_pattern = r"<b>Nombre:</b>\s*([^<]+)"
+        name_match = re.search(name_pattern, popup_html)
+        name = html.unescape(name_match.group(1).strip()) if name_match else "N/A"
+        
+        # Extract address
+        address_pattern = r"<b>Dirección:</b>\s*([^<]+)"
+        address_match = re.search(address_pattern, popup_html)
+        address = html.unescape(address_match.group(1).strip()) if address_match else "N/A"
+        
+        # Extract modalities
+        modalities_pattern = r"<li>([^<]+)</li>"
+        modalities = [html.unescape(m.strip()) for m in re.findall(modalities_pattern, popup_html)]
+        modalities_text = ','.join(modalities) if modalities else "MISSING"
+        
+        # Store coordinate and detail data by school name
+        coordinate_data[name] = {
+            "Latitud": lat,
+            "Longitud": lon,
+            "Direccion": address,
+            "modality_labels": modalities_text  # Store modalities too!
+        }
+    
+    # Now extract ALL schools from CDATA sections - use multiple strategies
+    target_cdata_pattern = r'//<!\[CDATA\[\s*var osmUrl\s*=(.*?)//\]\]>'
+    target_cdata_match = re.search(target_cdata_pattern, page_source, re.DOTALL)
+    
+    all_school_names = []  # Use list to preserve order for proper ID matching
+    
+    # Strategy 1: Primary target CDATA section
+    if target_cdata_match:
+        cdata_content = target_cdata_match.group(1)
+        print(f"    🔍 Found target CDATA section with 'var osmUrl =' (length: {len(cdata_content)})")
+        
+        # Extract all Nombre: entries from this specific CDATA section using multiple patterns
+        # Pattern 1: Standard <b>Nombre:</b> format
+        nombre_pattern_1 = r'<b>Nombre:</b>\s*([^<]+)'
+        nombres_1 = re.findall(nombre_pattern_1, cdata_content, re.IGNORECASE)
+        
+        # Pattern 2: Alternative Nombre: format (without <b> tags)
+        nombre_pattern_2 = r'Nombre:\s*([^\n\r,<]+)'
+        nombres_2 = re.findall(nombre_pattern_2, cdata_content, re.IGNORECASE)
+        
+        # Keep all schools in order - don't deduplicate by name since same-named schools
+        # are different institutions in different locations with different IDs
+        all_nombres_ordered = []
+        
+        # Process Pattern 1 results in order
+        for nombre in nombres_1:
+            school_name = html.unescape(nombre.strip())
+            if school_name and school_name != "N/A" and len(school_name) > 2:
+                all_nombres_ordered.append(school_name)
+        
+        # Process Pattern 2 results in order (if any)
+        for nombre in nombres_2:
+            school_name = html.unescape(nombre.strip())
+            # Clean up any trailing HTML or unwanted characters
+            school_name = re.sub(r'\s*</.*$', '', school_name)  # Remove trailing HTML tags
+            school_name = re.sub(r'\s*\|.*$', '', school_name)  # Remove trailing pipe separators
+            school_name = school_name.strip()
+            
+            if school_name and school_name != "N/A" and len(school_name) > 2:
+                all_nombres_ordered.append(school_name)
+        
+        # Add all schools to the main list, preserving order
+        for nombre in all_nombres_ordered:
+            all_school_names.append(nombre)  # Use list instead of set to preserve order
+        
+        # Check for same-named schools (these are actually different schools)
+        name_counts = {}
+        for name in all_nombres_ordered:
+            name_counts[name] = name_counts.get(name, 0) + 1
+        
+        same_named_schools = {name: count for name, count in name_counts.items() if count > 1}
+        
+        total_raw_matches = len(nombres_1) + len(nombres_2)
+        print(f"    🔍 Strategy 1 - Target CDATA: {len(all_nombres_ordered)} schools (ALL kept in order)")
+        print(f"        • Pattern 1 (<b>Nombre:</b>): {len(nombres_1)} matches")
+        print(f"        • Pattern 2 (Nombre:): {len(nombres_2)} matches")
+        if same_named_schools:
+            print(f"        • Same-named schools (different locations): {len(same_named_schools)} names")
+            for name, count in same_named_schools.items():
+                print(f"          - '{name}': {count} schools")
+    
+    # Strategy 2: Only use other CDATA sections if primary target failed
+    if len(all_school_names) == 0:
+        print(f"    🔍 Strategy 2 - Fallback to other CDATA sections")
+        cdata_pattern = r'//<!\[CDATA\[(.*?)//\]\]>'
+        cdata_matches = re.findall(cdata_pattern, page_source, re.DOTALL)
+        
+        for i, cdata_content in enumerate(cdata_matches):
+            # Use both patterns for comprehensive extraction
+            nombre_pattern_1 = r'<b>Nombre:</b>\s*([^<]+)'
+            nombre_pattern_2 = r'Nombre:\s*([^\n\r,<]+)'
+            
+            nombres_1 = re.findall(nombre_pattern_1, cdata_content, re.IGNORECASE)
+            nombres_2 = re.findall(nombre_pattern_2, cdata_content, re.IGNORECASE)
+            
+            for nombre in nombres_1:
+                school_name = html.unescape(nombre.strip())
+                if school_name and school_name != "N/A" and len(school_name) > 2:
+                    all_school_names.append(school_name)
+            
+            for nombre in nombres_2:
+                school_name = html.unescape(nombre.strip())
+                # Clean up any trailing HTML or unwanted characters
+                school_name = re.sub(r'\s*</.*$', '', school_name)
+                school_name = re.sub(r'\s*\|.*$', '', school_name)
+                school_name = school_name.strip()
+                
+                if school_name and school_name != "N/A" and len(school_name) > 2:
+                    all_school_names.append(school_name)
+            
+            if len(all_school_names) > 0:
+                print(f"    🔍 Strategy 2 - CDATA {i+1}: Found {len(all_school_names)} schools")
+                break
+    
+    # Strategy 3: Fallback to L.marker data if no CDATA worked
+    if len(all_school_names) == 0:
+        print(f"    🔍 Strategy 3 - Fallback to L.marker data")
+        for name in coordinate_data.keys():
+            all_school_names.append(name)
+        print(f"    🔍 Strategy 3 - L.marker data: Found {len(all_school_names)} schools")
+    
+    # Strategy 4: Final fallback to dropdown data
+    if len(all_school_names) == 0:
+        print(f"    🔍 Strategy 4 - Final fallback to dropdown data")
+        for name in dropdown_data['schools_lookup'].keys():
+            all_school_names.append(name)
+        print(f"    🔍 Strategy 4 - Dropdown data: Found {len(all_school_names)} schools")
+    
+    print(f"    🎯 FINAL EXTRACTION: {len(all_school_names)} schools found (order preserved)")
+    
+    # Create complete school list using ORDER-BASED matching
+    # Schools appear in the same order in CDATA and dropdown
+    schools_data = []
+    matched_coords = 0
+    missing_coords = 0
+    
+    # Get dropdown schools in order (as list) - use new schools_list that preserves duplicates
+    dropdown_schools_ordered = dropdown_data['schools_list']
+    
+    print(f"    🔄 Matching schools by ORDER: CDATA({len(all_school_names)}) vs Dropdown({len(dropdown_schools_ordered)})")
+    
+    for i, school_name in enumerate(all_school_names):
+        # Start with basic school info
+        school = {"Nombre": school_name}
+        
+        # Match by ORDER/POSITION instead of name
+        school_id = None
+        if i < len(dropdown_schools_ordered):
+            dropdown_name, dropdown_info = dropdown_schools_ordered[i]
+            school_id = dropdown_info['school_id']
+            
+            # Debug: show matching for same-named schools
+            if school_name != dropdown_name:
+                print(f"    🔍 Order #{i+1}: CDATA='{school_name}' -> Dropdown='{dropdown_name}' (ID: {school_id})")
+        
+        school['school_id'] = school_id
+        
+        # Try to get coordinates and details
+        if school_name in coordinate_data:
+            school.update(coordinate_data[school_name])
+            matched_coords += 1
+        else:
+            # Try partial matching for coordinates
+            coord_match = None
+            for coord_name, coord_data in coordinate_data.items():
+                if (school_name.upper().strip() in coord_name.upper().strip() or 
+                    coord_name.upper().strip() in school_name.upper().strip()):
+                    coord_match = coord_data
+                    matched_coords += 1
+                    break
+            
+            if coord_match:
+                school.update(coord_match)
+            else:
+                # No coordinate data found
+                school.update({
+                    "Latitud": "MISSING",
+                    "Longitud": "MISSING", 
+                    "Direccion": "MISSING",
+                    "modality_labels": "MISSING"  # Ensure modality_labels is always present
+                })
+                missing_coords += 1
+        
+        schools_data.append(school)
+    
+    # Enhanced reporting
+    extraction_stats = {
+        'total_dropdown_schools': len(dropdown_data['schools_list']),  # Use schools_list for accurate count
+        'total_map_markers': len(coordinate_data),
+        'total_cdata_schools': len(all_school_names),
+        'schools_with_coords': matched_coords,
+        'schools_missing_coords': missing_coords,
+        'modalities_lookup': dropdown_data['modalities_lookup'],
+        'programs_lookup': dropdown_data['programs_lookup'],
+        'html_counter_found': counter_info['counter_found'],
+        'html_counter_text': counter_info['counter_text'],
+        'html_counter_number': counter_info['counter_number']
+    }
+    
+    # Enhance schools with modality and program matching
+    enhanced_schools = []
+    for school in schools_data:
+        enhanced_school = school.copy()
+        
+        # School ID should already be set, but double-check
+        school_name = school.get('Nombre', '').strip()
+        if not enhanced_school.get('school_id'):
+            enhanced_school['school_id'] = dropdown_data['schools_lookup'].get(school_name, {}).get('school_id')
+        
+        # Try to match modalities to get modality IDs
+        modality_labels = school.get('modality_labels', '')
+        matched_modality_ids = []
+        matched_modality_names = []
+        matched_program_ids = []
+        matched_program_names = []
+        if modality_labels and modality_labels != "MISSING":
+            modalities_list = [m.strip() for m in modality_labels.split(',')]
+            
+            for modality in modalities_list:
+                modality_normalized = modality.upper().strip()
+                
+                # Try exact match first for modalities
+                modality_matched = False
+                for lookup_modality, lookup_data in dropdown_data['modalities_lookup'].items():
+                    lookup_normalized = lookup_modality.upper().strip()
+                    if modality_normalized == lookup_normalized:
+                        matched_modality_ids.append(lookup_data['modality_id'])
+                        matched_modality_names.append(lookup_data['modality_name'])
+                        modality_matched = True
+                        break
+                
+                # If no exact match, try partial matching (but more carefully)
+                if not modality_matched:
+                    for lookup_modality, lookup_data in dropdown_data['modalities_lookup'].items():
+                        lookup_normalized = lookup_modality.upper().strip()
+                        # Only match if the modality is a significant substring (avoid short matches)
+                        if (len(modality_normalized) > 3 and modality_normalized in lookup_normalized) or \
+                           (len(lookup_normalized) > 3 and lookup_normalized in modality_normalized):
+                            matched_modality_ids.append(lookup_data['modality_id'])
+                            matched_modality_names.append(lookup_data['modality_name'])
+                            break
+                
+                # Try exact match first for programs
+                program_matched = False
+                for lookup_program, lookup_data in dropdown_data['programs_lookup'].items():
+                    lookup_normalized = lookup_program.upper().strip()
+                    if modality_normalized == lookup_normalized:
+                        matched_program_ids.append(lookup_data['program_id'])
+                        matched_program_names.append(lookup_data['program_name'])
+                        program_matched = True
+                        break
+                
+                # If no exact match, try partial matching for programs
+                if not program_matched:
+                    for lookup_program, lookup_data in dropdown_data['programs_lookup'].items():
+                        lookup_normalized = lookup_program.upper().strip()
+                        # Only match if the modality is a significant substring
+                        if (len(modality_normalized) > 3 and modality_normalized in lookup_normalized) or \
+                           (len(lookup_normalized) > 3 and lookup_normalized in modality_normalized):
+                            matched_program_ids.append(lookup_data['program_id'])
+                            matched_program_names.append(lookup_data['program_name'])
+                            break
+        
+        enhanced_school['modality_ids'] = ','.join(matched_modality_ids) if matched_modality_ids else None
+        enhanced_school['modality_labels'] = ','.join(matched_modality_names) if matched_modality_names else None
+        enhanced_school['program_ids'] = ','.join(matched_program_ids) if matched_program_ids else None
+        enhanced_school['program_labels'] = ','.join(matched_program_names) if matched_program_names else None
+        
+        enhanced_schools.append(enhanced_school)
+    
+    return enhanced_schools, extraction_stats
@@ -0,0 +1,40 @@
+import pytest
+
+import baseline_parser
+from benchmarks import PAGE_MUTATIONS, build_sample_page
+from main_scraper import get_school_data_from_page_source, legacy_get_school_data_from_page_source
+from page_scanner import iter_markers
+
+PAGES = [(f"synthetic-{i + 1}", build_sample_page(i + 1, n_schools=120 if i % 4 else 12)) for i in range(8)]
+PAGES += [(kind, mutate(build_sample_page(100, n_schools=120)))
+          for kind, mutate in PAGE_MUTATIONS.items() if kind != 'popup_missing']
+PARSERS = [legacy_get_school_data_from_page_source, get_school_data_from_page_source]
+
+
+@pytest.mark.parametrize('parse', PARSERS, ids=['legacy', 'single-pass'])
+@pytest.mark.parametrize('label,page', PAGES, ids=[label for label, _ in PAGES])
+def test_parsers_match_the_baseline(parse, label, page):
+    expected_schools, expected_stats = baseline_parser.get_school_data_from_page_source(page)
+    schools, stats = parse(page)
+    assert schools == expected_schools
+    # The current parsers only add timing and match-count stats
+    assert {key: stats[key] for key in expected_stats} == expected_stats
+
+
+@pytest.mark.parametrize('parse', PARSERS, ids=['legacy', 'single-pass'])
+def test_marker_without_popup_is_skipped(parse):
+    page = build_sample_page(100, n_schools=120)
+    first, second = list(iter_markers(page))[:2]
+    page = PAGE_MUTATIONS['popup_missing'](page)
+
+    expected_schools, _ = baseline_parser.get_school_data_from_page_source(page)
+    schools, _ = parse(page)
+    differing = [i for i, (a, b) in enumerate(zip(schools, expected_schools)) if a != b]
+    assert len(schools) == len(expected_schools) and differing == [1]
+
+    # The baseline's lazy regex ran on to the second marker's popup, giving the
+    # second school the first marker's coordinates; that marker is now skipped
+    assert (expected_schools[1]['Latitud'], expected_schools[1]['Longitud']) == first[:2]
+    assert (schools[1]['Latitud'], schools[1]['Longitud']) == second[:2]
+    assert {k: v for k, v in schools[1].items() if k not in ('Latitud', 'Longitud')} == \
+        {k: v for k, v in expected_schools[1].items() if k not in ('Latitud', 'Longitud')}
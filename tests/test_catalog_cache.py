@@ -0,0 +1,47 @@
+from benchmarks import build_sample_page
+from catalog_cache import CatalogCache, dropdown_fingerprint, options_fingerprint, select_blocks
+from main_scraper import extract_dropdown_data, get_school_data_from_page_source
+
+PAGES = [build_sample_page(mun_id, n_schools=30) for mun_id in (10, 11, 12)]
+
+
+def lookups(dropdown_data):
+    return dropdown_data['schools_list'], dropdown_data['modalities_lookup'], dropdown_data['programs_lookup']
+
+
+def test_pages_sharing_a_catalog_share_a_fingerprint():
+    assert len({dropdown_fingerprint(page) for page in PAGES}) == 1
+
+
+def test_different_options_give_different_fingerprints():
+    page = PAGES[0]
+    renamed = page.replace('>PREESCOLAR FORMAL<', '>PREESCOLAR<', 1)
+    renumbered = page.replace('<option value="2">', '<option value="20">', 1)
+    assert renamed != page and renumbered != page
+    assert len({dropdown_fingerprint(p) for p in (page, renamed, renumbered)}) == 3
+
+    modalities = [['1', 'PREESCOLAR FORMAL'], ['2', 'PRIMARIA REGULAR']]
+    assert options_fingerprint(modalities, []) != options_fingerprint(modalities[:1], [])
+    assert options_fingerprint(modalities, []) != options_fingerprint([], modalities)
+
+
+def test_unterminated_select_is_only_a_cache_miss():
+    cache = CatalogCache()
+    extract_dropdown_data(PAGES[0], cache)
+
+    head, tail = PAGES[1].split('ddlPrograma', 1)
+    broken = head + 'ddlPrograma' + tail.replace('</select>', '', 1)
+    assert select_blocks(broken, 'ddlPrograma')[0].endswith('</html>\n')
+    assert dropdown_fingerprint(broken) != dropdown_fingerprint(PAGES[1])
+
+    misses = cache.misses
+    assert lookups(extract_dropdown_data(broken, cache)) == lookups(extract_dropdown_data(broken))
+    assert cache.misses == misses + 1
+
+
+def test_cached_catalogs_give_the_same_records():
+    cache = CatalogCache()
+    for page in PAGES:
+        assert lookups(extract_dropdown_data(page, cache)) == lookups(extract_dropdown_data(page))
+        assert get_school_data_from_page_source(page, cache)[0] == get_school_data_from_page_source(page)[0]
+    assert cache.misses == 1 and len(cache.catalogs) == 1
@@ -0,0 +1,18 @@
+from benchmarks import build_sample_page
+from main_scraper import page_fingerprint, structured_fingerprint
+from page_scanner import iter_markers
+
+
+def test_every_extraction_path_hashes_the_same_markers():
+    page = build_sample_page(10, n_schools=40, seed=1)
+    # The in-page extraction hands coordinates back as numbers, in layer order
+    structured = {'markers': [[float(lat), float(lng), popup] for lat, lng, popup in iter_markers(page)][::-1]}
+
+    assert page_fingerprint(page) == structured_fingerprint(structured)
+    assert page_fingerprint(page.replace('id="__VIEWSTATE"', 'id="__VIEWSTATE" data-noise="1"')) == page_fingerprint(page)
+    assert page_fingerprint(page) != page_fingerprint(build_sample_page(10, n_schools=40, seed=2))
+
+
+def test_pages_without_markers_have_no_fingerprint():
+    assert page_fingerprint('<html><body>Sin datos</body></html>') is None
+    assert structured_fingerprint({'markers': []}) is None
@@ -0,0 +1,32 @@
+from freshness import FreshnessStore
+
+
+def test_fetches_are_saved_only_on_commit(tmp_path):
+    path = str(tmp_path / 'freshness.json')
+    store = FreshnessStore(path)
+    store.update(1, 10, 'hash-a', schools=12)
+    assert not store.is_unchanged(1, 10, 'hash-a')
+    assert FreshnessStore(path).get(1, 10) is None  # a crash here leaves nothing behind
+
+    store.commit()
+    reloaded = FreshnessStore(path)
+    assert reloaded.is_unchanged(1, 10, 'hash-a')
+    assert reloaded.is_fresh(1, 10, ttl_hours=1)
+    assert reloaded.get(1, 10)['schools'] == 12
+
+
+def test_update_without_hash_keeps_the_stored_one(tmp_path):
+    path = str(tmp_path / 'freshness.json')
+    store = FreshnessStore(path)
+    store.update(1, 10, 'hash-a')
+    store.commit()
+    store.update(1, 10)
+    store.commit()
+    assert FreshnessStore(path).is_unchanged(1, 10, 'hash-a')
+
+
+def test_stale_record_is_not_fresh(tmp_path):
+    store = FreshnessStore(str(tmp_path / 'freshness.json'))
+    store.records[store.key(1, 10)] = {'fetched_at': '2020-01-01T00:00:00'}
+    assert not store.is_fresh(1, 10, ttl_hours=24)
+    assert not store.is_fresh(1, 11, ttl_hours=24)
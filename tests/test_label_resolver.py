@@ -0,0 +1,49 @@
+import random
+
+from label_resolver import LabelAutomaton, LabelResolver, linear_resolve
+
+CATALOG = ['PREESCOLAR COMUNITARIO MULTINIVEL', 'PREESCOLAR FORMAL', 'PRIMARIA MULTIGRADO',
+           'PRIMARIA REGULAR', 'SECUNDARIA REGULAR', 'SECUNDARIA A DISTANCIA', 'EDUCACION ESPECIAL',
+           'PRIMARIA', 'CEDA', 'ESPECIAL', 'EDU']
+
+
+def entries(labels):
+    return [(label, {'id': str(position), 'label': label}) for position, label in enumerate(labels)]
+
+
+def test_rules_in_order():
+    resolver = LabelResolver(entries(CATALOG))
+    assert resolver.resolve(' primaria regular ')['label'] == 'PRIMARIA REGULAR'
+    assert resolver.resolve('PRIMARIA')['label'] == 'PRIMARIA'  # exact match before substrings
+    assert resolver.resolve('REGULAR')['label'] == 'PRIMARIA REGULAR'  # first entry containing it
+    assert resolver.resolve('CEDA NOCTURNO')['label'] == 'CEDA'
+    assert resolver.resolve('EDU')['label'] == 'EDU'    # short labels only match exactly
+    assert resolver.resolve('EDUX') is None
+    assert resolver.resolve('') is None
+
+
+def test_memoized_lookups():
+    resolver = LabelResolver(entries(CATALOG))
+    for _ in range(3):
+        resolver.resolve('SECUNDARIA')
+    assert (resolver.misses, resolver.hits) == (1, 2)
+
+
+def test_automaton_reports_the_lowest_pattern():
+    automaton = LabelAutomaton([(2, 'he'), (0, 'she'), (1, 'hers'), (3, 'is')])
+    assert automaton.search('ushers') == 0
+    assert automaton.search('this hers') == 1
+    assert automaton.search('xyz') is None
+
+
+def test_matches_the_linear_scan_on_random_labels():
+    rng = random.Random(0)
+    alphabet = 'ABCE \0'
+    for _ in range(300):
+        labels = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 7))) for _ in range(rng.randint(1, 8))]
+        catalog = entries(labels)
+        resolver = LabelResolver(catalog)
+        queries = labels + [''.join(rng.choice(alphabet + 'abc') for _ in range(rng.randint(0, 9)))
+                            for _ in range(20)]
+        for query in queries:
+            assert resolver.resolve(query) == linear_resolve(catalog, query), (labels, query)
@@ -0,0 +1,23 @@
+import random
+
+from name_index import NameIndex, linear_find
+
+
+def test_first_match_in_page_order():
+    names = ['CENTRO ESCOLAR SAN JOSE', 'SAN JOSE', 'ESCUELA RUBEN DARIO', 'Rubén']
+    index = NameIndex(names)
+    assert index.find('san jose') == 'CENTRO ESCOLAR SAN JOSE'
+    assert index.find('ESCUELA RUBEN DARIO NO. 2') == 'ESCUELA RUBEN DARIO'
+    assert index.find(' rubén ') == 'Rubén'
+    assert index.find('LA ESPERANZA') is None
+
+
+def test_matches_the_linear_scan_on_random_names():
+    rng = random.Random(0)
+    alphabet = 'ABN aé'
+    for _ in range(300):
+        names = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 8))) for _ in range(rng.randint(0, 10))]
+        index = NameIndex(names)
+        queries = names + [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 10))) for _ in range(20)]
+        for query in queries:
+            assert index.find(query) == linear_find(names, query), (names, query)
@@ -0,0 +1,133 @@
+import pytest
+
+import pacing
+from pacing import AIMDPacer, CircuitBreaker, TokenBucketPacer, OK, TIMEOUT, ERROR
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep so pacing runs instantly"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(pacing.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(pacing.time, 'sleep', fake.sleep)
+    # No jitter, so delays can be compared exactly
+    monkeypatch.setattr(pacing.random, 'uniform', lambda a, b: (a + b) / 2)
+    return fake
+
+
+def test_aimd_backs_off_and_recovers_within_bounds(clock):
+    pacer = AIMDPacer(initial_delay=2.5, min_delay=0.5, max_delay=60.0)
+    pacer.record(TIMEOUT)
+    assert pacer.current_delay == pytest.approx(5.0)
+    pacer.record(OK, latency=20.0)  # slow responses back off too
+    assert pacer.current_delay == pytest.approx(10.0)
+
+    for _ in range(20):
+        pacer.record(ERROR)
+    assert pacer.current_delay == pytest.approx(60.0)
+
+    for _ in range(500):
+        pacer.record(OK, latency=1.0)
+    assert pacer.current_delay == pytest.approx(0.5)
+
+
+def test_aimd_spaces_requests_on_one_schedule(clock):
+    pacer = AIMDPacer(initial_delay=2.0)
+    assert pacer.request_delay() == 0.0
+    assert pacer.request_delay() == pytest.approx(2.0)
+    assert pacer.request_delay() == pytest.approx(4.0)
+    clock.now += 10.0
+    assert pacer.request_delay() == 0.0
+
+
+def test_token_bucket_debt_becomes_waits(clock):
+    pacer = TokenBucketPacer(rate=0.4, burst=3)
+    assert [pacer.request_delay() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert pacer.request_delay() == pytest.approx(2.5)
+    assert pacer.request_delay() == pytest.approx(5.0)
+
+    # Refilling pays the debt back before the burst is available again
+    clock.now += 5.0
+    assert pacer.request_delay() == pytest.approx(2.5)
+
+
+def test_token_bucket_halves_on_timeout_and_grows_when_clean(clock):
+    pacer = TokenBucketPacer(rate=0.4, min_rate=0.1, max_rate=0.5)
+    pacer.record(TIMEOUT)
+    assert pacer.rate == pytest.approx(0.2)
+    for _ in range(3):
+        pacer.record(TIMEOUT)
+    assert pacer.rate == pytest.approx(0.1)
+    for _ in range(50):
+        pacer.record(OK, latency=1.0)
+    assert pacer.rate == pytest.approx(0.5)
+
+
+def test_breaker_trips_at_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, window=120.0, cooldown=60.0)
+    breaker.record(TIMEOUT)
+    breaker.record(TIMEOUT)
+    assert not breaker.is_open
+    breaker.record(TIMEOUT)
+    assert breaker.is_open and breaker.trips == 1
+    assert breaker.wait() == pytest.approx(60.0)
+    assert not breaker.is_open
+
+
+def test_breaker_ignores_timeouts_outside_the_window(clock):
+    breaker = CircuitBreaker(threshold=3, window=120.0)
+    breaker.record(TIMEOUT)
+    breaker.record(TIMEOUT)
+    clock.now += 121.0
+    breaker.record(TIMEOUT)
+    assert not breaker.is_open
+
+
+def test_late_timeouts_do_not_extend_an_open_breaker(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60.0)
+    breaker.record(TIMEOUT)
+    breaker.record(TIMEOUT)
+    open_until = breaker.open_until
+    clock.now += 30.0
+    for _ in range(5):
+        breaker.record(TIMEOUT)
+    assert breaker.open_until == open_until
+    assert breaker.trips == 1
+
+
+def test_half_open_timeout_doubles_the_cooldown(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60.0, max_cooldown=200.0)
+    breaker.record(TIMEOUT)
+    breaker.record(TIMEOUT)
+    breaker.wait()
+    breaker.record(TIMEOUT)  # the first result after the cooldown fails
+    assert breaker.trips == 2
+    assert breaker.wait() == pytest.approx(120.0)
+    breaker.record(TIMEOUT)
+    assert breaker.wait() == pytest.approx(200.0)  # capped at max_cooldown
+
+
+def test_success_after_cooldown_resets_the_breaker(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60.0)
+    breaker.record(TIMEOUT)
+    breaker.record(TIMEOUT)
+    breaker.wait()
+    breaker.record(OK)
+    assert not breaker.half_open
+    assert breaker.cooldown == 60.0
+
+    # A lone timeout no longer trips it
+    breaker.record(TIMEOUT)
+    assert not breaker.is_open and breaker.trips == 1
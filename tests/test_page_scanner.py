@@ -0,0 +1,45 @@
+from benchmarks import (LEGACY_CDATA, LEGACY_TARGET_CDATA, PAGE_MUTATIONS, benchmark_dropdowns, benchmark_parser,
+                        build_pathological_page, build_sample_page, fuzz_scanners, legacy_bounded_markers,
+                        legacy_counter_text)
+from page_scanner import find_counter_text, find_target_cdata, iter_cdata_sections, iter_markers, scan_page
+
+
+def test_bounded_scanners_match_the_legacy_regexes_on_token_soup():
+    for seed in range(3):
+        failures = fuzz_scanners(iterations=2000, seed=seed)
+        assert failures == [], failures[:3]
+
+
+def test_bounded_scanners_match_the_legacy_regexes_on_malformed_pages():
+    for kind in ('markers_without_popup', 'counter_missing', 'placeholders_without_counter', 'unterminated_cdata'):
+        page = build_pathological_page(kind, 200)
+        target = LEGACY_TARGET_CDATA.search(page)
+        assert list(iter_markers(page)) == legacy_bounded_markers(page)
+        assert find_counter_text(page) == legacy_counter_text(page)
+        assert find_target_cdata(page) == (target.span(1) if target else None)
+        assert list(iter_cdata_sections(page)) == LEGACY_CDATA.findall(page)
+
+
+def test_single_pass_parser_matches_the_legacy_parser():
+    result = benchmark_parser(n_pages=8, n_schools=60, repeat=1)
+    assert result['pages'] == 8 + len(PAGE_MUTATIONS)
+    assert result['mismatches'] == []
+
+
+def test_scanned_dropdowns_match_the_full_tree():
+    result = benchmark_dropdowns(n_pages=8, n_schools=60, repeat=1)
+    assert result['mismatches'] == []
+    # Only the mutations outside the strict markup subset are left to the tree
+    assert result['fallbacks'] == 3
+    for kind in ('upper_case_tags', 'comment_in_select', 'unknown_entity'):
+        assert scan_page(PAGE_MUTATIONS[kind](build_sample_page(100, n_schools=20)), dropdowns_only=True) is None
+
+
+def test_scan_page_reads_a_plain_page():
+    page = build_sample_page(7, n_schools=25)
+    scan = scan_page(page)
+    assert scan is not None and scan.cdata_found
+    assert scan.markers == list(iter_markers(page))
+    assert len(scan.nombres_bold) == 25 and scan.nombres_plain == []
+    assert scan.counter_text.strip() == 'Centros Educativos: 25'
+    assert len(scan.options['ddlCentroEducativo']) == 26  # with the placeholder
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from record_sinks import create_sink
+
+COLUMNS = ['Nombre', 'dep_id', 'mun_id']
+BATCHES = [
+    [{'Nombre': 'ESCUELA RUBÉN DARÍO', 'dep_id': 1, 'mun_id': 10, 'extra': 'ignored'}],
+    [{'Nombre': 'COLEGIO "SAN JOSÉ", ANEXO', 'dep_id': 1, 'mun_id': 11},
+     {'Nombre': 'CENTRO', 'dep_id': 2, 'mun_id': 20}],
+]
+
+
+def write(output_format, base_path):
+    with create_sink(output_format, base_path, COLUMNS) as sink:
+        for batch in BATCHES:
+            sink.write(batch)
+        sink.write([])
+    return sink
+
+
+def test_csv_sink_writes_the_header_once(tmp_path):
+    sink = write('csv', str(tmp_path / 'schools'))
+    assert sink.path.endswith('schools.csv')
+    assert (sink.rows_written, sink.batches_written) == (3, 2)
+    with open(sink.path, encoding='utf-8') as f:
+        assert f.read() == ('Nombre,dep_id,mun_id\n'
+                            'ESCUELA RUBÉN DARÍO,1,10\n'
+                            '"COLEGIO ""SAN JOSÉ"", ANEXO",1,11\n'
+                            'CENTRO,2,20\n')
+
+
+def test_jsonl_sink_keeps_column_order(tmp_path):
+    sink = write('jsonl', str(tmp_path / 'schools'))
+    with open(sink.path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [list(record) for record in records] == [COLUMNS] * 3
+    assert records[0]['Nombre'] == 'ESCUELA RUBÉN DARÍO'
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'jsonl'])
+def test_rerun_replaces_the_previous_file(tmp_path, output_format):
+    write(output_format, str(tmp_path / 'schools'))
+    sink = write(output_format, str(tmp_path / 'schools'))
+    with open(sink.path, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == (4 if output_format == 'csv' else 3)
+
+
+def test_closed_sink_rejects_writes(tmp_path):
+    sink = write('csv', str(tmp_path / 'schools'))
+    with pytest.raises(ValueError):
+        sink.write(BATCHES[0])
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        create_sink('xlsx', str(tmp_path / 'schools'), COLUMNS)
+
+
+def test_parquet_sink_writes_typed_parts(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with create_sink('parquet', str(tmp_path / 'schools'), COLUMNS, rows_per_part=1) as sink:
+        for batch in BATCHES:
+            sink.write(batch)
+    table = pq.read_table(sink.path)
+    assert sink.parts_written == 2
+    assert table.column('mun_id').to_pylist() == [10, 11, 20]
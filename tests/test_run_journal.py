@@ -0,0 +1,73 @@
+import json
+import os
+
+from record_sinks import create_sink
+from run_journal import RunJournal
+
+
+def rows(n, mun_id):
+    return [{'Nombre': f"ESCUELA {mun_id}-{i}", 'mun_id': mun_id} for i in range(n)]
+
+
+def test_resume_keeps_committed_municipalities(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.commit(1, 1, 'Boaco', 'Boaco', rows(2, 1))
+    journal.commit_failure(1, 2, 'Boaco', 'Camoapa', 'timeout')
+
+    resumed = RunJournal(path, resume=True)
+    assert resumed.completed() == {(1, 1)}
+    assert resumed.load_rows(1, 1) == rows(2, 1)
+    assert resumed.load_rows(1, 2) is None
+
+
+def test_torn_last_line_is_cut_on_resume(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    RunJournal(path).commit(1, 1, 'Boaco', 'Boaco', rows(1, 1))
+    with open(path, 'ab') as f:
+        f.write(b'{"dep_id": 1, "mun_id": 2, "sta')  # crash in the middle of an append
+
+    RunJournal(path, resume=True).commit(1, 3, 'Boaco', 'San Lorenzo', rows(3, 3))
+
+    resumed = RunJournal(path, resume=True)
+    assert resumed.completed() == {(1, 1), (1, 3)}
+    assert resumed.load_rows(1, 3) == rows(3, 3)
+
+
+def test_journal_with_only_a_torn_line(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    with open(path, 'wb') as f:
+        f.write(b'{"dep_id": 1')
+    journal = RunJournal(path, resume=True)
+    assert journal.completed() == set()
+    assert os.path.getsize(path) == 0
+
+
+def test_latest_commit_wins(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.commit(1, 1, 'Boaco', 'Boaco', rows(1, 1))
+    journal.commit(1, 1, 'Boaco', 'Boaco', rows(4, 1))
+    assert RunJournal(path, resume=True).load_rows(1, 1) == rows(4, 1)
+
+
+def test_new_run_moves_the_old_journal_aside(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    RunJournal(path).commit(1, 1, 'Boaco', 'Boaco', rows(1, 1))
+    journal = RunJournal(path)
+    assert journal.completed() == set()
+    [moved] = [name for name in os.listdir(tmp_path) if name.startswith('journal_')]
+    assert RunJournal(str(tmp_path / moved), resume=True).completed() == {(1, 1)}
+
+
+def test_export_streams_rows_in_the_given_order(tmp_path):
+    journal = RunJournal(str(tmp_path / 'journal.jsonl'))
+    journal.commit(1, 2, 'Boaco', 'Camoapa', rows(2, 2))
+    journal.commit(1, 1, 'Boaco', 'Boaco', rows(1, 1))
+
+    with create_sink('jsonl', str(tmp_path / 'out'), ['Nombre', 'mun_id']) as sink:
+        written = journal.export(sink, [(1, 1), (1, 2), (1, 3)])
+
+    assert written == 3
+    with open(sink.path, encoding='utf-8') as f:
+        assert [json.loads(line)['Nombre'] for line in f] == ['ESCUELA 1-0', 'ESCUELA 2-0', 'ESCUELA 2-1']
@@ -0,0 +1,50 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import main_scraper
+from scheduling import MakespanScheduler
+
+TASKS = [('Dept', f"Mun {mun_id}", mun_id) for mun_id in range(1, 21)]
+
+
+def fake_scrape(monkeypatch):
+    """Replace the scrape with a short sleep; returns the started and running counters"""
+    lock = threading.Lock()
+    state = {'started': [], 'running': 0, 'max_running': 0}
+
+    def run(task, context, max_retries):
+        with lock:
+            state['started'].append(task)
+            state['running'] += 1
+            state['max_running'] = max(state['max_running'], state['running'])
+        time.sleep(0.01 if task[2] != 1 else 0.1)
+        with lock:
+            state['running'] -= 1
+        return [{'mun_id': task[2]}]
+
+    monkeypatch.setattr(main_scraper, 'run_municipality_task', run)
+    return state
+
+
+def test_results_come_back_in_task_order_with_a_bounded_window(monkeypatch):
+    state = fake_scrape(monkeypatch)
+    context = SimpleNamespace(workers=3, scheduler=None)
+    results = main_scraper._run_tasks(TASKS, context, max_retries=1)
+
+    task, schools = next(results)
+    # The slow first task holds the rest back: no more than the window was submitted
+    assert task == TASKS[0] and schools == [{'mun_id': 1}]
+    assert len(state['started']) <= 2 * context.workers
+
+    assert [task for task, _ in results] == TASKS[1:]
+    assert state['max_running'] <= context.workers
+
+
+def test_a_schedule_submits_longest_first(monkeypatch):
+    state = fake_scrape(monkeypatch)
+    scheduler = MakespanScheduler({task[2]: task[2] for task in TASKS}, workers=2)
+    context = SimpleNamespace(workers=2, scheduler=scheduler)
+
+    assert [task for task, _ in main_scraper._run_tasks(TASKS, context, max_retries=1)] == TASKS
+    assert set(state['started'][:2]) == {TASKS[-1], TASKS[-2]}
@@ -0,0 +1,54 @@
+import pytest
+
+from scheduling import MakespanScheduler, load_school_counts, simulate_makespan
+
+COUNTS = {1: 100, 2: 40, 3: 20, 4: 0}
+TASKS = [('Dept', f"Mun {mun_id}", mun_id) for mun_id in (4, 3, 2, 1)]
+
+
+def test_order_is_longest_first_and_stable():
+    scheduler = MakespanScheduler(COUNTS, workers=2)
+    assert [task[2] for task in scheduler.order(TASKS)] == [1, 2, 3, 4]
+
+    # Municipalities missing from the previous dataset get the median count (30)
+    unknown = [('Dept', 'New A', 98), ('Dept', 'New B', 99)]
+    ordered = scheduler.order(TASKS + unknown)
+    assert [task[2] for task in ordered] == [1, 2, 98, 99, 3, 4]
+
+
+def test_predict_matches_a_hand_computed_makespan():
+    scheduler = MakespanScheduler(COUNTS, workers=2, base_seconds=10.0, seconds_per_school=0.5)
+    # Estimates 60, 30, 20, 10 s. Longest first: worker A runs 60; worker B runs 30, 20, 10
+    assert scheduler.predict(scheduler.order(TASKS)) == pytest.approx(60.0)
+    # List order: A runs 10, 30 (Mun 2); B runs 20, 60 (Mun 1) and finishes at 80
+    assert scheduler.predict(TASKS) == pytest.approx(80.0)
+    assert simulate_makespan([5.0, 5.0, 5.0], workers=1) == pytest.approx(15.0)
+
+
+def test_recorded_durations_recalibrate_the_model():
+    scheduler = MakespanScheduler(COUNTS, workers=2)
+    scheduler.record(TASKS[0], 7.0)
+    scheduler.record(TASKS[1], 11.0)
+    assert not scheduler.calibrate()  # too few samples
+
+    scheduler.record(TASKS[2], 15.0)
+    scheduler.record(TASKS[3], 27.0)
+    assert scheduler.calibrate()
+    # Exactly 7 s + 0.2 s per school
+    assert scheduler.base_seconds == pytest.approx(7.0)
+    assert scheduler.seconds_per_school == pytest.approx(0.2)
+    assert scheduler.estimate(TASKS[3]) == pytest.approx(27.0)
+
+
+def test_calibration_needs_different_school_counts():
+    scheduler = MakespanScheduler({1: 50}, workers=2)
+    for seconds in (10.0, 12.0, 14.0):
+        scheduler.record(('Dept', 'Mun 1', 1), seconds)
+    assert not scheduler.calibrate()
+    assert scheduler.base_seconds == 10.0
+
+
+def test_school_counts_come_from_the_mun_id_column(tmp_path):
+    path = tmp_path / 'previous.csv'
+    path.write_text('nombre,mun_id\nA,5\nB,5\nC,7\nD,\n', encoding='utf-8')
+    assert load_school_counts(str(path)) == {5: 2, 7: 1}
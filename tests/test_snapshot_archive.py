@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+
+from snapshot_archive import SnapshotArchive
+
+PAGE = "<html><script>L.marker([12.1, -86.2]).bindPopup('<b>Escuela Rubén Darío</b>');</script></html>"
+
+
+def object_files(root):
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(os.path.join(root, 'objects')) for f in files)
+
+
+def test_identical_pages_are_stored_once(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    first = archive.store(PAGE, 1, 10, timestamp='2024-01-01T00:00:00')
+    second = archive.store(PAGE, 2, 20, timestamp='2024-01-02T00:00:00')
+    other = archive.store(PAGE + ' ', 1, 10, timestamp='2024-01-03T00:00:00')
+
+    assert first['sha256'] == second['sha256'] != other['sha256']
+    assert object_files(str(tmp_path)) == sorted([archive.object_path(first['sha256']),
+                                                  archive.object_path(other['sha256'])])
+    assert len(list(archive.entries())) == 3
+
+
+def test_pages_round_trip_through_gzip(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    entry = archive.store(PAGE, 1, 10)
+
+    assert archive.load(entry['sha256']) == PAGE
+    with open(archive.object_path(entry['sha256']), 'rb') as f:
+        assert gzip.decompress(f.read()).decode('utf-8') == PAGE
+    assert entry['bytes'] == len(PAGE.encode('utf-8'))
+    assert entry['has_markers']
+
+
+def test_manifest_keeps_store_order_and_skips_a_torn_line(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    stamps = ['2024-01-03T00:00:00', '2024-01-01T00:00:00', '2024-01-02T00:00:00']
+    for i, stamp in enumerate(stamps):
+        archive.store(PAGE, 1, i, timestamp=stamp)
+    with open(archive.manifest_path, 'a', encoding='utf-8') as f:
+        f.write('{"key": "1/9/')
+
+    entries = list(archive.entries())
+    assert [e['timestamp'] for e in entries] == stamps
+    assert [e['key'] for e in entries] == [f"1/{i}/{s}" for i, s in enumerate(stamps)]
+    with open(archive.manifest_path, encoding='utf-8') as f:
+        assert json.loads(f.readline())['mun_id'] == 0
+
+
+def test_replay_prefers_the_newest_snapshot_with_markers(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    with_markers = archive.store(PAGE, 1, 10, timestamp='2024-01-01T00:00:00')
+    archive.store('<html>timeout</html>', 1, 10, timestamp='2024-01-02T00:00:00')
+    empty_only = archive.store('<html></html>', 1, 11, timestamp='2024-01-02T00:00:00')
+
+    assert archive.find(1, 10) == with_markers
+    assert archive.find(1, 11) == empty_only
+    assert archive.find(1, 12) is None
@@ -0,0 +1,72 @@
+from record_sinks import create_sink
+from work_queue import DONE, FAILED, LEASED, PENDING, WorkQueue
+
+TASKS = [(1, 10, 'Boaco', 'Boaco'), (1, 11, 'Boaco', 'Camoapa'), (2, 20, 'Carazo', 'Jinotepe')]
+
+
+def make_queue(tmp_path, **kwargs):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'), **kwargs)
+    queue.populate(TASKS)
+    return queue
+
+
+def test_populate_is_idempotent(tmp_path):
+    queue = make_queue(tmp_path)
+    assert queue.populate(TASKS) == 0
+    assert queue.counts() == {PENDING: 3, LEASED: 0, DONE: 0, FAILED: 0}
+
+
+def test_tasks_are_leased_once_and_largest_first(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'))
+    queue.populate(TASKS, weights={11: 50, 20: 10})
+    leased = [queue.lease('worker-a')['mun_id'], queue.lease('worker-b')['mun_id'], queue.lease('worker-a')['mun_id']]
+    assert leased == [11, 20, 10]
+    assert queue.lease('worker-b') is None
+
+
+def test_expired_lease_of_a_crashed_worker_is_reclaimed(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'))
+    queue.populate(TASKS[:1])
+    crashed = queue.lease('crashed', lease_seconds=-1)
+    task = queue.lease('survivor')
+    assert (task['dep_id'], task['mun_id']) == (crashed['dep_id'], crashed['mun_id'])
+    assert task['attempts'] == 2
+    assert queue.heartbeat('crashed', [(crashed['dep_id'], crashed['mun_id'])]) == 0
+    assert queue.heartbeat('survivor', [(task['dep_id'], task['mun_id'])]) == 1
+
+
+def test_committed_rows_survive_a_new_process(tmp_path):
+    queue = make_queue(tmp_path)
+    task = queue.lease('worker')
+    assert queue.commit('worker', task['dep_id'], task['mun_id'], [{'Nombre': 'ESCUELA'}])
+
+    reopened = WorkQueue(queue.path)
+    assert reopened.counts()[DONE] == 1
+    assert not reopened.commit('late', task['dep_id'], task['mun_id'], [{'Nombre': 'OTRA'}])
+
+
+def test_failures_are_retried_until_attempts_run_out(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    statuses = []
+    for _ in range(2):
+        task = queue.lease('worker')
+        while task['mun_id'] != 10:
+            queue.commit('worker', task['dep_id'], task['mun_id'], [])
+            task = queue.lease('worker')
+        statuses.append(queue.commit_failure('worker', 1, 10, 'timeout'))
+    assert statuses == [PENDING, FAILED]
+    assert [(task['mun_id'], task['reason']) for task in queue.unfinished()] == [(10, 'timeout')]
+    assert queue.reset_failed() == 1
+    assert queue.lease('worker')['mun_id'] == 10
+
+
+def test_export_follows_task_order(tmp_path):
+    queue = make_queue(tmp_path)
+    for _ in TASKS:
+        task = queue.lease('worker')
+        queue.commit('worker', task['dep_id'], task['mun_id'], [{'Nombre': task['municipality']}])
+
+    with create_sink('csv', str(tmp_path / 'out'), ['Nombre']) as sink:
+        assert queue.export(sink) == 3
+    with open(sink.path, encoding='utf-8') as f:
+        assert f.read() == 'Nombre\nBoaco\nCamoapa\nJinotepe\n'